@@ -0,0 +1,83 @@
+"""
+Embedding latency and agreement: torch (sentence-transformers) vs ONNX.
+
+    pip install -e ".[onnx]"
+    python benchmarks/embedder_latency.py [--model all-MiniLM-L6-v2] [--threads 0]
+
+For each backend it reports single-text latency (p50, as used by recall),
+throughput for batches of 32 (as used by import), and the minimum cosine
+similarity to the torch vectors over the sample texts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from memory_server.onnx_embedder import OnnxEmbedder, model_dir_for
+
+TEXTS = [
+    "The user prefers dark mode in every editor",
+    "Ticket INC-88231 was escalated to the database team",
+    "Customer reported ERR-4021 after upgrading to version 3.2",
+    "The user lives in Lisbon and works remotely for a fintech startup",
+    "Remember that the quarterly report is due on the first Friday",
+    "She mentioned being allergic to peanuts and shellfish",
+    "Deploy failed because the migration locked the orders table",
+    "Prefers concise answers with code examples in Python",
+] * 4
+
+
+def _time(fn, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--onnx-dir", default=None)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    torch_model = SentenceTransformer(args.model, device="cpu")
+    reference = torch_model.encode(TEXTS, normalize_embeddings=True)
+    backends = {"torch": lambda texts: torch_model.encode(texts)}
+
+    root = args.onnx_dir or tempfile.mkdtemp(prefix="plyra-onnx-")
+    for quantize in (False, True):
+        embedder = OnnxEmbedder(
+            args.model,
+            model_dir=model_dir_for(root, args.model),
+            quantize=quantize,
+            threads=args.threads,
+        )
+        embedder.encode(TEXTS[:1])  # export + load outside the timings
+        backends["onnx-int8" if quantize else "onnx"] = embedder.encode
+
+    print(f"model={args.model} texts={len(TEXTS)} runs={args.runs}")
+    print(f"{'backend':10} {'p50 1 text':>11} {'batch/s':>9} {'min cos':>8}")
+    for name, encode in backends.items():
+        single = statistics.median(_time(lambda: encode(TEXTS[:1]), args.runs))
+        batch = statistics.median(_time(lambda: encode(TEXTS), max(5, args.runs // 5)))
+        vectors = np.asarray(encode(TEXTS))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        cos = float((vectors * reference).sum(axis=1).min())
+        print(
+            f"{name:10} {single:>9.2f}ms {len(TEXTS) * 1000 / batch:>9.0f} {cos:>8.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+recall@k of compact embedding storage against exact float32 search.
+
+    pip install -e .
+    python benchmarks/quantize_recall.py [--n 20000] [--dim 384] [--queries 500]
+
+Uses synthetic clustered unit vectors (no model download): queries are
+noisy copies of stored vectors, the way a paraphrased recall query sits
+near the memory it is looking for. For each dtype it reports recall@k of
+the top-k ids vs float32 top-k, bytes per vector, and query time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from memory_server import quantize
+
+
+def _unit(m: np.ndarray) -> np.ndarray:
+    return (m / np.linalg.norm(m, axis=1, keepdims=True)).astype(np.float32)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((args.clusters, args.dim))
+    assign = rng.integers(0, args.clusters, args.n)
+    data = _unit(centers[assign] + 0.6 * rng.standard_normal((args.n, args.dim)))
+    picks = rng.integers(0, args.n, args.queries)
+    queries = _unit(data[picks] + 0.3 * rng.standard_normal((args.queries, args.dim)))
+
+    exact = data @ queries.T  # (n, queries)
+
+    print(f"n={args.n} dim={args.dim} queries={args.queries}")
+    print(f"{'dtype':8} {'bytes':>6} {'r@1':>7} {'r@5':>7} {'r@10':>7} {'ms/q':>7}")
+    for kind in quantize.DTYPES:
+        records = quantize.encode(data, kind)
+        recalls = {1: 0.0, 5: 0.0, 10: 0.0}
+        t0 = time.perf_counter()
+        for qi, q in enumerate(queries):
+            scores = quantize.similarities(records, q)
+            for k in recalls:
+                got = np.argpartition(-scores, k - 1)[:k]
+                want = np.argpartition(-exact[:, qi], k - 1)[:k]
+                recalls[k] += len(set(got) & set(want)) / k
+        ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        r = {k: v / len(queries) for k, v in recalls.items()}
+        print(
+            f"{kind:8} {records.dtype.itemsize:>6} "
+            f"{r[1]:>7.4f} {r[5]:>7.4f} {r[10]:>7.4f} {ms:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
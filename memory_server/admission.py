@@ -0,0 +1,209 @@
+"""
+Admission control per route class.
+
+Every request waits for the embedder thread pool and the shard's SQLite
+writer, so accepting all of a burst just makes every request slow until
+they time out together. Requests are instead admitted per class:
+
+  write  POST /v1/remember, POST /v1/import, DELETE /v1/memory
+  read   POST /v1/recall, POST /v1/context, GET /v1/stats, GET /v1/export,
+         GET /v1/jobs/{id}, GET /v1/extractions/{id}
+  admin  /admin/*
+
+Each class runs at most `limit` requests at once. Further requests wait in a
+bounded queue for at most admission_timeout_ms; when the queue is full or the
+wait runs out they get 503 with Retry-After, which costs nothing downstream.
+A request that long-polls gives its slot back before it starts waiting
+(request.state.release_admission). Messages on a /v1/session WebSocket are
+admitted one at a time, in the class of the route each stands in for.
+
+With admission_fair the queue is round-robin across workspaces: a freed
+slot goes to the workspace at the head of the rotation, which then moves to
+the back. When the queue is full, a newcomer evicts the newest waiter of
+the workspace with the longest queue, so one tenant's burst cannot hold
+every queue slot either.
+
+The workspace is only known after auth, so requests are keyed by API key
+hash; require_auth teaches the controller which workspace a key belongs to.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from typing import Literal
+
+from .config import ServerConfig
+from .keys import hash_key
+
+RouteClass = Literal["write", "read", "admin"]
+
+_WRITE_ROUTES = {
+    ("POST", "/v1/remember"),
+    ("POST", "/v1/import"),
+    ("DELETE", "/v1/memory"),
+}
+_READ_ROUTES = {
+    ("POST", "/v1/recall"),
+    ("POST", "/v1/context"),
+    ("GET", "/v1/stats"),
+    ("GET", "/v1/export"),
+}
+_READ_PREFIXES = ("/v1/jobs/", "/v1/extractions/")
+_MAX_KNOWN_KEYS = 10_000
+
+
+class OverloadedError(Exception):
+    """The request was not admitted (queue full, evicted or waited too long)."""
+
+
+def route_class(method: str, path: str) -> RouteClass | None:
+    if (method, path) in _WRITE_ROUTES:
+        return "write"
+    if (method, path) in _READ_ROUTES or path.startswith(_READ_PREFIXES):
+        return "read"
+    if path.startswith("/admin/"):
+        return "admin"
+    return None
+
+
+class Limiter:
+    """Concurrency limit with a bounded, optionally per-tenant fair, queue."""
+
+    def __init__(self, limit: int, queue_size: int, fair: bool = True) -> None:
+        self._limit = max(1, limit)
+        self._queue_size = max(0, queue_size)
+        self._fair = fair
+        self._active = 0
+        self._queued = 0
+        # tenant → its waiters; iteration order is the round-robin rotation.
+        # A waiter's future resolves True (slot handed over) or False (evicted)
+        self._waiting: OrderedDict[str, deque[asyncio.Future[bool]]] = OrderedDict()
+        self.rejected = 0
+
+    async def acquire(self, tenant: str, timeout: float) -> None:
+        """Take a slot, waiting up to `timeout` seconds. Raises OverloadedError."""
+        if self._active < self._limit and not self._queued:
+            self._active += 1
+            return
+        key = tenant if self._fair else ""
+        if self._queued >= self._queue_size and not self._evict_for(key):
+            self.rejected += 1
+            raise OverloadedError("queue full")
+
+        fut: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(key, deque()).append(fut)
+        self._queued += 1
+        try:
+            granted = await asyncio.wait_for(fut, timeout)
+        except TimeoutError:
+            self._remove(key, fut)
+            self.rejected += 1
+            raise OverloadedError("queue timeout") from None
+        except BaseException:
+            if fut.done() and not fut.cancelled() and fut.result():
+                self.release()  # handed a slot just as the client went away
+            else:
+                self._remove(key, fut)
+            raise
+        if not granted:
+            self.rejected += 1
+            raise OverloadedError("evicted by fair queuing")
+
+    def releaser(self) -> Callable[[], None]:
+        """release() for one admitted request, safe to call more than once."""
+        released = False
+
+        def _release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.release()
+
+        return _release
+
+    def release(self) -> None:
+        while self._waiting:
+            key, waiters = next(iter(self._waiting.items()))
+            fut = waiters.popleft()
+            if waiters:
+                self._waiting.move_to_end(key)
+            else:
+                del self._waiting[key]
+            self._queued -= 1
+            if not fut.done():
+                fut.set_result(True)  # the slot passes straight to the waiter
+                return
+        self._active -= 1
+
+    def _remove(self, key: str, fut: asyncio.Future[bool]) -> None:
+        waiters = self._waiting.get(key)
+        if waiters is None or fut not in waiters:
+            return
+        waiters.remove(fut)
+        self._queued -= 1
+        if not waiters:
+            del self._waiting[key]
+
+    def _evict_for(self, key: str) -> bool:
+        while self._fair and self._waiting:
+            longest = max(self._waiting, key=lambda k: len(self._waiting[k]))
+            mine = len(self._waiting.get(key, ()))
+            waiters = self._waiting[longest]
+            if longest == key or len(waiters) <= mine + 1:
+                return False
+            victim = waiters.pop()  # its newest waiter
+            if not waiters:
+                del self._waiting[longest]
+            self._queued -= 1
+            if not victim.done():  # cancelled waiters are just dropped
+                victim.set_result(False)
+                return True
+        return False
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "limit": self._limit,
+            "active": self._active,
+            "queued": self._queued,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionController:
+    def __init__(self, config: ServerConfig) -> None:
+        self.enabled = config.admission_enabled
+        self.timeout = config.admission_timeout_ms / 1000
+        self.retry_after = config.admission_retry_after_s
+        limits = {
+            "write": config.admission_write_limit,
+            "read": config.admission_read_limit,
+            "admin": config.admission_admin_limit,
+        }
+        self._limiters = {
+            name: Limiter(limit, config.admission_queue_size, config.admission_fair)
+            for name, limit in limits.items()
+        }
+        self._workspaces: OrderedDict[str, str] = OrderedDict()  # key hash → ws
+
+    def limiter(self, cls: RouteClass) -> Limiter:
+        return self._limiters[cls]
+
+    def tenant(self, authorization: str) -> str:
+        """Fair-queuing key for a request: its workspace once known."""
+        if not authorization.startswith("Bearer "):
+            return ""
+        key_hash = hash_key(authorization[len("Bearer ") :])
+        return self._workspaces.get(key_hash, key_hash)
+
+    def learn(self, key_hash: str, workspace_id: str) -> None:
+        self._workspaces[key_hash] = workspace_id
+        self._workspaces.move_to_end(key_hash)
+        while len(self._workspaces) > _MAX_KNOWN_KEYS:
+            self._workspaces.popitem(last=False)
+
+    @property
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {name: lim.stats for name, lim in self._limiters.items()}
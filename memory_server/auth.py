@@ -10,15 +10,20 @@ Middleware:
   3. Looks up hash in KeyStore
   4. Injects AuthContext into request.state
   5. Returns 401 if invalid
+
+WebSocket sessions (/v1/session) authenticate the same way, once, when the
+connection opens.
 """
 
 from __future__ import annotations
 
 from fastapi import HTTPException, Request, status
 from fastapi.security import HTTPBearer
+from starlette.requests import HTTPConnection
 
 from .keys import hash_key
 from .storage.base import KeyStore
+from .tracing import span
 
 security = HTTPBearer(auto_error=False)
 
@@ -28,6 +33,14 @@ async def require_auth(request: Request) -> None:
     FastAPI dependency. Injects AuthContext into request.state.auth.
     Raises 401 if key is missing or invalid.
     """
+    await authenticate(request)
+
+
+async def authenticate(request: HTTPConnection) -> str:
+    """
+    Validate the Bearer key of a request or WebSocket handshake, inject its
+    AuthContext into request.state.auth and return the key's hash.
+    """
     key_store: KeyStore = request.app.state.key_store
 
     # Extract key from Authorization header
@@ -48,7 +61,8 @@ async def require_auth(request: Request) -> None:
         )
 
     key_hash = hash_key(raw_key)
-    auth_ctx = await key_store.validate_key(key_hash)
+    with span("auth"):
+        auth_ctx = await key_store.validate_key(key_hash)
 
     if auth_ctx is None:
         raise HTTPException(
@@ -57,6 +71,9 @@ async def require_auth(request: Request) -> None:
         )
 
     request.state.auth = auth_ctx
+    # Fair queuing keys later requests from this key by its workspace
+    request.app.state.admission.learn(key_hash, auth_ctx.workspace_id)
+    return key_hash
 
 
 async def require_admin(request: Request) -> None:
@@ -0,0 +1,195 @@
+"""
+Cluster mode — namespace affinity across nodes.
+
+Behind a round-robin load balancer every node warms its embedding cache,
+working-memory buffer and shard pool for every tenant, so adding nodes adds
+no cache capacity. In cluster mode each namespace (ws_…:u_…:a_…) is owned
+by one node, picked by consistent hashing over the membership list, and its
+requests are served there:
+
+  proxy     requests for another node's namespace are forwarded to it, and
+            its response returned as is
+  redirect  served here, with X-Plyra-Owner naming the owner so clients
+            can send the next request for the namespace there directly
+
+Every node serves the same data; ownership only decides where it is warm.
+If the owner can't be reached the request is served locally. Forwarded
+requests carry X-Plyra-Forwarded and are always served by the node that
+receives them, so nodes with different membership views can't loop.
+
+Membership is PLYRA_CLUSTER_NODES, or PLYRA_CLUSTER_NODES_FILE with one
+base URL per line, re-read when it changes. Each node has cluster_vnodes
+points on the ring; adding or removing a node moves only the namespaces
+on its arcs.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import logging
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import Request, Response
+
+from .config import ServerConfig
+
+logger = logging.getLogger(__name__)
+
+FORWARDED_HEADER = "X-Plyra-Forwarded"
+OWNER_HEADER = "X-Plyra-Owner"
+NODE_HEADER = "X-Plyra-Node"
+
+# Request headers passed to the owner, and response headers passed back
+_FORWARD_REQUEST = (
+    "authorization",
+    "content-type",
+    "accept",
+    "idempotency-key",
+    "traceparent",
+)
+_FORWARD_RESPONSE = (
+    "content-type",
+    "retry-after",
+    "idempotent-replayed",
+    "x-trace-id",
+    NODE_HEADER.lower(),
+)
+_MEMBERSHIP_CHECK_S = 2.0  # how often the membership file's mtime is checked
+
+
+def _point(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+
+
+class HashRing:
+    """Consistent-hash ring of node URLs, `vnodes` points per node."""
+
+    def __init__(self, nodes: list[str], vnodes: int = 128) -> None:
+        self.nodes = sorted(set(nodes))
+        ring = sorted(
+            (_point(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes)
+        )
+        self._points = [p for p, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def owner(self, key: str) -> str | None:
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, _point(key)) % len(self._points)
+        return self._owners[i]
+
+
+def _read_nodes(path: Path) -> list[str]:
+    nodes = []
+    for line in path.read_text().splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            nodes.append(line.rstrip("/"))
+    return nodes
+
+
+class Cluster:
+    """This node's view of the cluster: membership, ring and forwarding."""
+
+    def __init__(self, config: ServerConfig) -> None:
+        if not config.cluster_self_url:
+            raise ValueError("PLYRA_CLUSTER_SELF_URL is required in cluster mode")
+        self.mode = config.cluster_mode
+        self.self_url = config.cluster_self_url.rstrip("/")
+        self._vnodes = config.cluster_vnodes
+        self._file = (
+            Path(config.cluster_nodes_file).expanduser()
+            if config.cluster_nodes_file
+            else None
+        )
+        self._mtime: float | None = None
+        self._checked = time.monotonic()
+        self._ring = self._build([n.rstrip("/") for n in config.cluster_nodes])
+        if self._file is not None:
+            self._reload()
+        self._client = httpx.AsyncClient(timeout=config.cluster_proxy_timeout_s)
+        self.forwarded = 0
+        self.forward_errors = 0
+
+    def _build(self, nodes: list[str]) -> HashRing:
+        if nodes and self.self_url not in nodes:
+            logger.warning(
+                "Cluster membership doesn't list this node (%s); it owns nothing",
+                self.self_url,
+            )
+        return HashRing(nodes, self._vnodes)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    @property
+    def ring(self) -> HashRing:
+        """The ring for the current membership, re-read if the file changed."""
+        if (
+            self._file is not None
+            and time.monotonic() - self._checked >= _MEMBERSHIP_CHECK_S
+        ):
+            self._checked = time.monotonic()
+            self._reload()
+        return self._ring
+
+    def _reload(self) -> None:
+        try:
+            mtime = self._file.stat().st_mtime
+            if mtime == self._mtime:
+                return
+            nodes = _read_nodes(self._file)
+        except OSError as exc:
+            logger.warning("Cluster membership file unreadable: %s", exc)
+            return
+        self._mtime = mtime
+        if sorted(set(nodes)) != self._ring.nodes:
+            logger.info("Cluster membership: %s", ", ".join(nodes))
+        self._ring = self._build(nodes)
+
+    def owner(self, namespace: str) -> str:
+        """The node that owns `namespace` (this one if membership is empty)."""
+        return self.ring.owner(namespace) or self.self_url
+
+    async def forward(self, request: Request, owner: str) -> Response | None:
+        """The owner's response to `request`, or None if it can't be reached."""
+        headers = {
+            name: value
+            for name in _FORWARD_REQUEST
+            if (value := request.headers.get(name)) is not None
+        }
+        headers[FORWARDED_HEADER] = self.self_url
+        url = owner + request.url.path
+        if request.url.query:
+            url += "?" + request.url.query
+        try:
+            resp = await self._client.request(
+                request.method, url, headers=headers, content=await request.body()
+            )
+        except httpx.HTTPError as exc:
+            self.forward_errors += 1
+            logger.warning("Forward to %s failed, serving locally: %s", owner, exc)
+            return None
+        self.forwarded += 1
+        return Response(
+            resp.content,
+            status_code=resp.status_code,
+            headers={
+                name: value
+                for name in _FORWARD_RESPONSE
+                if (value := resp.headers.get(name)) is not None
+            },
+        )
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "self": self.self_url,
+            "members": self.ring.nodes,
+            "forwarded": self.forwarded,
+            "forward_errors": self.forward_errors,
+        }
@@ -30,6 +30,66 @@ class ServerConfig(BaseSettings):
     store_url: str = "~/.plyra/memory.db"
     vectors_url: str = "~/.plyra/memory.index"
     embed_model: str = "all-MiniLM-L6-v2"
+    # Stored (numpy:// vectors) and cached embeddings: float32, float16 or
+    # int8 with a per-vector scale. Smaller trades a little recall for memory.
+    embedding_dtype: Literal["float32", "float16", "int8"] = "float32"
+    embedding_cache_size: int = 2048  # shared embedder LRU entries
+
+    # Embedder backend
+    #   torch: sentence-transformers (default)
+    #   onnx:  same model through ONNX Runtime, exported on first use
+    embed_backend: Literal["torch", "onnx"] = "torch"
+    embed_onnx_dir: str = "~/.plyra/models"
+    embed_onnx_quantize: bool = False  # int8 dynamic quantization
+    embed_threads: int = 0  # ONNX intra-op threads, 0 = one per core
+    embed_max_length: int = 256  # tokens per text (longer is truncated)
+    embed_batch_size: int = 32  # texts per ONNX run
+
+    # Memory store connections (per shard)
+    store_read_pool_size: int = 4  # read-only connections for recall/stats
+    store_commit_interval_ms: float = 0  # >0: wait up to this long to group writes
+    store_commit_max_batch: int = 64  # writes per group commit
+    store_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+
+    # Working memory of hot sessions kept in process, written through to
+    # SQLite in the background; 0 reads and writes the table directly
+    working_buffer_sessions: int = 1024
+
+    # Lexical (FTS5) index over episode / fact content, fused into recall.
+    # Off by default: it changes ranking. A weight of 0 keeps the index but
+    # ranks (and embeds) exactly as without it
+    lexical_enabled: bool = False
+    lexical_weight: float = 0.3  # share of the final score given to BM25
+    lexical_fast_path_max_terms: int = 3  # short queries skip the embedder
+
+    # Token counts for /v1/context budgets, stored with each memory: "words"
+    # for the word estimate, or a tiktoken encoding ([tokens] extra)
+    context_tokenizer: str = "words"
+
+    # Recall ranking — < 1.0 re-ranks with MMR, trading relevance (λ) for
+    # diversity (1 - λ); 1.0 keeps plain score order
+    recall_mmr_lambda: float = 1.0
+
+    # Query cache — agent-scope recall results per namespace, reused for the
+    # same query (or one at least query_cache_similarity alike) until the
+    # namespace is written to
+    query_cache_entries: int = 10_000  # 0 disables the cache
+    query_cache_ttl_s: float = 3600
+    query_cache_similarity: float = 0.92
+    # Persisted tier — entries written behind to this SQLite file and the
+    # most-hit reloaded at startup; empty keeps the cache in memory only
+    query_cache_path: str = ""
+    query_cache_flush_s: float = 30
+    query_cache_warm_entries: int = 2_000
+
+    # Sharding — split memory across SQLite files to split the writer lock
+    #   none:      everything in store_url / vectors_url
+    #   workspace: one file + vector dir per workspace under shard_dir
+    #   hash:      workspaces hashed into shard_buckets files under shard_dir
+    shard_mode: Literal["none", "workspace", "hash"] = "none"
+    shard_dir: str = "~/.plyra/shards"
+    shard_buckets: int = 16
+    max_open_shards: int = 64  # idle shards beyond this are closed (LRU)
 
     # Optional: Postgres for memory storage
     # database_url: str | None = None
@@ -40,6 +100,109 @@ class ServerConfig(BaseSettings):
     openai_api_key: str | None = None  # OPENAI_API_KEY
     # Priority: groq > anthropic > openai > regex fallback
 
+    # Background jobs (scoped erasure, …)
+    max_background_jobs: int = 1
+    erase_batch_size: int = 500  # rows deleted per transaction
+    erase_batch_pause_ms: int = 5  # yield to live writers between batches
+
+    # Consolidation — promotion (episodes → facts) and summarization for
+    # namespaces touched since their last pass, run in the background
+    consolidation_enabled: bool = True
+    consolidation_interval_s: float = 10  # how often due namespaces are picked up
+    consolidation_delay_s: float = 30  # after the first write, plus jitter
+    consolidation_jitter_s: float = 10
+    consolidation_concurrency: int = 2
+    consolidation_budget_s: float = 60  # per namespace; retried later if cut off
+    consolidation_max_per_pass: int = 100
+    # Without an LLM plyra's summarizer deletes episodes instead of
+    # summarizing them; only allow that explicitly
+    consolidation_summarize_without_llm: bool = False
+
+    # Retention — per-workspace policies (PUT /admin/retention/{workspace_id})
+    # applied by a background sweeper in batches
+    retention_sweep_interval_s: float = 3600  # 0 = only on demand
+    retention_batch_size: int = 500  # rows deleted per transaction
+    retention_dry_run: bool = False  # sweeper only counts what would expire
+
+    # Quotas — per-workspace limits (PUT /admin/quotas/{workspace_id}); these
+    # defaults fill the fields a workspace's quota leaves unset, and unset
+    # here as well means unlimited
+    quota_max_rows: int | None = None
+    quota_max_bytes: int | None = None
+    quota_embeds_per_minute: int | None = None
+    quota_recall_ms_per_minute: float | None = None
+    quota_llm_extractions_per_hour: int | None = None
+    quota_reload_s: float = 30  # quotas set through another node apply within this
+
+    # Re-indexing (POST /admin/reindex/{workspace_id}) into another model's
+    # index while traffic keeps using the current one
+    reindex_batch_size: int = 256  # rows embedded per batch / checkpoint
+    reindex_batch_pause_ms: int = 20
+    reindex_max_rows_per_s: float = 0  # >0: throttle embedding to this rate
+    reindex_switch_timeout_s: float = 30  # wait for a namespace to go idle
+
+    # Snapshots (POST /admin/snapshot) — one .tar.gz of the key store and
+    # every shard, taken while the server keeps serving
+    snapshot_dir: str = "~/.plyra/snapshots"
+    snapshot_pages_per_step: int = 256  # SQLite pages copied per backup step
+    snapshot_step_pause_ms: float = 2  # pause between steps / file chunks
+
+    # Export / import (NDJSON)
+    transfer_page_size: int = 500  # rows per page / per import transaction
+
+    # Tracing — spans for auth, embedding, vector queries, hydration, scoring…
+    trace_sample_rate: float = 0.0  # fraction of requests traced, 0 = off
+    # An inbound traceparent's sampled flag forces tracing only when trusted;
+    # otherwise trace_sample_rate decides and a sampled request joins the trace
+    trace_trust_parent: bool = False
+    trace_slow_ms: float = 0  # >0: log the span tree of slower traced requests
+    #   none: slow-request log only
+    #   file: OTLP/JSON lines appended to trace_file
+    #   otlp: OTLP/HTTP JSON posted to trace_otlp_endpoint (a collector)
+    trace_export: Literal["none", "file", "otlp"] = "none"
+    trace_file: str = "~/.plyra/traces.jsonl"
+    trace_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+
+    # /v1/remember retries
+    idempotency_ttl_s: float = 86400  # Idempotency-Key responses replayed this long
+    idempotency_max_keys: int = 10_000
+    # >0: the same content in a namespace within this many seconds returns
+    # the earlier ids without embedding or storing it again
+    remember_dedup_window_s: float = 0
+    remember_dedup_max_entries: int = 10_000
+    # Fact extraction status (GET /v1/extractions/{id}, wait_for_facts_ms)
+    extraction_status_ttl_s: float = 3600
+    extraction_status_max_entries: int = 10_000
+
+    # WebSocket sessions (/v1/session) — the namespace's Memory stays open
+    # between messages, and is let go after this long without one
+    session_idle_release_s: float = 10
+    session_auth_recheck_s: float = 60  # a revoked key's sessions close within this
+
+    # Admission control — concurrent requests per route class. Beyond the
+    # limit requests queue for up to admission_timeout_ms; a full queue or an
+    # expired wait gets 503 + Retry-After
+    admission_enabled: bool = True
+    admission_write_limit: int = 8  # /v1/remember, /v1/import, DELETE /v1/memory
+    admission_read_limit: int = 16  # /v1/recall, /v1/context, /v1/stats, …
+    admission_admin_limit: int = 4  # /admin/*
+    admission_queue_size: int = 64  # waiting requests per class
+    admission_timeout_ms: float = 2000
+    admission_fair: bool = True  # round-robin the queue across workspaces
+    admission_retry_after_s: int = 1
+
+    # Cluster mode — several nodes serving the same data; each namespace is
+    # owned by one node on a consistent-hash ring, so it is warm on one node
+    #   off:      every node serves every namespace
+    #   proxy:    requests for another node's namespace are forwarded there
+    #   redirect: served here, with X-Plyra-Owner naming the owner
+    cluster_mode: Literal["off", "proxy", "redirect"] = "off"
+    cluster_self_url: str = ""  # this node's base URL, as listed in membership
+    cluster_nodes: list[str] = []  # static membership: every node's base URL
+    cluster_nodes_file: str | None = None  # or one URL per line, re-read on change
+    cluster_vnodes: int = 128  # ring points per node
+    cluster_proxy_timeout_s: float = 60  # covers wait_for_facts_ms long-polls
+
     # Rate limiting (requests per minute per API key)
     rate_limit_rpm: int = 600
 
@@ -0,0 +1,168 @@
+"""
+Background consolidation: promotion and summarization off the request path.
+
+plyra-memory promotes episodes to facts from a fire-and-forget task on
+every episodic search, and only summarizes from Memory.flush(), which the
+server never calls. Here both run from a scheduler instead:
+
+  - /v1/remember marks its namespace dirty for promotion + summarization;
+    /v1/recall and /v1/context mark it for promotion only (recall is what
+    raises access counts).
+  - A namespace becomes due consolidation_delay_s (plus up to
+    consolidation_jitter_s, so a burst of writes doesn't come due at once)
+    after it was first marked. Later marks don't push that back.
+  - Every consolidation_interval_s up to consolidation_max_per_pass due
+    namespaces are consolidated, consolidation_concurrency at a time, each
+    cut off after consolidation_budget_s. A namespace that fails or runs
+    out of budget is marked again and retried on a later pass.
+
+Without an LLM client plyra's summarizer deletes episodes rather than
+summarizing them, so summarization only runs when one is configured unless
+consolidation_summarize_without_llm is set.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from .config import ServerConfig
+
+logger = logging.getLogger(__name__)
+
+# (workspace_id, namespaced_id, write=...) → async context manager yielding a Memory
+MemoryOpener = Callable[..., Any]
+
+
+@dataclass
+class _Dirty:
+    workspace_id: str
+    due: float  # time.monotonic()
+    marked_at: float
+    summarize: bool
+
+
+class ConsolidationScheduler:
+    def __init__(
+        self,
+        config: ServerConfig,
+        open_memory: MemoryOpener,
+        *,
+        summarize: bool = True,
+    ) -> None:
+        self._config = config
+        self._open_memory = open_memory
+        self._summarize = summarize
+        self._dirty: OrderedDict[str, _Dirty] = OrderedDict()  # namespace → entry
+        self._running: set[str] = set()
+        self._sem = asyncio.Semaphore(max(1, config.consolidation_concurrency))
+        self._task: asyncio.Task | None = None
+        self._counts = {
+            "passes": 0,
+            "consolidated": 0,
+            "promoted": 0,
+            "summarized": 0,
+            "timeouts": 0,
+            "errors": 0,
+        }
+
+    def start(self) -> None:
+        if self._config.consolidation_enabled and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def mark(
+        self, workspace_id: str, namespace: str, *, summarize: bool = True
+    ) -> None:
+        """Note that `namespace` changed. Cheap; called on the request path."""
+        if not self._config.consolidation_enabled:
+            return
+        entry = self._dirty.get(namespace)
+        if entry is not None:
+            entry.summarize = entry.summarize or summarize
+            return
+        now = time.monotonic()
+        delay = self._config.consolidation_delay_s
+        delay += random.uniform(0, self._config.consolidation_jitter_s)
+        self._dirty[namespace] = _Dirty(workspace_id, now + delay, now, summarize)
+
+    async def run_due(self, *, force: bool = False) -> int:
+        """Consolidate namespaces that are due (all of them with force)."""
+        now = time.monotonic()
+        batch = [
+            (ns, entry)
+            for ns, entry in self._dirty.items()
+            if (force or entry.due <= now) and ns not in self._running
+        ][: self._config.consolidation_max_per_pass]
+        for ns, _ in batch:
+            del self._dirty[ns]
+        self._counts["passes"] += 1
+        if batch:
+            await asyncio.gather(*(self._run(ns, entry) for ns, entry in batch))
+        return len(batch)
+
+    async def _run(self, namespace: str, entry: _Dirty) -> None:
+        async with self._sem:
+            self._running.add(namespace)
+            try:
+                await asyncio.wait_for(
+                    self._consolidate(entry.workspace_id, namespace, entry.summarize),
+                    self._config.consolidation_budget_s,
+                )
+                self._counts["consolidated"] += 1
+            except TimeoutError:
+                self._counts["timeouts"] += 1
+                logger.warning("Consolidation of %s ran out of budget", namespace)
+                self.mark(entry.workspace_id, namespace, summarize=entry.summarize)
+            except Exception:
+                self._counts["errors"] += 1
+                logger.exception("Consolidation of %s failed", namespace)
+                self.mark(entry.workspace_id, namespace, summarize=entry.summarize)
+            finally:
+                self._running.discard(namespace)
+
+    async def _consolidate(
+        self, workspace_id: str, namespace: str, summarize: bool
+    ) -> None:
+        async with self._open_memory(workspace_id, namespace) as memory:
+            promoted = await memory._promoter.check_and_promote(memory._agent_id)
+            self._counts["promoted"] += len(promoted)
+            if summarize and self._summarize:
+                ran = await memory._summarizer.maybe_summarize(
+                    memory._session_id, memory._agent_id
+                )
+                self._counts["summarized"] += int(ran)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._config.consolidation_interval_s)
+            try:
+                await self.run_due()
+            except Exception:
+                logger.exception("Consolidation pass failed")
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        oldest = min((e.marked_at for e in self._dirty.values()), default=now)
+        return {
+            "backlog": len(self._dirty),
+            "due": sum(1 for e in self._dirty.values() if e.due <= now),
+            "running": len(self._running),
+            "oldest_dirty_s": round(now - oldest, 1),
+            **self._counts,
+        }
@@ -0,0 +1,141 @@
+"""
+Shared embedder with a compact LRU cache.
+
+plyra-memory's SentenceTransformerEmbedder caches `list[float]` — about
+12 KB of Python objects per 384-dim vector. CachedEmbedder wraps any
+Embedder and keeps cached vectors as float32 arrays instead (1.5 KB), so
+the same memory holds many more entries. One instance is shared by every
+request.
+
+Entries stay float32 whatever PLYRA_EMBEDDING_DTYPE is: a cache hit is
+also what /v1/remember, import and re-indexing store, and the vector
+backend quantizes (or not) for itself.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+from plyra_memory.embedders.base import Embedder
+
+from .config import ServerConfig
+from .tracing import span
+
+
+def build_embedder(config: ServerConfig) -> CachedEmbedder:
+    """The shared embedder for `config.embed_backend`, behind the LRU."""
+    if config.embed_backend == "onnx":
+        from .onnx_embedder import OnnxEmbedder, model_dir_for
+
+        inner: Any = OnnxEmbedder(
+            config.embed_model,
+            model_dir=model_dir_for(config.embed_onnx_dir, config.embed_model),
+            quantize=config.embed_onnx_quantize,
+            threads=config.embed_threads,
+            max_length=config.embed_max_length,
+            batch_size=config.embed_batch_size,
+        )
+    else:
+        from plyra_memory.embedders.sentence_transformers import (
+            SentenceTransformerEmbedder,
+        )
+
+        inner = SentenceTransformerEmbedder(config.embed_model, cache_size=0)
+    return CachedEmbedder(inner, cache_size=config.embedding_cache_size)
+
+
+class CachedEmbedder(Embedder):
+    def __init__(self, inner: Any, cache_size: int = 2048):
+        self._inner = inner
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._cache_size = max(0, cache_size)
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()[:24]
+
+    def _get(self, text: str) -> list[float] | None:
+        record = self._cache.get(self._key(text))
+        if record is None:
+            self._misses += 1
+            return None
+        self._cache.move_to_end(self._key(text))
+        self._hits += 1
+        return record.tolist()
+
+    def _put(self, text: str, embedding: list[float]) -> None:
+        if self._cache_size == 0:
+            return
+        key = self._key(text)
+        self._cache[key] = np.asarray(embedding, dtype=np.float32)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    async def embed(self, text: str) -> list[float]:
+        with span("embed") as s:
+            cached = self._get(text)
+            s.set(cache_hit=cached is not None)
+            if cached is not None:
+                return cached
+            embedding = await self._inner.embed(text)
+            self._put(text, embedding)
+            return embedding
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        with span("embed.batch", texts=len(texts)) as s:
+            results: list[list[float] | None] = [self._get(t) for t in texts]
+            missing = [i for i, r in enumerate(results) if r is None]
+            s.set(cache_misses=len(missing))
+            if missing:
+                fresh = await self._inner.embed_batch([texts[i] for i in missing])
+                for i, embedding in zip(missing, fresh):
+                    self._put(texts[i], embedding)
+                    results[i] = embedding
+            return results  # type: ignore[return-value]
+
+    @property
+    def dim(self) -> int:
+        return self._inner.dim
+
+    @property
+    def cache_stats(self) -> dict[str, int]:
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "size": len(self._cache),
+            "bytes": sum(r.nbytes for r in self._cache.values()),
+        }
+
+
+class PreparedEmbedder:
+    """
+    A namespace's embedder that can embed a text ahead of time.
+
+    /v1/remember prepares its content before taking the shard's write lock,
+    so the lock covers the row and vector writes and not the model.
+    """
+
+    def __init__(self, target: Any):
+        self._target = target
+        self._ready: dict[str, list[float]] = {}
+
+    async def prepare(self, text: str) -> None:
+        self._ready[text] = await self._target.embed(text)
+
+    def discard(self, text: str) -> None:
+        self._ready.pop(text, None)
+
+    async def embed(self, text: str) -> list[float]:
+        ready = self._ready.pop(text, None)
+        if ready is not None:
+            return ready
+        return await self._target.embed(text)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
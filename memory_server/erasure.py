@@ -0,0 +1,141 @@
+"""
+Scoped erasure of memory rows and their vectors.
+
+Deletes everything stored under a namespace prefix (workspace, user or
+agent — see namespace.py) from the requested layers. Work is done in
+batches of `batch_size` rows, each batch in its own short transaction, with
+a small pause in between so live /v1/remember writers can take the WAL lock.
+Vectors for each batch are removed with a single bulk call before the rows
+go, so an interrupted job simply picks the remaining rows up on re-run.
+Given the shard's `write_lock`, each batch holds it, so a snapshot never
+pins a batch with its vectors gone but its rows still there.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from pathlib import Path
+from typing import Any
+
+import aiosqlite
+
+from .namespace import scope_clause
+
+logger = logging.getLogger(__name__)
+
+LAYER_TABLES = {
+    "working": "working_entries",
+    "episodic": "episodes",
+    "semantic": "facts",
+}
+VECTOR_LAYERS = {"episodic", "semantic"}
+
+
+async def delete_vectors(vectors: Any, ids: list[str]) -> None:
+    """Remove many vectors at once, falling back to one call per id."""
+    if not ids:
+        return
+    delete_many = getattr(vectors, "delete_many", None)
+    if delete_many is not None:
+        await delete_many(ids)
+        return
+    collection = getattr(vectors, "_collection", None)
+    if collection is not None:
+        # ChromaVectors only exposes single-id delete; go to the collection
+        await asyncio.to_thread(collection.delete, ids=ids)
+        return
+    for vid in ids:
+        await vectors.delete(vid)
+
+
+async def delete_rows(
+    conn: aiosqlite.Connection,
+    vectors: Any,
+    layer: str,
+    ids: list[str],
+    *,
+    lock: asyncio.Lock | None = None,
+) -> None:
+    """Delete one batch of rows (vectors first) in its own transaction."""
+    async with lock or contextlib.nullcontext():
+        if layer in VECTOR_LAYERS:
+            await delete_vectors(vectors, ids)
+        placeholders = ",".join("?" for _ in ids)
+        await conn.execute(
+            f"DELETE FROM {LAYER_TABLES[layer]} WHERE id IN ({placeholders})",  # noqa: S608
+            ids,
+        )
+        await conn.commit()
+
+
+async def ensure_scope_indexes(conn: aiosqlite.Connection) -> None:
+    """working_entries ships without an agent_id index; scoped scans need one."""
+    if await table_exists(conn, "working_entries"):
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_working_agent ON working_entries(agent_id)"
+        )
+        await conn.commit()
+
+
+async def table_exists(conn: aiosqlite.Connection, table: str) -> bool:
+    rows = await conn.execute_fetchall(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    )
+    return bool(rows)
+
+
+async def erase_scope(
+    db_path: str,
+    vectors: Any,
+    prefix: str,
+    layers: list[str],
+    *,
+    batch_size: int = 500,
+    pause_ms: int = 5,
+    counts: dict[str, Any] | None = None,
+    lock: asyncio.Lock | None = None,
+) -> dict[str, Any]:
+    """
+    Delete every row under `prefix` in `layers`. Returns per-layer counts.
+    `counts` is updated in place after every batch so callers can report
+    progress while the erasure is still running. `lock` is held per batch.
+    """
+    counts = counts if counts is not None else {}
+    conn = await aiosqlite.connect(str(Path(db_path).expanduser()))
+    try:
+        await conn.execute("PRAGMA busy_timeout=5000")
+        await ensure_scope_indexes(conn)
+        clause, params = scope_clause("agent_id", prefix)
+
+        for layer in layers:
+            table = LAYER_TABLES[layer]
+            counts.setdefault(layer, 0)
+            if not await table_exists(conn, table):
+                continue
+            while True:
+                rows = await conn.execute_fetchall(
+                    f"SELECT id FROM {table} WHERE {clause} LIMIT ?",  # noqa: S608
+                    (*params, batch_size),
+                )
+                ids = [r[0] for r in rows]
+                if not ids:
+                    break
+                await delete_rows(conn, vectors, layer, ids, lock=lock)
+                counts[layer] += len(ids)
+                await asyncio.sleep(pause_ms / 1000)
+
+        # Sessions only go once nothing in the scope can reference them
+        if set(layers) >= set(LAYER_TABLES) and await table_exists(conn, "sessions"):
+            cur = await conn.execute(
+                f"DELETE FROM sessions WHERE {clause}",  # noqa: S608
+                params,
+            )
+            await conn.commit()
+            counts["sessions"] = cur.rowcount
+    finally:
+        await conn.close()
+
+    logger.info("Erased %s under %s: %s", ",".join(layers), prefix, counts)
+    return counts
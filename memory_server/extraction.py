@@ -0,0 +1,139 @@
+"""
+Status of background fact extraction.
+
+plyra-memory's remember() extracts facts in a fire-and-forget task and
+swallows its errors, so a caller can't tell when, or whether, the facts
+from a /v1/remember landed. track() registers the extraction before
+remember() runs: it gets an id (returned as extraction_id) and a status —
+queued → running → done | failed — plus the ids of the facts it stored.
+A Memory's _extract_and_learn is wrapped once, the first time it is
+tracked; each call takes the oldest queued extraction for its text, so a
+/v1/session Memory reused across remembers reports every one separately.
+
+GET /v1/extractions/{id} reports the status. wait() long-polls on the
+extraction's asyncio.Event until it finishes or the timeout expires; that
+backs wait_for_facts_ms on /v1/remember and wait_ms on the status route.
+
+Statuses are process-local, kept for extraction_status_ttl_s and at most
+extraction_status_max_entries of them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from .models import ExtractionInfo, _new_id, _utcnow
+
+
+@dataclass
+class Extraction:
+    extraction_id: str
+    workspace_id: str
+    namespace: str
+    expires: float  # time.monotonic()
+    status: str = "queued"
+    fact_ids: list[str] = field(default_factory=list)
+    error: str | None = None
+    created_at: datetime = field(default_factory=_utcnow)
+    finished_at: datetime | None = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    # The Memory's queue this waits in until its extraction starts
+    queue: list[tuple[str, Extraction]] | None = field(default=None, repr=False)
+
+    def finish(self, status: str, error: str | None = None) -> None:
+        self.status, self.error = status, error
+        self.finished_at = _utcnow()
+        self.done.set()
+
+    def info(self) -> dict[str, Any]:
+        return ExtractionInfo(
+            extraction_id=self.extraction_id,
+            status=self.status,
+            fact_ids=self.fact_ids,
+            error=self.error,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+        ).model_dump()
+
+
+def _tracked(extract: Any, queue: list[tuple[str, Extraction]]) -> Any:
+    """`extract` reporting to the oldest queued extraction of the same text."""
+
+    async def run(text: str) -> list[Any]:
+        i = next((i for i, item in enumerate(queue) if item[0] == text), None)
+        if i is None:
+            return await extract(text)
+        entry = queue.pop(i)[1]
+        entry.queue = None
+        entry.status = "running"
+        try:
+            facts = await extract(text)
+        except BaseException as exc:
+            entry.finish("failed", str(exc) or type(exc).__name__)
+            raise
+        entry.fact_ids = list(dict.fromkeys(f.id for f in facts))
+        entry.finish("done")
+        return facts
+
+    return run
+
+
+class ExtractionTracker:
+    """Bounded TTL map of extraction_id → Extraction."""
+
+    def __init__(self, ttl_s: float = 3600, max_entries: int = 10_000) -> None:
+        self._ttl = ttl_s
+        self._max = max(1, max_entries)
+        self._entries: OrderedDict[str, Extraction] = OrderedDict()
+
+    def track(self, memory: Any, workspace_id: str, text: str) -> Extraction:
+        """
+        Register the extraction of `text` that `memory` runs next (call
+        before remember()).
+        """
+        entry = Extraction(
+            _new_id(), workspace_id, memory._agent_id, time.monotonic() + self._ttl
+        )
+        self._entries[entry.extraction_id] = entry
+        while len(self._entries) > self._max:
+            self._entries.popitem(last=False)
+        queue = getattr(memory, "_tracked_extractions", None)
+        if queue is None:
+            queue = memory._tracked_extractions = []
+            memory._extract_and_learn = _tracked(memory._extract_and_learn, queue)
+        entry.queue = queue
+        queue.append((text, entry))
+        return entry
+
+    def discard(self, entry: Extraction) -> None:
+        """Forget an extraction that never started (remember() failed)."""
+        self._entries.pop(entry.extraction_id, None)
+        if entry.queue is not None:
+            entry.queue[:] = [item for item in entry.queue if item[1] is not entry]
+        entry.done.set()
+
+    def get(self, workspace_id: str, extraction_id: str) -> Extraction | None:
+        entry = self._entries.get(extraction_id)
+        if entry is None or entry.workspace_id != workspace_id:
+            return None
+        if entry.expires < time.monotonic():
+            del self._entries[extraction_id]
+            return None
+        return entry
+
+    async def wait(self, entry: Extraction, timeout_ms: float) -> Extraction:
+        """Wait up to `timeout_ms` for `entry` to finish."""
+        if timeout_ms > 0 and not entry.done.is_set():
+            try:
+                await asyncio.wait_for(entry.done.wait(), timeout_ms / 1000)
+            except TimeoutError:
+                pass
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
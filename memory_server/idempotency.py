@@ -0,0 +1,140 @@
+"""
+Retry safety for /v1/remember.
+
+Agent frameworks retry on timeouts, and every retry of a remember writes
+another working entry and episode, re-embeds, and queues another (LLM)
+extraction. Two guards, both process-local:
+
+  Idempotency-Key header
+      The first response for (workspace, key) is kept for idempotency_ttl_s
+      and replayed for retries with `Idempotent-Replayed: true`. A retry
+      that arrives while the original is still running waits for it. Reusing
+      a key with a different body is rejected (422). A failed request
+      leaves no entry, so its retry runs again.
+
+  Content-hash dedup (remember_dedup_window_s > 0)
+      The same content written to the same namespace within the window
+      returns the earlier ids with `deduplicated: true`, before any
+      embedding, shard lock or storage work.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+
+class KeyReusedError(ValueError):
+    """An Idempotency-Key was sent again with a different request body."""
+
+
+def fingerprint(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    expires: float
+    payload: dict[str, Any] | None = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class IdempotencyStore:
+    """Bounded TTL map of (scope, Idempotency-Key) → response payload."""
+
+    def __init__(self, ttl_s: float = 86400, max_entries: int = 10_000) -> None:
+        self._ttl = ttl_s
+        self._max = max(1, max_entries)
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+
+    async def begin(self, scope: str, key: str, body: str) -> dict[str, Any] | None:
+        """
+        The stored payload if this is a retry, else None — the caller then
+        runs the request and must call finish() or abort().
+        """
+        fp = fingerprint(body)
+        while True:
+            entry = self._live(scope, key)
+            if entry is None:
+                self._entries[(scope, key)] = _Entry(fp, time.monotonic() + self._ttl)
+                self._trim()
+                return None
+            if entry.fingerprint != fp:
+                raise KeyReusedError(key)
+            if entry.done.is_set() and entry.payload is not None:
+                return entry.payload
+            await entry.done.wait()  # original still running; re-check after
+
+    def finish(self, scope: str, key: str, payload: dict[str, Any]) -> None:
+        entry = self._entries.get((scope, key))
+        if entry is not None:
+            entry.payload = payload
+            entry.done.set()
+
+    def abort(self, scope: str, key: str) -> None:
+        entry = self._entries.pop((scope, key), None)
+        if entry is not None:
+            entry.done.set()  # waiters retry the claim themselves
+
+    def _live(self, scope: str, key: str) -> _Entry | None:
+        entry = self._entries.get((scope, key))
+        if entry is not None and entry.expires < time.monotonic():
+            del self._entries[(scope, key)]
+            entry.done.set()
+            return None
+        return entry
+
+    def _trim(self) -> None:
+        while len(self._entries) > self._max:
+            _, oldest = self._entries.popitem(last=False)
+            oldest.done.set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DedupWindow:
+    """Recently remembered content per namespace → the ids it produced."""
+
+    def __init__(self, window_s: float, max_entries: int = 10_000) -> None:
+        self._window = window_s
+        self._max = max(1, max_entries)
+        # fingerprint → (when, namespace, ids)
+        self._seen: OrderedDict[str, tuple[float, str, dict[str, Any]]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self._window > 0
+
+    def get(self, namespace: str, content: str) -> dict[str, Any] | None:
+        key = fingerprint(namespace, content)
+        hit = self._seen.get(key)
+        if hit is None:
+            return None
+        if time.monotonic() - hit[0] > self._window:
+            del self._seen[key]
+            return None
+        return hit[2]
+
+    def put(self, namespace: str, content: str, ids: dict[str, Any]) -> None:
+        key = fingerprint(namespace, content)
+        self._seen[key] = (time.monotonic(), namespace, ids)
+        self._seen.move_to_end(key)
+        while len(self._seen) > self._max:
+            self._seen.popitem(last=False)
+
+    def invalidate(self, prefix: str) -> int:
+        """Forget content remembered in `prefix` and every namespace under it."""
+        stale = [
+            key
+            for key, (_, namespace, _) in self._seen.items()
+            if namespace == prefix or namespace.startswith(prefix + ":")
+        ]
+        for key in stale:
+            del self._seen[key]
+        return len(stale)
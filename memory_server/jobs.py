@@ -0,0 +1,94 @@
+"""
+Background job registry.
+
+Long-running maintenance work (scoped erasure, re-indexing, …) runs as an
+asyncio task so the request that started it can return immediately with a
+job id. Callers poll the job for status and progress.
+
+Jobs are kept in memory only — a restart forgets them. Finished jobs are
+trimmed oldest-first once more than `history` have accumulated.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from .models import JobInfo, _new_id, _utcnow
+
+logger = logging.getLogger(__name__)
+
+JobFn = Callable[[JobInfo], Awaitable[dict[str, Any] | None]]
+
+
+class JobRegistry:
+    """Runs jobs with bounded concurrency and remembers their status."""
+
+    def __init__(self, max_concurrent: int = 1, history: int = 100):
+        self._sem = asyncio.Semaphore(max(1, max_concurrent))
+        self._history = max(1, history)
+        self._jobs: OrderedDict[str, JobInfo] = OrderedDict()
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def submit(self, kind: str, workspace_id: str | None, fn: JobFn) -> JobInfo:
+        """
+        Register a job and schedule it. Returns immediately.
+        `fn` receives the live JobInfo and may update `progress` as it goes;
+        whatever dict it returns is merged into `progress` on success.
+        """
+        job = JobInfo(job_id=_new_id(), kind=kind, workspace_id=workspace_id)
+        self._jobs[job.job_id] = job
+        self._trim()
+        task = asyncio.create_task(self._run(job, fn))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        return job
+
+    async def _run(self, job: JobInfo, fn: JobFn) -> None:
+        async with self._sem:
+            job.status = "running"
+            job.started_at = _utcnow()
+            try:
+                result = await fn(job)
+                if result:
+                    job.progress.update(result)
+                job.status = "done"
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+                raise
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job.job_id, job.kind)
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = _utcnow()
+
+    def get(self, job_id: str) -> JobInfo | None:
+        return self._jobs.get(job_id)
+
+    def list(self, kind: str | None = None) -> list[JobInfo]:
+        return [j for j in self._jobs.values() if kind is None or j.kind == kind]
+
+    async def wait(self, job_id: str) -> JobInfo | None:
+        """Block until the job finishes (used by tests and shutdown)."""
+        task = self._tasks.get(job_id)
+        if task:
+            await asyncio.gather(task, return_exceptions=True)
+        return self._jobs.get(job_id)
+
+    async def close(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def _trim(self) -> None:
+        finished = [
+            jid
+            for jid, j in self._jobs.items()
+            if j.status in ("done", "failed", "cancelled")
+        ]
+        while len(self._jobs) > self._history and finished:
+            self._jobs.pop(finished.pop(0), None)
@@ -0,0 +1,143 @@
+"""
+FTS5 lexical index over episode and fact content.
+
+Embedding similarity is poor at exact identifiers — ticket numbers, error
+codes, names. An FTS5 table per layer, kept in sync by triggers, lets recall
+look those up directly and fuse the BM25 score with the vector score.
+
+The FTS tables store their own copy of the text under the source row's
+rowid instead of using external content: imports replace rows with
+INSERT OR REPLACE, which does not fire delete triggers, and an external
+content index would be corrupted by that. Orphaned entries are harmless —
+every search joins back to the source table.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import aiosqlite
+
+from .namespace import scope_clause
+
+# layer → (source table, FTS table, recency column)
+LEXICAL_TABLES = {
+    "episodic": ("episodes", "episodes_fts", "created_at"),
+    "semantic": ("facts", "facts_fts", "last_accessed"),
+}
+
+_TOKEN = re.compile(r"\w[\w.\-/]*")
+
+
+@dataclass(slots=True)
+class LexicalHit:
+    layer: str
+    id: str
+    content: str
+    importance: float
+    created_at: datetime
+    recency_at: datetime
+    score: float  # BM25 normalized to (0, 1] within the query
+    namespace: str = ""
+
+
+async def ensure_fts(conn: aiosqlite.Connection) -> None:
+    """Create FTS tables + sync triggers, backfilling on first creation."""
+    for source, fts, _ in LEXICAL_TABLES.values():
+        rows = await conn.execute_fetchall(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)
+        )
+        if rows:
+            continue
+        await conn.executescript(
+            f"""
+            CREATE VIRTUAL TABLE {fts} USING fts5(content, tokenize='unicode61');
+            CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN
+                INSERT OR REPLACE INTO {fts}(rowid, content)
+                VALUES (new.rowid, new.content);
+            END;
+            CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN
+                DELETE FROM {fts} WHERE rowid = old.rowid;
+            END;
+            CREATE TRIGGER {fts}_au AFTER UPDATE OF content ON {source} BEGIN
+                UPDATE {fts} SET content = new.content WHERE rowid = old.rowid;
+            END;
+            INSERT INTO {fts}(rowid, content) SELECT rowid, content FROM {source};
+            """
+        )
+    await conn.commit()
+
+
+def terms(query: str) -> list[str]:
+    return _TOKEN.findall(query)
+
+
+def match_expression(query: str) -> str | None:
+    """
+    OR of quoted terms. Quoting keeps FTS5 operators in user text inert and
+    turns "ERR-4021" into the phrase ERR 4021 rather than a column filter.
+    """
+    quoted = ['"' + t.replace('"', '""') + '"' for t in terms(query)]
+    return " OR ".join(quoted) if quoted else None
+
+
+async def search(
+    conn: aiosqlite.Connection,
+    query: str,
+    agent_id: str,
+    layers: list[str],
+    limit: int,
+    *,
+    nested: bool = False,
+) -> list[LexicalHit]:
+    """
+    Best BM25 matches for `agent_id` across `layers`, best first. With
+    nested=True, for `agent_id` and every namespace under it.
+    """
+    expr = match_expression(query)
+    if expr is None:
+        return []
+    if nested:
+        scope, params = scope_clause("s.agent_id", agent_id)
+    else:
+        scope, params = "s.agent_id = ?", (agent_id,)
+    raw: list[tuple[str, aiosqlite.Row, float]] = []
+    for layer in layers:
+        if layer not in LEXICAL_TABLES:
+            continue
+        source, fts, recency_col = LEXICAL_TABLES[layer]
+        rows = await conn.execute_fetchall(
+            f"SELECT s.id, s.content, s.importance, s.created_at, "  # noqa: S608
+            f"s.{recency_col} AS recency_at, bm25({fts}) AS rank, s.agent_id "
+            f"FROM {fts} JOIN {source} s ON s.rowid = {fts}.rowid "
+            f"WHERE {fts} MATCH ? AND {scope} "
+            f"ORDER BY rank LIMIT ?",
+            (expr, *params, limit),
+        )
+        raw.extend((layer, r, -r[5]) for r in rows)
+
+    if not raw:
+        return []
+    best = max(s for _, _, s in raw) or 1.0
+    hits = [
+        LexicalHit(
+            layer=layer,
+            id=r[0],
+            content=r[1],
+            importance=r[2],
+            created_at=_to_dt(r[3]),
+            recency_at=_to_dt(r[4]),
+            score=max(s, 0.0) / best if best > 0 else 1.0,
+            namespace=r[6],
+        )
+        for layer, r, s in raw
+    ]
+    hits.sort(key=lambda h: h.score, reverse=True)
+    return hits[:limit]
+
+
+def _to_dt(value: str) -> datetime:
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=UTC)
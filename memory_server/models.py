@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import UTC, datetime
-from typing import Any
+from typing import Any, Literal
 from uuid import uuid4
 
 from pydantic import BaseModel, Field
@@ -63,12 +63,28 @@ class RememberRequest(BaseModel):
     importance: float = Field(0.6, ge=0.0, le=1.0)
     source: str | None = None
     metadata: dict[str, Any] = Field(default_factory=dict)
+    # >0: wait up to this long for fact extraction before answering
+    wait_for_facts_ms: int = Field(0, ge=0, le=30_000)
+
+
+class ExtractionInfo(BaseModel):
+    """Status of the background fact extraction of one /v1/remember."""
+
+    extraction_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    fact_ids: list[str] = Field(default_factory=list)  # facts stored or reinforced
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
 
 
 class RememberResponse(BaseModel):
     working_entry_id: str | None
     episode_id: str | None
     facts_queued: bool  # True — extraction runs in background
+    deduplicated: bool = False  # True — same content was just remembered
+    extraction_id: str | None = None  # GET /v1/extractions/{extraction_id}
+    extraction: ExtractionInfo | None = None  # with wait_for_facts_ms
     latency_ms: float
 
 
@@ -79,11 +95,27 @@ class RecallRequest(BaseModel):
     top_k: int = Field(10, ge=1, le=100)
     token_budget: int | None = None
     layers: list[str] | None = None  # ["working", "episodic", "semantic"]
+    # "workspace": every namespace under workspace[/user[/agent]]
+    scope: Literal["agent", "workspace"] = "agent"
+    max_per_agent: int | None = Field(None, ge=1)  # workspace scope only
+
+
+class RecallItem(BaseModel):
+    id: str
+    layer: Literal["working", "episodic", "semantic"]
+    content: str
+    score: float
+    similarity: float
+    recency: float
+    importance: float
+    created_at: datetime
+    source_id: str
+    metadata: dict[str, Any] = Field(default_factory=dict)
 
 
 class RecallResponse(BaseModel):
     query: str
-    results: list[dict[str, Any]]
+    results: list[RecallItem]
     total_found: int
     cache_hit: bool
     latency_ms: float
@@ -94,6 +126,8 @@ class ContextRequest(BaseModel):
     user_id: str | None = None
     agent_id: str | None = None
     token_budget: int = Field(2_048, ge=64, le=32_000)
+    scope: Literal["agent", "workspace"] = "agent"
+    max_per_agent: int | None = Field(None, ge=1)
 
 
 class ContextResponse(BaseModel):
@@ -118,12 +152,92 @@ class StatsResponse(BaseModel):
 class DeleteMemoryRequest(BaseModel):
     user_id: str | None = None
     agent_id: str | None = None
-    layer: str | None = None  # "working" | "episodic" | "semantic" | None=all
+    # "working" | "episodic" | "semantic", a list of them, or "all";
+    # None clears working memory only
+    layer: str | list[str] | None = None
 
 
 class DeleteMemoryResponse(BaseModel):
-    deleted: bool
+    deleted: bool  # False while the erasure job is still running
     message: str
+    job_id: str | None = None  # poll GET /v1/jobs/{job_id}
+
+
+class ImportResponse(BaseModel):
+    workspace_id: str
+    sessions: int
+    working: int
+    episodic: int
+    semantic: int
+    reembedded: int  # vectors recomputed because no usable embedding was sent
+    latency_ms: float
+
+
+# ── Retention models ───────────────────────────────────────────────────────────
+
+
+class RetentionPolicy(BaseModel):
+    """Per-workspace expiry rules. Unset fields don't expire anything."""
+
+    working_max_age_days: float | None = Field(None, gt=0)
+    episodic_max_age_days: float | None = Field(None, gt=0)
+    semantic_max_age_days: float | None = Field(None, gt=0)
+    # Newest N kept per agent namespace
+    max_episodes_per_agent: int | None = Field(None, ge=0)
+    max_facts_per_agent: int | None = Field(None, ge=0)
+    # Episodes / facts below this importance go once older than the grace period
+    min_importance: float | None = Field(None, ge=0.0, le=1.0)
+    importance_grace_days: float = Field(1.0, ge=0)
+
+
+class RetentionPolicyInfo(BaseModel):
+    workspace_id: str
+    policy: RetentionPolicy
+    updated_at: datetime
+
+
+class SweepRequest(BaseModel):
+    dry_run: bool = False  # count what would expire without deleting it
+
+
+class ReindexRequest(BaseModel):
+    embed_model: str | None = None  # default: PLYRA_EMBED_MODEL
+
+
+class WorkspaceQuota(BaseModel):
+    """Per-workspace limits. Unset fields fall back to PLYRA_QUOTA_* defaults."""
+
+    # Stored memories: remember and import are refused at this size
+    max_rows: int | None = Field(None, ge=0)
+    max_bytes: int | None = Field(None, ge=0)  # content bytes
+    # Rates over a sliding window: requests are refused with Retry-After
+    embeds_per_minute: int | None = Field(None, ge=0)
+    recall_ms_per_minute: float | None = Field(None, ge=0)
+    # Beyond this, facts are extracted with the regex rules instead of the LLM
+    llm_extractions_per_hour: int | None = Field(None, ge=0)
+
+
+class WorkspaceQuotaInfo(BaseModel):
+    workspace_id: str
+    quota: WorkspaceQuota
+    updated_at: datetime
+
+
+# ── Background job models ──────────────────────────────────────────────────────
+
+
+class JobInfo(BaseModel):
+    """Status of a background job (erasure, re-index, …)."""
+
+    job_id: str
+    kind: str
+    workspace_id: str | None = None
+    status: Literal["queued", "running", "done", "failed", "cancelled"] = "queued"
+    progress: dict[str, Any] = Field(default_factory=dict)
+    error: str | None = None
+    created_at: datetime = Field(default_factory=_utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
 
 
 # ── Auth models ────────────────────────────────────────────────────────────────
@@ -0,0 +1,49 @@
+"""
+Namespace helpers.
+
+plyra-memory has no notion of workspaces or users, so the server folds them
+into the agent_id it passes down:
+
+  ws_acme                      workspace level
+  ws_acme:u_xyz                user level
+  ws_acme:u_xyz:a_support1     agent level
+
+A namespace "contains" every namespace that extends it with ":" — deleting
+ws_acme:u_xyz also removes ws_acme:u_xyz:a_support1.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+
+def namespace_id(
+    workspace_id: str, user_id: str | None = None, agent_id: str | None = None
+) -> str:
+    parts = [f"ws_{workspace_id}"]
+    if user_id:
+        parts.append(f"u_{user_id}")
+    if agent_id:
+        parts.append(f"a_{agent_id}")
+    return ":".join(parts)
+
+
+def session_id_for(namespaced_id: str) -> str:
+    """
+    Stable session_id: same agent always gets the same session so
+    episodic memories from past requests are visible on recall.
+    """
+    return hashlib.md5(namespaced_id.encode()).hexdigest()
+
+
+def scope_clause(column: str, prefix: str) -> tuple[str, tuple[str, str, str]]:
+    """
+    SQL predicate matching `prefix` and every namespace nested under it.
+
+    Written as an equality plus a half-open range rather than LIKE so SQLite
+    can use the index on `column` (";" sorts directly after ":").
+    """
+    return (
+        f"({column} = ? OR ({column} >= ? AND {column} < ?))",
+        (prefix, prefix + ":", prefix + ";"),
+    )
@@ -0,0 +1,201 @@
+"""
+ONNX Runtime embedder — the sentence-transformers model without torch.
+
+  PLYRA_EMBED_BACKEND=onnx
+
+On first use the model named by embed_model is exported once to
+`<embed_onnx_dir>/<model>/model.onnx` (plus `model_int8.onnx` when
+embed_onnx_quantize is set) together with its tokenizer.json. After that
+only onnxruntime and tokenizers are needed at runtime.
+
+Output matches SentenceTransformer for the MiniLM family: mean pooling
+over the attention mask followed by L2 normalization, so vectors are
+interchangeable with an index built by the torch path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from plyra_memory.embedders.base import Embedder
+
+logger = logging.getLogger(__name__)
+
+_INPUTS = ("input_ids", "attention_mask", "token_type_ids")
+
+
+def model_dir_for(root: str, model_name: str) -> Path:
+    return Path(root).expanduser() / re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+
+
+def _hub_id(model_name: str) -> str:
+    # sentence-transformers resolves bare names under its own org
+    if "/" in model_name or Path(model_name).expanduser().exists():
+        return model_name
+    return f"sentence-transformers/{model_name}"
+
+
+def export_model(model_name: str, out_dir: Path, *, quantize: bool = False) -> None:
+    """Export a Hugging Face encoder + tokenizer to ONNX (needs torch, onnx)."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    source = _hub_id(model_name)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    tokenizer.save_pretrained(out_dir)
+    model = AutoModel.from_pretrained(source).eval()
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, inner: Any):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.inner(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+            ).last_hidden_state
+
+    sample = tokenizer(["plyra memory"], return_tensors="pt")
+    if "token_type_ids" not in sample:
+        sample["token_type_ids"] = torch.zeros_like(sample["input_ids"])
+    axes = {name: {0: "batch", 1: "seq"} for name in (*_INPUTS, "last_hidden_state")}
+    extra = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        extra["dynamo"] = False  # newer torch defaults to the dynamo exporter
+    torch.onnx.export(
+        _Encoder(model),
+        tuple(sample[name] for name in _INPUTS),
+        str(out_dir / "model.onnx"),
+        input_names=list(_INPUTS),
+        output_names=["last_hidden_state"],
+        dynamic_axes=axes,
+        opset_version=17,
+        **extra,
+    )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            str(out_dir / "model.onnx"),
+            str(out_dir / "model_int8.onnx"),
+            weight_type=QuantType.QInt8,
+        )
+    logger.info("Exported %s to ONNX at %s", model_name, out_dir)
+
+
+class OnnxEmbedder(Embedder):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        *,
+        model_dir: str | Path,
+        quantize: bool = False,
+        threads: int = 0,
+        max_length: int = 256,
+        batch_size: int = 32,
+    ) -> None:
+        self._model_name = model_name
+        self._model_dir = Path(model_dir).expanduser()
+        self._quantize = quantize
+        self._threads = threads
+        self._max_length = max_length
+        self._batch_size = max(1, batch_size)
+        self._session: Any = None
+        self._tokenizer: Any = None
+        self._input_names: set[str] = set()
+        self._dim = 384
+        self._load_lock = threading.Lock()
+
+    @property
+    def model_path(self) -> Path:
+        name = "model_int8.onnx" if self._quantize else "model.onnx"
+        return self._model_dir / name
+
+    def _load(self) -> None:
+        with self._load_lock:
+            if self._session is not None:
+                return
+            t0 = time.monotonic()
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+
+            if not self.model_path.exists():
+                export_model(self._model_name, self._model_dir, quantize=self._quantize)
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self._threads > 0:
+                options.intra_op_num_threads = self._threads
+            options.inter_op_num_threads = 1
+            session = ort.InferenceSession(
+                str(self.model_path), options, providers=["CPUExecutionProvider"]
+            )
+
+            tokenizer = Tokenizer.from_file(str(self._model_dir / "tokenizer.json"))
+            tokenizer.enable_truncation(max_length=self._max_length)
+            pad_id = tokenizer.token_to_id("[PAD]") or 0
+            tokenizer.enable_padding(pad_id=pad_id, pad_token="[PAD]")
+
+            self._input_names = {i.name for i in session.get_inputs()}
+            width = session.get_outputs()[0].shape[-1]
+            if isinstance(width, int):
+                self._dim = width
+            self._tokenizer = tokenizer
+            self._session = session
+            logger.info(
+                "Loaded ONNX embedder %s (%s) in %.0f ms",
+                self._model_name,
+                self.model_path.name,
+                (time.monotonic() - t0) * 1000,
+            )
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """(len(texts), dim) float32, unit-normalized. Blocking."""
+        self._load()
+        out = np.empty((len(texts), self._dim), dtype=np.float32)
+        # Similar lengths batch together, so less padding is computed
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self._batch_size):
+            idx = order[start : start + self._batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+        return out
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feed["token_type_ids"] = np.array(
+                [e.type_ids for e in encodings], dtype=np.int64
+            )
+        hidden = self._session.run(None, feed)[0]
+        weights = mask[:, :, None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(
+            weights.sum(axis=1), 1e-9, None
+        )
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    async def embed(self, text: str) -> list[float]:
+        return (await asyncio.to_thread(self.encode, [text]))[0].tolist()
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        return (await asyncio.to_thread(self.encode, texts)).tolist()
+
+    @property
+    def dim(self) -> int:
+        return self._dim
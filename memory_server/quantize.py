@@ -0,0 +1,74 @@
+"""
+Compact embedding representations.
+
+  float32  4 bytes / dim   exact
+  float16  2 bytes / dim   ~3 significant digits
+  int8     1 byte  / dim   + one float32 scale per vector (max-abs / 127)
+
+Vectors are encoded as NumPy structured records so a row (codes + scale)
+can live in a memory-mapped file or an LRU slot as one contiguous block.
+Scoring runs on the records directly: float32 rows go straight to BLAS,
+compact rows are widened a chunk at a time and the int8 scale is applied
+to the dot product rather than to every element.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+DTYPES: tuple[str, ...] = ("float32", "float16", "int8")
+
+_CHUNK = 512  # rows widened to float32 at a time
+
+
+def record_dtype(kind: str, dim: int) -> np.dtype:
+    if kind == "float32":
+        return np.dtype([("codes", "<f4", (dim,))])
+    if kind == "float16":
+        return np.dtype([("codes", "<f2", (dim,))])
+    if kind == "int8":
+        return np.dtype([("scale", "<f4"), ("codes", "i1", (dim,))])
+    raise ValueError(f"Unknown embedding dtype {kind!r}. Use: {', '.join(DTYPES)}")
+
+
+def encode(matrix: np.ndarray, kind: str) -> np.ndarray:
+    """(n, dim) float array → (n,) structured records."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    out = np.empty(matrix.shape[0], dtype=record_dtype(kind, matrix.shape[1]))
+    if kind == "int8":
+        peak = np.abs(matrix).max(axis=1)
+        scale = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+        out["scale"] = scale
+        out["codes"] = np.rint(matrix / scale[:, None]).astype(np.int8)
+    else:
+        out["codes"] = matrix
+    return out
+
+
+def decode(records: np.ndarray) -> np.ndarray:
+    """Structured records → (n, dim) float32."""
+    codes = records["codes"].astype(np.float32)
+    if "scale" in records.dtype.names:
+        codes *= records["scale"][:, None]
+    return codes
+
+
+def similarities(records: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Dot product of every record with a float32 query vector."""
+    query = np.asarray(query, dtype=np.float32)
+    codes = records["codes"]
+    if codes.dtype == np.float32:
+        return codes @ query
+    out = np.empty(len(records), dtype=np.float32)
+    for start in range(0, len(records), _CHUNK):
+        block = codes[start : start + _CHUNK].astype(np.float32)
+        out[start : start + _CHUNK] = block @ query
+    if "scale" in records.dtype.names:
+        out *= records["scale"]
+    return out
+
+
+def nbytes(kind: str, dim: int) -> int:
+    return record_dtype(kind, dim).itemsize
@@ -0,0 +1,396 @@
+"""
+Query cache — recall results reused across requests and restarts.
+
+plyra-memory's SemanticCache lives on each Memory instance, which the server
+opens per request, so it never sees a repeated query. QueryCache is one
+process-wide cache of agent-scope recall results (and the contexts packed
+from them), keyed by namespace:
+
+  exact     the same query (case and spacing aside) with the same top_k
+            and layers
+  semantic  a query whose embedding is at least query_cache_similarity
+            alike; lexical fast-path queries have no embedding and only
+            match exactly
+
+Every entry carries the namespace's write generation: a value in the
+shard's memory_generations table that triggers replace with a fresh random
+one whenever a working entry, episode or fact of the namespace is added,
+deleted or has its content, importance or confidence changed — by
+remember, extraction, consolidation, erasure, retention or import alike.
+An entry whose generation is no longer current is dropped when it is looked
+up. Random values rather than a counter keep that true across a restored
+snapshot, whose generations were current once and may be again.
+Access-count updates don't count as writes, so a recall doesn't invalidate
+its own entry.
+
+With query_cache_path set, entries are written behind to that SQLite file
+every query_cache_flush_s (and at shutdown), and the query_cache_warm_entries
+most-hit ones are loaded back at startup. Their generations are checked at
+lookup like any other, so nothing stale survives a restart.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import aiosqlite
+import numpy as np
+import orjson
+
+from .config import ServerConfig
+
+logger = logging.getLogger(__name__)
+
+# Tables whose rows recall returns; writes to them move the generation on
+GENERATION_SOURCES = {
+    "working_entries": "content, importance",
+    "episodes": "content, importance",
+    "facts": "content, importance, confidence",
+}
+_PER_NAMESPACE = 32  # entries kept per namespace (bounds the semantic scan)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_cache (
+    namespace   TEXT NOT NULL,
+    params      TEXT NOT NULL,
+    query       TEXT NOT NULL,
+    embedding   BLOB,
+    generation  INTEGER NOT NULL,
+    results     TEXT NOT NULL,
+    total_found INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, params, query)
+);
+CREATE INDEX IF NOT EXISTS idx_query_cache_hits ON query_cache(hits);
+"""
+
+
+async def ensure_generations(conn: aiosqlite.Connection) -> None:
+    """Create memory_generations and the triggers that move it on."""
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS memory_generations (
+            namespace  TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL
+        )
+        """
+    )
+    bump = """
+        INSERT OR REPLACE INTO memory_generations (namespace, generation)
+        VALUES ({row}.agent_id, random());
+    """
+    for source, columns in GENERATION_SOURCES.items():
+        for name, event, row in (
+            ("ai", "INSERT", "new"),
+            ("ad", "DELETE", "old"),
+            ("au", f"UPDATE OF {columns}", "new"),
+        ):
+            await conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {source}_gen_{name} "
+                f"AFTER {event} ON {source} BEGIN {bump.format(row=row)} END"
+            )
+    await conn.commit()
+
+
+async def generation(conn: aiosqlite.Connection, namespace: str) -> int:
+    rows = await conn.execute_fetchall(
+        "SELECT generation FROM memory_generations WHERE namespace = ?",
+        (namespace,),
+    )
+    return rows[0][0] if rows else 0
+
+
+def _normalize(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _unit(embedding: Any) -> np.ndarray:
+    vec = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+@dataclass
+class _Entry:
+    namespace: str
+    params: str
+    query: str
+    embedding: np.ndarray | None
+    generation: int
+    results: list[Any]  # RankedMemory
+    total_found: int
+    created_at: float
+    hits: int = 0
+    dirty: bool = True  # changed since it was last persisted
+
+
+class QueryCache:
+    """Process-wide recall cache with an optional on-disk tier."""
+
+    def __init__(self, config: ServerConfig) -> None:
+        self._max = max(1, config.query_cache_entries)
+        self._ttl = config.query_cache_ttl_s
+        self._similarity = config.query_cache_similarity
+        self._path = (
+            Path(config.query_cache_path).expanduser()
+            if config.query_cache_path
+            else None
+        )
+        self._flush_s = config.query_cache_flush_s
+        self._warm = config.query_cache_warm_entries
+        self._entries: OrderedDict[tuple[str, str, str], _Entry] = OrderedDict()
+        self._namespaces: dict[str, dict[tuple[str, str, str], _Entry]] = {}
+        self._dropped: dict[str, float] = {}  # namespace → invalidated at
+        self._conn: aiosqlite.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self._counts = {"hits": 0, "semantic_hits": 0, "misses": 0, "stale": 0}
+        self.loaded = 0
+
+    # ── Lookup ────────────────────────────────────────────────────────────────
+
+    def get(
+        self,
+        namespace: str,
+        params: str,
+        query: str,
+        generation: int,
+        embedding: Any = None,
+    ) -> _Entry | None:
+        """
+        The entry answering `query`, or None. Without an embedding only an
+        exact match is looked for — the caller may ask again with one.
+        """
+        now = time.time()
+        key = (namespace, params, _normalize(query))
+        entry = self._entries.get(key)
+        if entry is not None and not self._fresh(entry, generation, now):
+            entry = None
+        if entry is None and embedding is not None:
+            entry = self._nearest(namespace, params, _unit(embedding), generation, now)
+            if entry is not None:
+                self._counts["semantic_hits"] += 1
+        if entry is None:
+            return None
+        self._entries.move_to_end((entry.namespace, entry.params, entry.query))
+        entry.hits += 1
+        entry.dirty = True
+        self._counts["hits"] += 1
+        return entry
+
+    def _fresh(self, entry: _Entry, generation: int, now: float) -> bool:
+        if entry.generation == generation and now - entry.created_at <= self._ttl:
+            return True
+        self._counts["stale"] += 1
+        self._remove((entry.namespace, entry.params, entry.query))
+        return False
+
+    def _nearest(
+        self,
+        namespace: str,
+        params: str,
+        embedding: np.ndarray,
+        generation: int,
+        now: float,
+    ) -> _Entry | None:
+        candidates = [
+            e
+            for e in list(self._namespaces.get(namespace, {}).values())
+            if e.params == params
+            and e.embedding is not None
+            and e.embedding.shape == embedding.shape
+            and self._fresh(e, generation, now)
+        ]
+        if not candidates:
+            return None
+        sims = np.stack([e.embedding for e in candidates]) @ embedding
+        best = int(np.argmax(sims))
+        return candidates[best] if sims[best] >= self._similarity else None
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+
+    def put(
+        self,
+        namespace: str,
+        params: str,
+        query: str,
+        generation: int,
+        result: Any,
+        embedding: Any = None,
+    ) -> None:
+        """Cache a RecallResult computed at `generation` (after a miss)."""
+        self._counts["misses"] += 1
+        self._add(
+            _Entry(
+                namespace,
+                params,
+                _normalize(query),
+                _unit(embedding) if embedding is not None else None,
+                generation,
+                list(result.results),
+                result.total_found,
+                time.time(),
+            )
+        )
+
+    def _add(self, entry: _Entry) -> None:
+        key = (entry.namespace, entry.params, entry.query)
+        self._remove(key)
+        scoped = self._namespaces.setdefault(entry.namespace, {})
+        if len(scoped) >= _PER_NAMESPACE:
+            oldest = min(scoped.values(), key=lambda e: e.created_at)
+            self._remove((oldest.namespace, oldest.params, oldest.query))
+        while len(self._entries) >= self._max:
+            self._remove(next(iter(self._entries)))
+        self._entries[key] = entry
+        self._namespaces.setdefault(entry.namespace, {})[key] = entry
+
+    def _remove(self, key: tuple[str, str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        scoped = self._namespaces.get(entry.namespace)
+        if scoped is not None:
+            scoped.pop(key, None)
+            if not scoped:
+                del self._namespaces[entry.namespace]
+
+    def invalidate(self, namespace: str) -> None:
+        """
+        Drop `namespace`'s entries now. Its generation moves on by itself;
+        this covers writes that reach SQLite later (buffered working memory).
+        """
+        for key in list(self._namespaces.get(namespace, {})):
+            self._remove(key)
+        if self._path is not None:
+            self._dropped[namespace] = time.time()
+
+    # ── Persisted tier ────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        """Open the cache file, load the hottest entries, start writing behind."""
+        if self._path is None:
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = await aiosqlite.connect(str(self._path))
+        await self._conn.execute("PRAGMA journal_mode=WAL")
+        await self._conn.executescript(_SCHEMA)
+        await self._conn.commit()
+        try:
+            await self._load()
+        except Exception:
+            logger.exception("Query cache %s not loaded; starting cold", self._path)
+        self._task = asyncio.create_task(self._loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            try:
+                await self.flush()
+            finally:
+                await self._conn.close()
+                self._conn = None
+
+    async def _load(self) -> None:
+        from plyra_memory.schema import RankedMemory
+
+        rows = await self._conn.execute_fetchall(
+            "SELECT namespace, params, query, embedding, generation, results, "
+            "total_found, created_at, hits FROM query_cache WHERE created_at > ? "
+            "ORDER BY hits DESC, created_at DESC LIMIT ?",
+            (time.time() - self._ttl, min(self._warm, self._max)),
+        )
+        for row in reversed(rows):  # most-hit last: last to be evicted
+            results = [RankedMemory.model_validate(r) for r in orjson.loads(row[5])]
+            embedding = np.frombuffer(row[3], dtype=np.float32) if row[3] else None
+            self._add(
+                _Entry(
+                    row[0],
+                    row[1],
+                    row[2],
+                    embedding,
+                    row[4],
+                    results,
+                    row[6],
+                    row[7],
+                    row[8],
+                    dirty=False,
+                )
+            )
+        self.loaded = len(rows)
+        if rows:
+            logger.info("Query cache: %d entries loaded from %s", len(rows), self._path)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_s)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Query cache flush failed")
+
+    async def flush(self) -> int:
+        """Write changed entries to the cache file and prune it."""
+        if self._conn is None:
+            return 0
+        dirty = [e for e in self._entries.values() if e.dirty]
+        dropped, self._dropped = self._dropped, {}
+        rows = [
+            (
+                e.namespace,
+                e.params,
+                e.query,
+                e.embedding.tobytes() if e.embedding is not None else None,
+                e.generation,
+                orjson.dumps([r.model_dump(mode="json") for r in e.results]),
+                e.total_found,
+                e.created_at,
+                e.hits,
+            )
+            for e in dirty
+        ]
+        for entry in dirty:
+            entry.dirty = False
+        await self._conn.executemany(
+            "DELETE FROM query_cache WHERE namespace = ? AND created_at <= ?",
+            list(dropped.items()),
+        )
+        await self._conn.executemany(
+            "INSERT OR REPLACE INTO query_cache (namespace, params, query, "
+            "embedding, generation, results, total_found, created_at, hits) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        await self._conn.execute(
+            "DELETE FROM query_cache WHERE created_at <= ?",
+            (time.time() - self._ttl,),
+        )
+        await self._conn.execute(
+            "DELETE FROM query_cache WHERE rowid NOT IN (SELECT rowid FROM "
+            "query_cache ORDER BY hits DESC, created_at DESC LIMIT ?)",
+            (self._max,),
+        )
+        await self._conn.commit()
+        return len(rows)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "namespaces": len(self._namespaces),
+            "persisted": self._path is not None,
+            "loaded": self.loaded,
+            **self._counts,
+        }
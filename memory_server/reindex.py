@@ -0,0 +1,570 @@
+"""
+Online re-indexing after an embedding model change.
+
+Vectors produced by one model are meaningless to another, so a shard keeps
+one vector index per model and records which model each namespace uses
+(in its memory DB, next to the rows):
+
+  vector_indexes  embed_model → index path. The shard's original index
+                  (vectors_url / shard dir) belongs to the model the shard
+                  was first opened with.
+  vector_models   namespace → embed_model; '' is the shard default, used by
+                  every namespace without a row of its own.
+
+Memory instances bind to their namespace's index and embedder for their
+whole lifetime, so a namespace is always queried with the model that built
+its vectors, whatever PLYRA_EMBED_MODEL says.
+
+reindex_scope() moves a workspace to another model while traffic keeps
+using the old index:
+
+  1. Episodes and facts are streamed by id in batches, embedded with the
+     new model (embed_batch) and upserted into its index — the shadow.
+     After each batch the last id is checkpointed, so a job that is
+     interrupted resumes where it stopped. Batches are throttled by
+     reindex_batch_pause_ms and reindex_max_rows_per_s.
+  2. Each namespace is then switched at a moment no instance is bound to
+     it (background extraction included): rows written or deleted since
+     step 1 are reconciled into the shadow and the namespace's row is
+     written, while new binds wait. A namespace that is never idle within
+     reindex_switch_timeout_s stays on its old model for the next run.
+  3. Once no namespace in the shard uses the old default model, the new
+     model becomes the default and the old index is closed. Its files are
+     left on disk for the operator to remove.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import aiosqlite
+from plyra_memory.vectors.base import VectorBackend
+
+from .erasure import LAYER_TABLES, VECTOR_LAYERS, delete_vectors, table_exists
+from .namespace import scope_clause
+from .transfer import fetch_embeddings, upsert_vectors, vector_metadata
+from .vectors import NAMESPACE_KEY
+from .vectors.memmap import namespace_of
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAMESPACE = ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vector_indexes (
+    embed_model TEXT PRIMARY KEY,
+    path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS vector_models (
+    namespace TEXT PRIMARY KEY,
+    embed_model TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reindex_checkpoints (
+    scope TEXT NOT NULL,
+    embed_model TEXT NOT NULL,
+    layer TEXT NOT NULL,
+    last_id TEXT NOT NULL DEFAULT '',
+    started_at TEXT NOT NULL,
+    PRIMARY KEY (scope, embed_model, layer)
+);
+"""
+
+
+def index_path(base: Path, embed_model: str) -> Path:
+    """Where a shard keeps the index for a model other than its first one."""
+    digest = hashlib.sha1(embed_model.encode()).hexdigest()[:8]
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", embed_model)[:48]
+    return base.with_name(f"{base.name}.{safe}-{digest}")
+
+
+async def vector_ids(vectors: Any, namespace: str) -> set[str]:
+    """Ids a backend holds for one namespace."""
+    ids_for = getattr(vectors, "ids_for", None)
+    if ids_for is not None:
+        return set(await ids_for(namespace))
+    collection = vectors._collection  # ChromaVectors
+    got = await asyncio.to_thread(
+        collection.get, where={NAMESPACE_KEY: namespace}, include=[]
+    )
+    return set(got["ids"])
+
+
+async def _connect(db_path: Path) -> aiosqlite.Connection:
+    conn = await aiosqlite.connect(str(db_path))
+    await conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class VectorIndexes(VectorBackend):
+    """A shard's vector indexes, one per embedding model, routed by namespace."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        base_path: Path,
+        embed_model: str,
+        make: Callable[[Path], Any],
+    ) -> None:
+        self._db_path = db_path
+        self._base_path = base_path
+        self._embed_model = embed_model  # the configured model
+        self._make = make
+        self._default = embed_model
+        self._backends: dict[str, Any] = {}  # model → open backend
+        self._paths: dict[str, Path] = {}
+        self._models: dict[str, str] = {}  # namespace → model, if not the default
+        self._users: dict[str, int] = {}  # namespace → bound Memory instances
+        self._idle: dict[str, asyncio.Event] = {}
+        self._switching: dict[str, asyncio.Event] = {}
+        self._pending: set[asyncio.Task] = set()
+
+    async def initialize(self) -> None:
+        conn = await _connect(self._db_path)
+        try:
+            await conn.executescript(_SCHEMA)
+            # A shard seen for the first time: its index is the configured model's
+            await conn.execute(
+                "INSERT OR IGNORE INTO vector_models VALUES (?, ?)",
+                (DEFAULT_NAMESPACE, self._embed_model),
+            )
+            rows = await conn.execute_fetchall(
+                "SELECT embed_model FROM vector_models WHERE namespace = ?",
+                (DEFAULT_NAMESPACE,),
+            )
+            self._default = rows[0][0]
+            await conn.execute(
+                "INSERT OR IGNORE INTO vector_indexes VALUES (?, ?)",
+                (self._default, str(self._base_path)),
+            )
+            await conn.commit()
+            paths = dict(await conn.execute_fetchall("SELECT * FROM vector_indexes"))
+            self._models = {
+                ns: model
+                for ns, model in await conn.execute_fetchall(
+                    "SELECT namespace, embed_model FROM vector_models "
+                    "WHERE namespace != ?",
+                    (DEFAULT_NAMESPACE,),
+                )
+            }
+        finally:
+            await conn.close()
+        for model in {self._default, *self._models.values()}:
+            await self._open(model, Path(paths[model]))
+
+    async def close(self) -> None:
+        for backend in self._backends.values():
+            await _close_backend(backend)
+        self._backends.clear()
+
+    # ── Routing ───────────────────────────────────────────────────────────────
+
+    @property
+    def default_model(self) -> str:
+        return self._default
+
+    def model_for(self, namespace: str) -> str:
+        return self._models.get(namespace, self._default)
+
+    def backend(self, embed_model: str) -> Any | None:
+        return self._backends.get(embed_model)
+
+    def indexes(self) -> dict[str, tuple[Any, Path]]:
+        """Every open index: model → (backend, path)."""
+        return {m: (b, self._paths[m]) for m, b in self._backends.items()}
+
+    async def bind(self, namespace: str) -> tuple[str, Any]:
+        """(model, index) for a Memory on `namespace`; unbind() when done."""
+        while (switching := self._switching.get(namespace)) is not None:
+            await switching.wait()
+        self._users[namespace] = self._users.get(namespace, 0) + 1
+        model = self.model_for(namespace)
+        return model, self._backends[model]
+
+    def unbind(self, namespace: str) -> None:
+        users = self._users.get(namespace, 0) - 1
+        if users > 0:
+            self._users[namespace] = users
+            return
+        self._users.pop(namespace, None)
+        idle = self._idle.pop(namespace, None)
+        if idle is not None:
+            idle.set()
+
+    def wanted(self, namespace: str) -> bool:
+        """Whether a switch is waiting for `namespace` to be unbound."""
+        return namespace in self._idle
+
+    def unbind_after(self, namespace: str, tasks: set[asyncio.Task]) -> None:
+        """Stay bound until background tasks using the index finish."""
+
+        async def _wait() -> None:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.unbind(namespace)
+
+        task = asyncio.create_task(_wait())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def open_index(self, embed_model: str) -> Any:
+        """The index for `embed_model`, created (empty) if the shard has none."""
+        backend = self._backends.get(embed_model)
+        if backend is not None:
+            return backend
+        path = index_path(self._base_path, embed_model)
+        conn = await _connect(self._db_path)
+        try:
+            await conn.execute(
+                "INSERT OR IGNORE INTO vector_indexes VALUES (?, ?)",
+                (embed_model, str(path)),
+            )
+            await conn.commit()
+            rows = await conn.execute_fetchall(
+                "SELECT path FROM vector_indexes WHERE embed_model = ?",
+                (embed_model,),
+            )
+        finally:
+            await conn.close()
+        return await self._open(embed_model, Path(rows[0][0]))
+
+    async def switch(
+        self,
+        namespace: str,
+        embed_model: str,
+        catch_up: Callable[[], Awaitable[None]],
+        *,
+        timeout: float,
+    ) -> bool:
+        """
+        Move `namespace` to `embed_model` at a moment nothing is bound to it.
+        New binds wait only while `catch_up` runs. False (nothing changed)
+        if the namespace was never idle within `timeout`.
+        """
+        deadline = time.monotonic() + timeout
+        while self._users.get(namespace):
+            idle = self._idle.setdefault(namespace, asyncio.Event())
+            try:
+                await asyncio.wait_for(idle.wait(), deadline - time.monotonic())
+            except TimeoutError:
+                return False
+        done = asyncio.Event()
+        self._switching[namespace] = done
+        try:
+            await catch_up()
+            conn = await _connect(self._db_path)
+            try:
+                if embed_model == self._default:
+                    await conn.execute(
+                        "DELETE FROM vector_models WHERE namespace = ?", (namespace,)
+                    )
+                else:
+                    await conn.execute(
+                        "INSERT OR REPLACE INTO vector_models VALUES (?, ?)",
+                        (namespace, embed_model),
+                    )
+                await conn.commit()
+            finally:
+                await conn.close()
+            if embed_model == self._default:
+                self._models.pop(namespace, None)
+            else:
+                self._models[namespace] = embed_model
+            return True
+        finally:
+            del self._switching[namespace]
+            done.set()
+
+    async def retire_default(self, namespaces: Iterable[str]) -> bool:
+        """
+        Make the model every namespace in the shard has moved to the default,
+        and close the old default index. `namespaces` is every namespace
+        with rows in the shard; False if any of them (or a bound instance)
+        still uses the old default.
+        """
+        old = self._default
+        models = {self.model_for(ns) for ns in namespaces}
+        models |= {self.model_for(ns) for ns in self._users}
+        if len(models) != 1 or old in models:
+            return False
+        (new,) = models
+        conn = await _connect(self._db_path)
+        try:
+            await conn.execute(
+                "UPDATE vector_models SET embed_model = ? WHERE namespace = ?",
+                (new, DEFAULT_NAMESPACE),
+            )
+            await conn.execute(
+                "DELETE FROM vector_models WHERE embed_model = ? AND namespace != ?",
+                (new, DEFAULT_NAMESPACE),
+            )
+            await conn.execute(
+                "DELETE FROM vector_indexes WHERE embed_model = ?", (old,)
+            )
+            await conn.commit()
+        finally:
+            await conn.close()
+        self._default = new
+        self._models = {ns: m for ns, m in self._models.items() if m != new}
+        retired = self._backends.pop(old, None)
+        if retired is not None:
+            await _close_backend(retired)
+        logger.info(
+            "Vector index for %s retired in favour of %s; %s can be removed",
+            old,
+            new,
+            self._paths.pop(old, "its directory"),
+        )
+        return True
+
+    async def _open(self, embed_model: str, path: Path) -> Any:
+        backend = self._make(path)
+        await backend.initialize()
+        self._backends[embed_model] = backend
+        self._paths[embed_model] = path
+        return backend
+
+    # ── VectorBackend (transfer / erasure / retention go through these) ───────
+
+    async def upsert(self, id: str, embedding: list[float], metadata: dict) -> None:
+        await self.upsert_many([(id, embedding, metadata)])
+
+    async def upsert_many(self, items: list[tuple[str, list[float], dict]]) -> None:
+        by_model: dict[str, list[tuple[str, list[float], dict]]] = {}
+        for item in items:
+            model = self.model_for(item[2].get(NAMESPACE_KEY) or "")
+            by_model.setdefault(model, []).append(item)
+        for model, batch in by_model.items():
+            await upsert_vectors(self._backends[model], batch)
+
+    async def query(
+        self, embedding: list[float], top_k: int, filters: dict | None = None
+    ) -> list[dict]:
+        model = self.model_for(namespace_of(filters) or "")
+        return await self._backends[model].query(embedding, top_k, filters)
+
+    async def delete(self, id: str) -> bool:
+        return await self.delete_many([id]) > 0
+
+    async def delete_many(self, ids: list[str]) -> int:
+        # An id may be in several indexes while a re-index is under way
+        for backend in self._backends.values():
+            await delete_vectors(backend, ids)
+        return len(ids)
+
+    async def count(self) -> int:
+        return await self._backends[self._default].count()
+
+    async def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        """Embeddings by the configured model only, which is what exports claim."""
+        backend = self._backends.get(self._embed_model)
+        return await fetch_embeddings(backend, ids) if backend is not None else {}
+
+
+async def _close_backend(backend: Any) -> None:
+    await backend.close()
+    # ChromaVectors.close() is a no-op; release the client too
+    client = getattr(backend, "_client", None)
+    if client is not None and hasattr(client, "close"):
+        client.close()
+
+
+# ── The re-index job ──────────────────────────────────────────────────────────
+
+
+async def reindex_scope(
+    indexes: VectorIndexes,
+    db_path: str,
+    prefix: str,
+    embed_model: str,
+    embedder: Any,
+    *,
+    batch_size: int = 256,
+    pause_ms: int = 20,
+    max_rows_per_s: float = 0,
+    switch_timeout_s: float = 30,
+    counts: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Move every namespace under `prefix` to `embed_model`. Returns counts."""
+    counts = counts if counts is not None else {}
+    for key in ("total", "episodic", "semantic", "switched", "deferred"):
+        counts.setdefault(key, 0)
+    target = await indexes.open_index(embed_model)
+    clause, params = scope_clause("agent_id", prefix)
+
+    conn = await _connect(Path(db_path).expanduser())
+    conn.row_factory = aiosqlite.Row
+    try:
+        started_at = await _start(conn, prefix, embed_model)
+        layers = [
+            layer
+            for layer in ("episodic", "semantic")
+            if await table_exists(conn, LAYER_TABLES[layer])
+        ]
+        for layer in layers:
+            rows = await conn.execute_fetchall(
+                f"SELECT COUNT(*) FROM {LAYER_TABLES[layer]} WHERE {clause}",  # noqa: S608
+                params,
+            )
+            counts["total"] += rows[0][0]
+
+        # 1. Backfill the shadow index
+        for layer in layers:
+            table = LAYER_TABLES[layer]
+            last_id = await _checkpoint(conn, prefix, embed_model, layer)
+            while True:
+                t0 = time.monotonic()
+                rows = await conn.execute_fetchall(
+                    f"SELECT * FROM {table} WHERE {clause} AND id > ? "  # noqa: S608
+                    "ORDER BY id LIMIT ?",
+                    (*params, last_id, batch_size),
+                )
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+                todo = [
+                    dict(r)
+                    for r in rows
+                    if indexes.model_for(r["agent_id"]) != embed_model
+                ]
+                await _embed_into(target, embedder, layer, todo)
+                await conn.execute(
+                    "UPDATE reindex_checkpoints SET last_id = ? "
+                    "WHERE scope = ? AND embed_model = ? AND layer = ?",
+                    (last_id, prefix, embed_model, layer),
+                )
+                await conn.commit()
+                counts[layer] += len(rows)
+                await _throttle(t0, len(todo), pause_ms, max_rows_per_s)
+
+        # 2. Switch namespaces over, one at a time
+        for ns in await _namespaces(conn, clause, params):
+            if indexes.model_for(ns) == embed_model:
+                continue
+
+            async def _catch_up(ns: str = ns) -> None:
+                await _reconcile(conn, target, embedder, layers, ns, started_at)
+
+            switched = await indexes.switch(
+                ns, embed_model, _catch_up, timeout=switch_timeout_s
+            )
+            counts["switched" if switched else "deferred"] += 1
+
+        if counts["deferred"]:
+            logger.warning(
+                "Re-index of %s to %s left %d namespaces busy; run it again",
+                prefix,
+                embed_model,
+                counts["deferred"],
+            )
+        else:
+            await conn.execute(
+                "DELETE FROM reindex_checkpoints WHERE scope = ? AND embed_model = ?",
+                (prefix, embed_model),
+            )
+            await conn.commit()
+            # 3. Retire the old index once the whole shard has moved
+            counts["default_model"] = indexes.default_model
+            if await indexes.retire_default(await _namespaces(conn, "1 = 1", ())):
+                counts["default_model"] = embed_model
+    finally:
+        await conn.close()
+
+    logger.info("Re-indexed %s to %s: %s", prefix, embed_model, counts)
+    return counts
+
+
+async def _start(conn: aiosqlite.Connection, prefix: str, embed_model: str) -> str:
+    """When this re-index first started (kept across resumes)."""
+    now = datetime.now(UTC).isoformat()
+    for layer in VECTOR_LAYERS:
+        await conn.execute(
+            "INSERT OR IGNORE INTO reindex_checkpoints "
+            "(scope, embed_model, layer, started_at) VALUES (?, ?, ?, ?)",
+            (prefix, embed_model, layer, now),
+        )
+    await conn.commit()
+    rows = await conn.execute_fetchall(
+        "SELECT MIN(started_at) FROM reindex_checkpoints "
+        "WHERE scope = ? AND embed_model = ?",
+        (prefix, embed_model),
+    )
+    return rows[0][0]
+
+
+async def _checkpoint(
+    conn: aiosqlite.Connection, prefix: str, embed_model: str, layer: str
+) -> str:
+    rows = await conn.execute_fetchall(
+        "SELECT last_id FROM reindex_checkpoints "
+        "WHERE scope = ? AND embed_model = ? AND layer = ?",
+        (prefix, embed_model, layer),
+    )
+    return rows[0][0]
+
+
+async def _namespaces(conn: aiosqlite.Connection, clause: str, params: tuple) -> list:
+    parts, args = [], []
+    for table in ("sessions", "episodes", "facts"):
+        if await table_exists(conn, table):
+            parts.append(f"SELECT agent_id FROM {table} WHERE {clause}")
+            args.extend(params)
+    if not parts:
+        return []
+    rows = await conn.execute_fetchall(" UNION ".join(parts), args)
+    return [r[0] for r in rows]
+
+
+async def _embed_into(
+    target: Any, embedder: Any, layer: str, rows: list[dict[str, Any]]
+) -> None:
+    if not rows:
+        return
+    embeddings = await embedder.embed_batch([r["content"] for r in rows])
+    await upsert_vectors(
+        target,
+        [(r["id"], emb, vector_metadata(layer, r)) for r, emb in zip(rows, embeddings)],
+    )
+
+
+async def _reconcile(
+    conn: aiosqlite.Connection,
+    target: Any,
+    embedder: Any,
+    layers: list[str],
+    namespace: str,
+    started_at: str,
+) -> None:
+    """Bring the shadow up to date with rows written / deleted since backfill."""
+    have = await vector_ids(target, namespace)
+    stored: set[str] = set()
+    for layer in layers:
+        table = LAYER_TABLES[layer]
+        rows = await conn.execute_fetchall(
+            f"SELECT * FROM {table} WHERE agent_id = ?",  # noqa: S608
+            (namespace,),
+        )
+        stored.update(r["id"] for r in rows)
+        stale = [
+            dict(r)
+            for r in rows
+            if r["id"] not in have
+            # facts are re-confirmed (and possibly rewritten) in place
+            or (layer == "semantic" and r["last_confirmed"] >= started_at)
+        ]
+        await _embed_into(target, embedder, layer, stale)
+    await delete_vectors(target, sorted(have - stored))
+
+
+async def _throttle(t0: float, rows: int, pause_ms: int, max_rows_per_s: float) -> None:
+    wait = pause_ms / 1000
+    if max_rows_per_s > 0:
+        wait = max(wait, rows / max_rows_per_s - (time.monotonic() - t0))
+    if wait > 0:
+        await asyncio.sleep(wait)
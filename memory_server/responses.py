@@ -0,0 +1,70 @@
+"""
+Direct serialization for memory route payloads.
+
+Returning a dict from a route makes FastAPI validate it against the
+response_model and serialize it again with the stdlib encoder — twice the
+work for a top_k=100 recall with long contents. Memory routes build plain
+dicts from the retrieval objects and hand them to `render`, which encodes
+once with orjson, or with msgpack when the client asks for it:
+
+  Accept: application/msgpack
+
+The response_model on each route still documents the payload shape.
+"""
+
+from __future__ import annotations
+
+from enum import Enum
+from typing import Any
+
+import orjson
+from fastapi import Request, Response
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install "plyra-memory-server[msgpack]"
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+
+def _fallback(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def wants_msgpack(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(t in accept for t in _MSGPACK_TYPES)
+
+
+def render(request: Request, content: dict[str, Any], status_code: int = 200):
+    if wants_msgpack(request):
+        body = msgpack.packb(content, default=_fallback, use_bin_type=True)
+        return Response(body, status_code=status_code, media_type=MSGPACK)
+    return Response(encode(content), status_code=status_code, media_type=JSON)
+
+
+def encode(content: dict[str, Any]) -> bytes:
+    return orjson.dumps(content, default=_fallback)
+
+
+def ranked_item(r: Any) -> dict[str, Any]:
+    """RankedMemory → RecallItem-shaped dict, without a validation pass."""
+    return {
+        "id": r.id,
+        "layer": r.layer.value,
+        "content": r.content,
+        "score": r.score,
+        "similarity": r.similarity,
+        "recency": r.recency,
+        "importance": r.importance,
+        "created_at": r.created_at,
+        "source_id": r.source_id,
+        "metadata": r.metadata,
+    }
@@ -0,0 +1,306 @@
+"""
+Retention: expiry of old, excess and unimportant memories.
+
+Each workspace may have a RetentionPolicy (stored in the key DB, set with
+PUT /admin/retention/{workspace_id}). The sweeper applies every policy on
+an interval, and an admin can sweep one workspace on demand. Rules:
+
+  <layer>.max_age         created_at older than <layer>_max_age_days
+  episodic.max_per_agent  oldest episodes beyond max_episodes_per_agent,
+  semantic.max_per_agent  oldest facts beyond max_facts_per_agent, per agent
+                          namespace
+  <layer>.min_importance  importance < min_importance and older than
+                          importance_grace_days
+
+Candidates are selected through the created_at and agent_id indexes and
+deleted like erasure (erasure.delete_rows): bounded batches, vectors first,
+a pause between batches for live writers. FTS rows follow via triggers.
+
+With dry_run nothing is deleted; counts report how many rows each rule
+would remove (a row matching several rules is counted under each).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import aiosqlite
+
+from .config import ServerConfig
+from .erasure import LAYER_TABLES, delete_rows, ensure_scope_indexes, table_exists
+from .idempotency import DedupWindow
+from .models import RetentionPolicy
+from .namespace import namespace_id, scope_clause
+from .working import WorkingSetCache
+
+logger = logging.getLogger(__name__)
+
+
+async def sweep_scope(
+    db_path: str,
+    vectors: Any,
+    prefix: str,
+    policy: RetentionPolicy,
+    *,
+    batch_size: int = 500,
+    pause_ms: int = 5,
+    dry_run: bool = False,
+    counts: dict[str, Any] | None = None,
+    lock: asyncio.Lock | None = None,
+) -> dict[str, Any]:
+    """Apply `policy` to every namespace under `prefix`. Returns per-rule counts."""
+    counts = counts if counts is not None else {}
+    opts = {
+        "batch_size": batch_size,
+        "pause_ms": pause_ms,
+        "dry_run": dry_run,
+        "counts": counts,
+        "lock": lock,
+    }
+    now = datetime.now(UTC)
+    clause, params = scope_clause("agent_id", prefix)
+    conn = await aiosqlite.connect(str(Path(db_path).expanduser()))
+    try:
+        await conn.execute("PRAGMA busy_timeout=5000")
+        await ensure_scope_indexes(conn)
+        present = {
+            layer
+            for layer, table in LAYER_TABLES.items()
+            if await table_exists(conn, table)
+        }
+
+        ages = {
+            "working": policy.working_max_age_days,
+            "episodic": policy.episodic_max_age_days,
+            "semantic": policy.semantic_max_age_days,
+        }
+        for layer, days in ages.items():
+            if days is None or layer not in present:
+                continue
+            cutoff = (now - timedelta(days=days)).isoformat()
+            await _expire(
+                conn,
+                vectors,
+                layer,
+                f"{layer}.max_age",
+                f"created_at < ? AND {clause}",
+                (cutoff, *params),
+                **opts,
+            )
+
+        if policy.min_importance is not None:
+            cutoff = (now - timedelta(days=policy.importance_grace_days)).isoformat()
+            for layer in ("episodic", "semantic"):
+                if layer in present:
+                    await _expire(
+                        conn,
+                        vectors,
+                        layer,
+                        f"{layer}.min_importance",
+                        f"importance < ? AND created_at < ? AND {clause}",
+                        (policy.min_importance, cutoff, *params),
+                        **opts,
+                    )
+
+        caps = {
+            "episodic": policy.max_episodes_per_agent,
+            "semantic": policy.max_facts_per_agent,
+        }
+        for layer, keep in caps.items():
+            if keep is not None and layer in present:
+                await _cap_per_agent(conn, vectors, layer, keep, clause, params, **opts)
+    finally:
+        await conn.close()
+
+    if any(counts.values()):
+        verb = "Would expire" if dry_run else "Expired"
+        logger.info("%s under %s: %s", verb, prefix, counts)
+    return counts
+
+
+async def _expire(
+    conn: aiosqlite.Connection,
+    vectors: Any,
+    layer: str,
+    rule: str,
+    where: str,
+    params: tuple,
+    *,
+    batch_size: int,
+    pause_ms: int,
+    dry_run: bool,
+    counts: dict[str, Any],
+    lock: asyncio.Lock | None,
+) -> None:
+    table = LAYER_TABLES[layer]
+    counts.setdefault(rule, 0)
+    if dry_run:
+        rows = await conn.execute_fetchall(
+            f"SELECT COUNT(*) FROM {table} WHERE {where}",  # noqa: S608
+            params,
+        )
+        counts[rule] += rows[0][0]
+        return
+    while True:
+        rows = await conn.execute_fetchall(
+            f"SELECT id FROM {table} WHERE {where} LIMIT ?",  # noqa: S608
+            (*params, batch_size),
+        )
+        ids = [r[0] for r in rows]
+        if not ids:
+            return
+        await delete_rows(conn, vectors, layer, ids, lock=lock)
+        counts[rule] += len(ids)
+        await asyncio.sleep(pause_ms / 1000)
+
+
+async def _cap_per_agent(
+    conn: aiosqlite.Connection,
+    vectors: Any,
+    layer: str,
+    keep: int,
+    clause: str,
+    params: tuple,
+    *,
+    batch_size: int,
+    pause_ms: int,
+    dry_run: bool,
+    counts: dict[str, Any],
+    lock: asyncio.Lock | None,
+) -> None:
+    table = LAYER_TABLES[layer]
+    rule = f"{layer}.max_per_agent"
+    counts.setdefault(rule, 0)
+    over = await conn.execute_fetchall(
+        f"SELECT agent_id, COUNT(*) FROM {table} WHERE {clause} "  # noqa: S608
+        "GROUP BY agent_id HAVING COUNT(*) > ?",
+        (*params, keep),
+    )
+    for agent_id, total in over:
+        excess = total - keep
+        if dry_run:
+            counts[rule] += excess
+            continue
+        while excess > 0:
+            rows = await conn.execute_fetchall(
+                f"SELECT id FROM {table} WHERE agent_id = ? "  # noqa: S608
+                "ORDER BY created_at LIMIT ?",
+                (agent_id, min(batch_size, excess)),
+            )
+            ids = [r[0] for r in rows]
+            if not ids:
+                break
+            await delete_rows(conn, vectors, layer, ids, lock=lock)
+            counts[rule] += len(ids)
+            excess -= len(ids)
+            await asyncio.sleep(pause_ms / 1000)
+
+
+class RetentionSweeper:
+    """Applies every stored policy every retention_sweep_interval_s."""
+
+    def __init__(
+        self,
+        config: ServerConfig,
+        key_store: Any,
+        pool: Any,
+        *,
+        working: WorkingSetCache | None = None,
+        dedup: DedupWindow | None = None,
+    ) -> None:
+        self._config = config
+        self._key_store = key_store
+        self._pool = pool
+        self._working = working  # buffered sessions to drop after a sweep
+        self._dedup = dedup  # and remembered content whose rows may be gone
+        self._task: asyncio.Task | None = None
+        self._runs = 0
+        self._errors = 0
+        self._last_run_at: datetime | None = None
+        self._last_duration_ms = 0.0
+        self._last_counts: dict[str, dict[str, int]] = {}
+        self._expired: dict[str, int] = {}  # rule → rows deleted since start
+
+    def start(self) -> None:
+        if self._config.retention_sweep_interval_s > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def sweep_workspace(
+        self,
+        workspace_id: str,
+        policy: RetentionPolicy,
+        *,
+        dry_run: bool = False,
+        counts: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        async with self._pool.lease(workspace_id) as shard:
+            counts = await sweep_scope(
+                str(shard.store_path),
+                shard.vectors,
+                namespace_id(workspace_id),
+                policy,
+                batch_size=self._config.retention_batch_size,
+                pause_ms=self._config.erase_batch_pause_ms,
+                dry_run=dry_run,
+                counts=counts,
+                lock=shard.write_lock,
+            )
+        if not dry_run:
+            if self._working is not None and counts.get("working.max_age"):
+                self._working.invalidate(namespace_id(workspace_id))
+            if self._dedup is not None and any(counts.values()):
+                self._dedup.invalidate(namespace_id(workspace_id))
+            for rule, n in counts.items():
+                self._expired[rule] = self._expired.get(rule, 0) + n
+        return counts
+
+    async def run_once(self) -> dict[str, dict[str, int]]:
+        """One pass over every workspace with a policy."""
+        t0 = time.monotonic()
+        dry_run = self._config.retention_dry_run
+        results: dict[str, dict[str, int]] = {}
+        for info in await self._key_store.list_retention_policies():
+            try:
+                results[info.workspace_id] = await self.sweep_workspace(
+                    info.workspace_id, info.policy, dry_run=dry_run
+                )
+            except Exception:
+                self._errors += 1
+                logger.exception("Retention sweep failed for %s", info.workspace_id)
+        self._runs += 1
+        self._last_run_at = datetime.now(UTC)
+        self._last_duration_ms = round((time.monotonic() - t0) * 1000, 2)
+        self._last_counts = results
+        return results
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._config.retention_sweep_interval_s)
+            await self.run_once()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "interval_s": self._config.retention_sweep_interval_s,
+            "dry_run": self._config.retention_dry_run,
+            "runs": self._runs,
+            "errors": self._errors,
+            "last_run_at": self._last_run_at,
+            "last_duration_ms": self._last_duration_ms,
+            "last_run": self._last_counts,
+            "expired_total": self._expired,
+        }
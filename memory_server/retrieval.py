@@ -0,0 +1,325 @@
+"""
+Server-side recall: vector candidates fused with the FTS5 lexical index
+(memory_server.lexical) and ranked in one vectorized pass
+(memory_server.scoring).
+
+  fused = (1 - lexical_weight) * vector_score + lexical_weight * bm25_norm
+
+Memories found only lexically enter with similarity 0, so an exact
+identifier match can outrank a vaguely similar paraphrase.
+
+It is opt-in (PLYRA_LEXICAL_ENABLED); with lexical_weight 0 the index is
+kept but not consulted, so ranking is the plain vector ranking.
+
+Fast path: a short keyword query (≤ lexical_fast_path_max_terms terms) that
+the lexical index alone answers with at least top_k hits is served without
+calling the embedder or the vector store. Working memory is matched by term
+overlap there, since it is not in the FTS index.
+
+recall_scope() answers the same question for every namespace under a
+prefix (scope="workspace" on /v1/recall and /v1/context): one lexical query
+over the prefix, one vector query per layer and index, merged and ranked
+together with an optional per-namespace cap.
+
+Contexts (pack_context / pack) recall as many memories as the token budget
+can hold and add up their stored token counts (memory_server.tokens).
+
+With a QueryCache (memory_server.query_cache), recall() first looks for the
+query at the namespace's current write generation — before any search for
+an exact match, after embedding for a similar one — and caches what it
+computes.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from .config import ServerConfig
+from .lexical import terms
+from .query_cache import QueryCache
+from .scoring import Candidates, ScopeIndex, collect, collect_scope, rank, touch
+from .tokens import TokenCounter
+from .tracing import span
+
+# plyra-memory's vector search asks each layer for 2 * top_k; ask for a
+# wider candidate set so lexical evidence can pull results into the top_k
+_CANDIDATE_FACTOR = 2
+_MAX_CANDIDATES = 100
+
+
+async def recall(
+    memory: Any,
+    query: str,
+    top_k: int,
+    layers: list[Any] | None,
+    config: ServerConfig,
+    cache: QueryCache | None = None,
+) -> Any:
+    """RecallResult for `query` over the memory's namespace."""
+    from plyra_memory.schema import MemoryLayer, RecallResult
+
+    t0 = time.monotonic()
+    store = memory._store
+    layers = layers or list(MemoryLayer)
+    names = [layer.value for layer in layers]
+    namespace = memory._agent_id
+    cached = cache is not None and hasattr(store, "generation")
+    if cached:
+        params = f"{top_k}:{','.join(names)}"
+        generation = await store.generation(namespace)
+        entry = cache.get(namespace, params, query, generation)
+        if entry is not None:
+            return await _from_cache(store, query, entry, layers, t0)
+    candidates = min(top_k * _CANDIDATE_FACTOR, _MAX_CANDIDATES)
+    lexical = _uses_lexical(config, store)
+    hits = []
+    if lexical:
+        with span("lexical.search") as s:
+            hits = await store.lexical_search(
+                query, memory._agent_id, names, candidates
+            )
+            s.set(hits=len(hits))
+    options = {
+        "weights": _weights(memory._config),
+        "decay_lambda": memory._config.semantic_decay_lambda,
+        "min_score": _min_score(memory._config),
+        "with_lexical": lexical,
+        "mmr_lambda": config.recall_mmr_lambda,
+        "vectors": memory._vectors,
+    }
+
+    if len(terms(query)) <= config.lexical_fast_path_max_terms and len(hits) >= top_k:
+        found = Candidates()
+        for hit in hits:  # keyword score stands in for similarity
+            found.add(
+                hit.layer,
+                hit.id,
+                hit.content,
+                hit.created_at,
+                hit.recency_at,
+                hit.score,
+                hit.importance,
+                hit.score,
+            )
+        if "working" in names:
+            await _working_overlap(memory, query, found)
+        results, total = await rank(found, top_k, **options)
+        embedding = None
+    else:
+        embedding = await memory._embedder.embed(query)
+        if cached:
+            entry = cache.get(namespace, params, query, generation, embedding)
+            if entry is not None:
+                return await _from_cache(store, query, entry, layers, t0)
+        found = await collect(memory, embedding, names, candidates)
+        found.merge_lexical(hits, set(names))
+        results, total = await rank(
+            found,
+            top_k,
+            lexical_weight=config.lexical_weight if lexical else 0.0,
+            query_embedding=embedding,
+            **options,
+        )
+
+    result = RecallResult(
+        query=query,
+        results=results,
+        total_found=total,
+        layers_searched=layers,
+        latency_ms=round((time.monotonic() - t0) * 1000, 2),
+    )
+    if cached:
+        cache.put(namespace, params, query, generation, result, embedding)
+    return result
+
+
+async def _from_cache(
+    store: Any, query: str, entry: Any, layers: list[Any], t0: float
+) -> Any:
+    from plyra_memory.schema import RecallResult
+
+    # A hit is still an access: promotion counts them
+    for layer, kind in (("episodic", "episode"), ("semantic", "fact")):
+        await touch(
+            store, kind, [r.source_id for r in entry.results if r.layer.value == layer]
+        )
+    return RecallResult(
+        query=query,
+        results=entry.results,
+        total_found=entry.total_found,
+        layers_searched=layers,
+        cache_hit=True,
+        latency_ms=round((time.monotonic() - t0) * 1000, 2),
+    )
+
+
+async def recall_scope(
+    store: Any,
+    indexes: list[ScopeIndex],
+    prefix: str,
+    query: str,
+    top_k: int,
+    layers: list[Any] | None,
+    config: ServerConfig,
+    mem_config: Any,
+    *,
+    max_per_namespace: int | None = None,
+) -> Any:
+    """RecallResult for `query` over `prefix` and every namespace under it."""
+    from plyra_memory.schema import MemoryLayer, RecallResult
+
+    t0 = time.monotonic()
+    layers = [
+        layer for layer in layers or list(MemoryLayer) if layer != MemoryLayer.WORKING
+    ]
+    names = [layer.value for layer in layers]
+    candidates = min(top_k * _CANDIDATE_FACTOR, _MAX_CANDIDATES)
+    lexical = _uses_lexical(config, store)
+    hits = []
+    if lexical and names:
+        with span("lexical.search", nested=True) as s:
+            hits = await store.lexical_search(
+                query, prefix, names, candidates, nested=True
+            )
+            s.set(hits=len(hits))
+    options = {
+        "weights": _weights(mem_config),
+        "decay_lambda": mem_config.semantic_decay_lambda,
+        "min_score": _min_score(mem_config),
+        "with_lexical": lexical,
+        "max_per_namespace": max_per_namespace,
+    }
+
+    if len(terms(query)) <= config.lexical_fast_path_max_terms and len(hits) >= top_k:
+        found = Candidates()
+        for hit in hits:
+            found.add(
+                hit.layer,
+                hit.id,
+                hit.content,
+                hit.created_at,
+                hit.recency_at,
+                hit.score,
+                hit.importance,
+                hit.score,
+                hit.namespace,
+            )
+        results, total = await rank(found, top_k, **options)
+    elif indexes and names:
+        embeddings = [await index.embedder.embed(query) for index in indexes]
+        found = await collect_scope(store, indexes, embeddings, names, candidates)
+        found.merge_lexical(hits, set(names))
+        # MMR needs one embedding space; with several indexes it is skipped
+        single = len(indexes) == 1
+        results, total = await rank(
+            found,
+            top_k,
+            lexical_weight=config.lexical_weight if lexical else 0.0,
+            mmr_lambda=config.recall_mmr_lambda if single else 1.0,
+            vectors=indexes[0].vectors if single else None,
+            query_embedding=embeddings[0] if single else None,
+            **options,
+        )
+    else:
+        results, total = [], 0
+
+    return RecallResult(
+        query=query,
+        results=results,
+        total_found=total,
+        layers_searched=layers,
+        latency_ms=round((time.monotonic() - t0) * 1000, 2),
+    )
+
+
+async def pack_context(
+    memory: Any,
+    query: str,
+    token_budget: int | None,
+    config: ServerConfig,
+    tokens: TokenCounter,
+    cache: QueryCache | None = None,
+) -> Any:
+    """Same packing as Memory.context_for, over the server-side recall."""
+    budget = token_budget or memory._config.default_token_budget
+    result = await recall(memory, query, tokens.fetch_size(budget), None, config, cache)
+    return await pack(memory._store, result, budget, tokens)
+
+
+async def pack(store: Any, result: Any, budget: int, tokens: TokenCounter) -> Any:
+    """ContextResult from a RecallResult: best memories that fit `budget`."""
+    from plyra_memory.schema import ContextResult
+
+    parts: list[str] = []
+    token_count = 0
+    with span("context.pack", budget=budget) as s:
+        counts = {}
+        if hasattr(store, "token_counts"):
+            counts = await store.token_counts([r.source_id for r in result.results])
+        for ranked in result.results:
+            count = counts.get(ranked.source_id)
+            if count is None:
+                count = tokens.count(ranked.content)
+            line = tokens.line(ranked.layer.value, count)
+            if token_count + line > budget:
+                break  # full: nothing after this is looked at
+            parts.append(f"[{ranked.layer.value.upper()}] {ranked.content}")
+            token_count += line
+        s.set(memories=len(parts), tokens=token_count, stored=len(counts))
+
+    return ContextResult(
+        query=result.query,
+        content="\n".join(parts),
+        token_count=token_count,
+        token_budget=budget,
+        memories_used=len(parts),
+        cache_hit=result.cache_hit,
+        latency_ms=result.latency_ms,
+    )
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+
+def _uses_lexical(config: ServerConfig, store: Any) -> bool:
+    """Keyword matching takes part — with weight 0 recall is vector-only."""
+    return (
+        config.lexical_enabled
+        and config.lexical_weight > 0
+        and getattr(store, "lexical_enabled", False)
+    )
+
+
+def _weights(cfg: Any) -> tuple[float, float, float]:
+    return (
+        cfg.default_similarity_weight,
+        cfg.default_recency_weight,
+        cfg.default_importance_weight,
+    )
+
+
+def _min_score(cfg: Any) -> float:
+    # MemoryConfig.min_score where the installed plyra-memory has it
+    return getattr(cfg, "min_score", 0.0)
+
+
+async def _working_overlap(memory: Any, query: str, found: Candidates) -> None:
+    wanted = {t.lower() for t in terms(query)}
+    if not wanted:
+        return
+    state = await memory.working.get(memory._session_id)
+    for entry in state.entries:
+        overlap = len(wanted & {t.lower() for t in terms(entry.content)})
+        if overlap:
+            lex = overlap / len(wanted)
+            found.add(
+                "working",
+                entry.id,
+                entry.content,
+                entry.created_at,
+                entry.created_at,
+                lex,
+                entry.importance,
+                lex,
+            )
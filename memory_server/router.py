@@ -10,26 +10,62 @@ Routes:
   GET  /stats                   memory counts for workspace
 
   POST /v1/remember             write to memory
-  POST /v1/recall               search memory
+  POST /v1/recall               search memory (one agent, or scope=workspace)
   POST /v1/context              get prompt-ready context
-  DELETE /v1/memory             clear memory (scoped)
+    (these three answer in msgpack with Accept: application/msgpack)
+  DELETE /v1/memory             erase memory (scoped, background job)
+  GET  /v1/jobs/{job_id}        background job status
+  GET  /v1/extractions/{id}     fact extraction status of a remember
+  GET  /v1/export               stream memory as NDJSON
+  POST /v1/import               load an NDJSON export
+  WS   /v1/session              remember / context / recall over one connection
 
   POST /admin/keys              create API key (admin only)
   GET  /admin/keys/{workspace}  list keys for workspace (admin only)
   DELETE /admin/keys/{key_id}   revoke key (admin only)
+  POST /admin/snapshot          online snapshot of all data (admin only)
+
+In cluster mode (PLYRA_CLUSTER_MODE) remember / recall / context / stats for
+a namespace another node owns are forwarded to it, or answered with a hint
+naming it (see cluster.py).
 """
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
 import time
 from contextlib import asynccontextmanager
+from typing import Any
 
-from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi import (
+    Depends,
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+    WebSocketException,
+    status,
+)
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from starlette.requests import HTTPConnection
 
-from .auth import require_admin, require_auth
+from .admission import AdmissionController, OverloadedError, route_class
+from .auth import authenticate, require_admin, require_auth
+from .cluster import FORWARDED_HEADER, NODE_HEADER, OWNER_HEADER, Cluster
 from .config import ServerConfig
+from .consolidation import ConsolidationScheduler
+from .embedding import PreparedEmbedder, build_embedder
+from .erasure import LAYER_TABLES, erase_scope
+from .extraction import ExtractionTracker
+from .idempotency import DedupWindow, IdempotencyStore, KeyReusedError
+from .jobs import JobRegistry
 from .keys import generate_api_key
 from .keys import key_prefix as fmt_key_prefix
 from .models import (
@@ -40,17 +76,58 @@ from .models import (
     CreateKeyRequest,
     DeleteMemoryRequest,
     DeleteMemoryResponse,
+    ExtractionInfo,
+    ImportResponse,
+    JobInfo,
     RecallRequest,
     RecallResponse,
+    ReindexRequest,
     RememberRequest,
     RememberResponse,
+    RetentionPolicy,
+    RetentionPolicyInfo,
     StatsResponse,
+    SweepRequest,
+    WorkspaceQuota,
+    WorkspaceQuotaInfo,
 )
+from .namespace import namespace_id, session_id_for
+from .query_cache import QueryCache
+from .reindex import reindex_scope
+from .responses import ranked_item, render
+from .retention import RetentionSweeper
+from .retrieval import pack, pack_context, recall_scope
+from .retrieval import recall as fused_recall
+from .scoring import ScopeIndex
+from .session import (
+    SESSION_MESSAGES,
+    MessageError,
+    WarmMemory,
+    error_reply,
+    parse_message,
+    reply,
+)
+from .shards import Borrowed, Scoped, ShardPool
+from .snapshot import take_snapshot
 from .storage.sqlite import SQLiteKeyStore
+from .tokens import TokenCounter
+from .tracing import Tracer, span
+from .transfer import export_scope, import_stream, iter_lines
+from .usage import QuotaExceededError, UsageMeter
+from .usage import summary as usage_summary
+from .vectors import parse_vectors_url
+from .working import BufferedWorkingLayer, WorkingSetCache
 
 logger = logging.getLogger(__name__)
 
 
+def _release_admission(request: HTTPConnection) -> None:
+    """Give the admission slot back before a long-poll."""
+    release = getattr(request.state, "release_admission", None)
+    if release is not None:
+        release()
+
+
 def build_app(config: ServerConfig | None = None) -> FastAPI:
     config = config or ServerConfig.default()
 
@@ -65,6 +142,23 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
         app.state.key_store = key_store
         app.state.config = config
         app.state.start_time = time.monotonic()
+        app.state.jobs = JobRegistry(config.max_background_jobs)
+        app.state.tracer = Tracer(config)
+        app.state.admission = AdmissionController(config)
+        app.state.idempotency = IdempotencyStore(
+            config.idempotency_ttl_s, config.idempotency_max_keys
+        )
+        app.state.dedup = DedupWindow(
+            config.remember_dedup_window_s, config.remember_dedup_max_entries
+        )
+        app.state.extractions = ExtractionTracker(
+            config.extraction_status_ttl_s, config.extraction_status_max_entries
+        )
+        app.state.cluster = Cluster(config) if config.cluster_mode != "off" else None
+        # Per-workspace accounting and the quotas set on it
+        app.state.usage = UsageMeter(config, key_store)
+        await app.state.usage.reload()
+        app.state.tracer.start()
 
         # Memory pool — one Memory instance per (workspace, agent) pair
         # In v0.3 we keep it simple: one global Memory instance namespaced
@@ -125,12 +219,54 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
                 "LLM extraction: disabled (regex fallback). Set GROQ_API_KEY to enable."
             )
 
+        # One embedder (and one loaded model) for every request
+        app.state.embedder = build_embedder(config)
+        # Other models' embedders, built when a namespace or re-index needs one
+        app.state.embedders = {config.embed_model: app.state.embedder}
         app.state.mem_config = mem_config
         app.state.extractor = extractor
         app.state.llm_client = llm_client
+        # Token counts stored with each memory, for context budgets
+        app.state.tokens = TokenCounter(config.context_tokenizer)
+        app.state.shards = ShardPool(config, mem_config, app.state.tokens)
+        # Recall results across requests, and restarts with query_cache_path
+        app.state.query_cache = (
+            QueryCache(config) if config.query_cache_entries > 0 else None
+        )
+        if app.state.query_cache is not None:
+            await app.state.query_cache.start()
+        app.state.working = (
+            WorkingSetCache(config.working_buffer_sessions)
+            if config.working_buffer_sessions > 0
+            else None
+        )
+        app.state.retention = RetentionSweeper(
+            config,
+            key_store,
+            app.state.shards,
+            working=app.state.working,
+            dedup=app.state.dedup,
+        )
+        app.state.retention.start()
+        app.state.consolidation = ConsolidationScheduler(
+            config,
+            memory_for,
+            summarize=llm_client is not None
+            or config.consolidation_summarize_without_llm,
+        )
+        app.state.consolidation.start()
 
         yield
 
+        await app.state.consolidation.close()
+        await app.state.retention.close()
+        await app.state.jobs.close()
+        if app.state.query_cache is not None:
+            await app.state.query_cache.close()
+        await app.state.shards.close()
+        await app.state.tracer.close()
+        if app.state.cluster is not None:
+            await app.state.cluster.close()
         await key_store.close()
 
     app = FastAPI(
@@ -140,6 +276,32 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
         lifespan=lifespan,
     )
 
+    # ── Middleware: admission control (inside CORS, so 503s carry its headers)
+
+    @app.middleware("http")
+    async def admit(request: Request, call_next):
+        admission: AdmissionController = request.app.state.admission
+        cls = route_class(request.method, request.url.path)
+        if cls is None or not admission.enabled:
+            return await call_next(request)
+        limiter = admission.limiter(cls)
+        tenant = admission.tenant(request.headers.get("Authorization", ""))
+        try:
+            with span("admission", route_class=cls):
+                await limiter.acquire(tenant, admission.timeout)
+        except OverloadedError as exc:
+            return JSONResponse(
+                {"detail": f"Server overloaded ({cls} {exc}). Retry shortly."},
+                status_code=503,
+                headers={"Retry-After": str(admission.retry_after)},
+            )
+        release = limiter.releaser()
+        request.state.release_admission = release  # before a long-poll
+        try:
+            return await call_next(request)
+        finally:
+            release()
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=config.cors_origins,
@@ -147,54 +309,270 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
         allow_headers=["*"],
     )
 
-    # ── Middleware: latency header ────────────────────────────────────────────
+    # ── Middleware: latency header + request trace ───────────────────────────
 
     @app.middleware("http")
     async def add_latency_header(request: Request, call_next):
         t0 = time.monotonic()
-        response = await call_next(request)
+        tracer: Tracer = request.app.state.tracer
+        with tracer.trace(
+            f"{request.method} {request.url.path}",
+            request.headers.get("traceparent"),
+        ) as root:
+            response = await call_next(request)
+            if root is not None:
+                root.set(**{"http.status_code": response.status_code})
+                response.headers["X-Trace-Id"] = root.trace_id
+        cluster: Cluster | None = request.app.state.cluster
+        if cluster is not None:
+            # A forwarded response keeps the node that served it
+            response.headers.setdefault(NODE_HEADER, cluster.self_url)
+            owner = getattr(request.state, "owner_hint", None)
+            if owner is not None:
+                response.headers[OWNER_HEADER] = owner
         ms = round((time.monotonic() - t0) * 1000, 2)
         response.headers["X-Latency-Ms"] = str(ms)
         return response
 
-    # ── Helper: get or create Memory instance for namespace ──────────────────
+    # ── Helper: Memory instance for namespace ────────────────────────────────
 
-    async def get_memory(request: Request, user_id: str | None, agent_id: str | None):
+    @asynccontextmanager
+    async def open_memory(
+        request: HTTPConnection,
+        user_id: str | None,
+        agent_id: str | None,
+        *,
+        write: bool = False,
+        embed: str | None = None,
+    ):
+        """
+        Memory for the caller's workspace and the given user / agent; on a
+        /v1/session connection, the session's Memory kept open across messages.
+        `embed` is embedded before the write lock is taken.
         """
-        Returns a Memory instance scoped to workspace/user/agent.
+        workspace_id = request.state.auth.workspace_id
+        namespaced_id = namespace_id(workspace_id, user_id, agent_id)
+        warm: WarmMemory | None = getattr(request.state, "session", None)
+        if warm is not None and warm.namespace == namespaced_id:
+            memory, shard = await warm.get()
+            async with _prepared(memory, embed), _locked(shard, write):
+                yield memory
+            return
+        async with memory_for(
+            workspace_id, namespaced_id, write=write, embed=embed
+        ) as memory:
+            yield memory
+
+    @asynccontextmanager
+    async def memory_for(
+        workspace_id: str,
+        namespaced_id: str,
+        *,
+        write: bool = False,
+        embed: str | None = None,
+    ):
+        """
+        Yields a Memory instance scoped to workspace/user/agent.
         For v0.3 self-hosted: uses compound agent_id as namespace key.
         e.g. "ws_acme:user_xyz:agent_support1"
 
         Uses a deterministic session_id derived from the namespaced_id so that
         episodic recall (which filters by session_id) finds memories written by
         previous requests for the same agent — not just the current request's session.
-        """
-        import hashlib
 
-        auth = request.state.auth
-        # Build namespaced agent_id
-        parts = [f"ws_{auth.workspace_id}"]
-        if user_id:
-            parts.append(f"u_{user_id}")
-        if agent_id:
-            parts.append(f"a_{agent_id}")
-        namespaced_id = ":".join(parts)
-
-        # Stable session_id: same agent always gets the same session so
-        # episodic memories from past requests are visible on recall.
-        stable_session_id = hashlib.md5(namespaced_id.encode()).hexdigest()
+        Store and vectors are borrowed from the workspace's shard. With
+        write=True the shard's write lock is held for the duration, after
+        `embed` (the content about to be written) has been embedded.
+        """
+        memory, shard = await _open_namespace(workspace_id, namespaced_id)
+        try:
+            async with _prepared(memory, embed), _locked(shard, write):
+                yield memory
+        finally:
+            await _close_namespace(memory, shard)
 
+    async def _open_namespace(workspace_id: str, namespaced_id: str):
+        """(memory, shard): the shard leased, the namespace bound to its index."""
         from plyra_memory import Memory
 
+        pool: ShardPool = app.state.shards
+        with span("namespace", namespace=namespaced_id):
+            shard = await pool.acquire(workspace_id)
+            # The index (and so the model) this namespace's vectors are in
+            model, vectors = await shard.vectors.bind(namespaced_id)
+
+        usage: UsageMeter = app.state.usage
         memory = Memory(
-            config=request.app.state.mem_config,
+            config=app.state.mem_config,
             agent_id=namespaced_id,
-            session_id=stable_session_id,
-            extractor=request.app.state.extractor,
-            llm_client=request.app.state.llm_client,
+            session_id=session_id_for(namespaced_id),
+            store=Borrowed(shard.store),
+            vectors=Scoped(vectors, namespaced_id),
+            embedder=PreparedEmbedder(
+                usage.embedder(embedder_for(model), workspace_id)
+            ),
+            extractor=usage.extractor(app.state.extractor, workspace_id),
+            llm_client=app.state.llm_client,
         )
-        await memory._ensure_initialized()
-        return memory
+        try:
+            with span("namespace.init"):
+                await memory._ensure_initialized()
+            if app.state.working is not None:
+                BufferedWorkingLayer.install(app.state.working, memory)
+        except BaseException:
+            await _close_namespace(memory, shard)
+            raise
+        return memory, shard
+
+    async def _close_namespace(memory: Any, shard: Any) -> None:
+        pool: ShardPool = app.state.shards
+        namespaced_id = memory._agent_id
+        await memory.close()
+        if memory._bg_tasks:
+            # Background fact extraction still writes to this shard
+            tasks = set(memory._bg_tasks)
+            pool.release_after(shard, tasks)
+            shard.vectors.unbind_after(namespaced_id, tasks)
+        else:
+            shard.vectors.unbind(namespaced_id)
+            await pool.release(shard)
+
+    @asynccontextmanager
+    async def _prepared(memory: Any, text: str | None):
+        """`text` embedded up front for the block, so writes don't wait on it."""
+        if text is None:
+            yield
+            return
+        with span("embed.prepare"):
+            await memory._embedder.prepare(text)
+        try:
+            yield
+        finally:
+            memory._embedder.discard(text)
+
+    @asynccontextmanager
+    async def _locked(shard: Any, write: bool):
+        """The shard's write lock, held for the block when `write`."""
+        if not write:
+            yield
+            return
+        with span("write_lock"):
+            await shard.write_lock.acquire()
+        try:
+            yield
+        finally:
+            shard.write_lock.release()
+
+    @asynccontextmanager
+    async def scope_for(workspace_id: str, prefix: str):
+        """
+        Yields (shard, [ScopeIndex]) for every namespace under `prefix` that
+        has memories, grouped by the index (and model) its vectors are in.
+        Each namespace stays bound to its index until the block exits.
+        """
+        pool: ShardPool = app.state.shards
+        async with pool.lease(workspace_id) as shard:
+            with span("namespace.scope", prefix=prefix) as s:
+                namespaces = await shard.store.namespaces(prefix)
+                s.set(namespaces=len(namespaces))
+            groups: dict[str, ScopeIndex] = {}
+            bound: list[str] = []
+            try:
+                for ns in namespaces:
+                    model, vectors = await shard.vectors.bind(ns)
+                    bound.append(ns)
+                    if model not in groups:
+                        embedder = app.state.usage.embedder(
+                            embedder_for(model), workspace_id
+                        )
+                        groups[model] = ScopeIndex(vectors, embedder, [])
+                    groups[model].namespaces.append(ns)
+                yield shard, list(groups.values())
+            finally:
+                for ns in bound:
+                    shard.vectors.unbind(ns)
+
+    async def _recall_scope(
+        request: HTTPConnection,
+        body: RecallRequest | ContextRequest,
+        top_k: int,
+        layers,
+        *,
+        budget: int | None = None,
+    ) -> Any:
+        """RecallResult over the scope; a ContextResult packed to `budget`."""
+        workspace_id = request.state.auth.workspace_id
+        prefix = namespace_id(workspace_id, body.user_id, body.agent_id)
+        async with scope_for(workspace_id, prefix) as (shard, indexes):
+            result = await recall_scope(
+                shard.store,
+                indexes,
+                prefix,
+                body.query,
+                top_k,
+                layers,
+                config,
+                app.state.mem_config,
+                max_per_namespace=body.max_per_agent,
+            )
+            if budget is not None:
+                packed = await pack(shard.store, result, budget, app.state.tokens)
+        for ns in {r.metadata["namespace"] for r in result.results}:
+            request.app.state.consolidation.mark(workspace_id, ns, summarize=False)
+        return result if budget is None else packed
+
+    async def _affinity(
+        request: Request, user_id: str | None, agent_id: str | None
+    ) -> Response | None:
+        """
+        In cluster mode, the owner's response when another node owns the
+        namespace (proxy mode), or None to serve it here — with the owner
+        named in X-Plyra-Owner in redirect mode.
+        """
+        cluster: Cluster | None = request.app.state.cluster
+        if cluster is None or FORWARDED_HEADER in request.headers:
+            return None
+        workspace_id = request.state.auth.workspace_id
+        owner = cluster.owner(namespace_id(workspace_id, user_id, agent_id))
+        if owner == cluster.self_url:
+            return None
+        if cluster.mode == "redirect":
+            request.state.owner_hint = owner
+            return None
+        _release_admission(request)  # the owner admits it
+        with span("cluster.forward", owner=owner):
+            return await cluster.forward(request, owner)
+
+    async def _within_quota(
+        request: HTTPConnection, *rates: str, store: Any = None
+    ) -> None:
+        """
+        429 if the caller's workspace is at one of its `rates` quotas, or,
+        given its store, at a storage quota.
+        """
+        usage: UsageMeter = request.app.state.usage
+        workspace_id = request.state.auth.workspace_id
+        try:
+            await usage.check_rates(workspace_id, *rates)
+            if store is not None:
+                await usage.check_storage(
+                    workspace_id, store, namespace_id(workspace_id)
+                )
+        except QuotaExceededError as exc:
+            headers = None
+            if exc.retry_after is not None:
+                headers = {"Retry-After": str(exc.retry_after)}
+            raise HTTPException(429, str(exc), headers=headers)
+
+    def embedder_for(model: str) -> Any:
+        """The shared embedder for `model`."""
+        embedders = app.state.embedders
+        if model not in embedders:
+            logger.info("Loading embedder for %s", model)
+            embedders[model] = build_embedder(
+                config.model_copy(update={"embed_model": model})
+            )
+        return embedders[model]
 
     # ── Service routes ────────────────────────────────────────────────────────
 
@@ -217,6 +595,23 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
             "env": config.env,
             "store": config.store_url,
             "vectors": config.vectors_url,
+            "admission": request.app.state.admission.stats,
+            "consolidation": request.app.state.consolidation.stats,
+            "working_buffer": (
+                request.app.state.working.stats
+                if request.app.state.working is not None
+                else None
+            ),
+            "cluster": (
+                request.app.state.cluster.stats
+                if request.app.state.cluster is not None
+                else None
+            ),
+            "query_cache": (
+                request.app.state.query_cache.stats
+                if request.app.state.query_cache is not None
+                else None
+            ),
         }
 
     # ── Memory routes (require auth) ──────────────────────────────────────────
@@ -228,22 +623,92 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
     )
     async def remember(request: Request, body: RememberRequest):
         t0 = time.monotonic()
-        memory = await get_memory(request, body.user_id, body.agent_id)
-        result = await memory.remember(
-            content=body.content,
-            importance=body.importance,
-            source=body.source,
-            metadata=body.metadata,
-        )
-        await memory.close()
-        return RememberResponse(
-            working_entry_id=result["working_entry"].id
-            if result["working_entry"]
-            else None,
-            episode_id=result["episode"].id if result["episode"] else None,
-            facts_queued=True,
-            latency_ms=round((time.monotonic() - t0) * 1000, 2),
-        )
+        forwarded = await _affinity(request, body.user_id, body.agent_id)
+        if forwarded is not None:
+            return forwarded
+        workspace = request.state.auth.workspace_id
+        idem: IdempotencyStore = request.app.state.idempotency
+        key = request.headers.get("Idempotency-Key")
+        if key:
+            try:
+                replay = await idem.begin(workspace, key, body.model_dump_json())
+            except KeyReusedError:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used with a different body.",
+                )
+            if replay is not None:
+                response = render(request, replay)
+                response.headers["Idempotent-Replayed"] = "true"
+                return response
+        try:
+            payload = await _remember(request, body)
+        except BaseException:
+            if key:
+                idem.abort(workspace, key)
+            raise
+        payload["latency_ms"] = round((time.monotonic() - t0) * 1000, 2)
+        if key:
+            idem.finish(workspace, key, payload)
+        return render(request, payload)
+
+    async def _remember(request: HTTPConnection, body: RememberRequest) -> dict:
+        workspace = request.state.auth.workspace_id
+        namespaced_id = namespace_id(workspace, body.user_id, body.agent_id)
+        dedup: DedupWindow = request.app.state.dedup
+        if dedup.enabled:
+            seen = dedup.get(namespaced_id, body.content)
+            if seen is not None:
+                payload = {**seen, "facts_queued": False, "deduplicated": True}
+                return await _wait_for_facts(request, body, payload)
+
+        await _within_quota(request, "embeds_per_minute")
+        extractions: ExtractionTracker = request.app.state.extractions
+        async with open_memory(
+            request, body.user_id, body.agent_id, write=True, embed=body.content
+        ) as memory:
+            await _within_quota(request, store=memory._store)
+            extraction = extractions.track(memory, workspace, body.content)
+            try:
+                with span("remember"):
+                    result = await memory.remember(
+                        content=body.content,
+                        importance=body.importance,
+                        source=body.source,
+                        metadata=body.metadata,
+                    )
+            except BaseException:
+                extractions.discard(extraction)
+                raise
+        working, episode = result["working_entry"], result["episode"]
+        ids = {
+            "working_entry_id": working.id if working else None,
+            "episode_id": episode.id if episode else None,
+            "extraction_id": extraction.extraction_id,
+        }
+        if dedup.enabled:
+            dedup.put(namespaced_id, body.content, ids)
+        if request.app.state.query_cache is not None:
+            request.app.state.query_cache.invalidate(namespaced_id)
+        request.app.state.consolidation.mark(workspace, namespaced_id)
+        payload = {**ids, "facts_queued": True, "deduplicated": False}
+        return await _wait_for_facts(request, body, payload)
+
+    async def _wait_for_facts(
+        request: HTTPConnection, body: RememberRequest, payload: dict
+    ) -> dict:
+        """With wait_for_facts_ms, long-poll the extraction into the payload."""
+        extraction_id = payload.get("extraction_id")
+        extractions: ExtractionTracker = request.app.state.extractions
+        entry = None
+        if body.wait_for_facts_ms and extraction_id is not None:
+            entry = extractions.get(request.state.auth.workspace_id, extraction_id)
+        if entry is None:
+            return {**payload, "extraction": None}
+        _release_admission(request)
+        with span("extraction.wait"):
+            await extractions.wait(entry, body.wait_for_facts_ms)
+        return {**payload, "extraction": entry.info()}
 
     @app.post(
         "/v1/recall",
@@ -252,6 +717,15 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
     )
     async def recall(request: Request, body: RecallRequest):
         t0 = time.monotonic()
+        if body.scope == "agent":
+            forwarded = await _affinity(request, body.user_id, body.agent_id)
+            if forwarded is not None:
+                return forwarded
+        payload = await _recall(request, body)
+        payload["latency_ms"] = round((time.monotonic() - t0) * 1000, 2)
+        return render(request, payload)
+
+    async def _recall(request: HTTPConnection, body: RecallRequest) -> dict:
         from plyra_memory.schema import MemoryLayer
 
         layers = None
@@ -263,20 +737,31 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
                     400, "Invalid layer. Use: working, episodic, semantic"
                 )
 
-        memory = await get_memory(request, body.user_id, body.agent_id)
-        result = await memory.recall(
-            query=body.query,
-            top_k=body.top_k,
-            layers=layers,
-        )
-        await memory.close()
-        return RecallResponse(
-            query=result.query,
-            results=[r.model_dump() for r in result.results],
-            total_found=result.total_found,
-            cache_hit=result.cache_hit,
-            latency_ms=round((time.monotonic() - t0) * 1000, 2),
-        )
+        await _within_quota(request, "embeds_per_minute", "recall_ms_per_minute")
+        t0 = time.monotonic()
+        if body.scope == "workspace":
+            result = await _recall_scope(request, body, body.top_k, layers)
+        else:
+            async with open_memory(request, body.user_id, body.agent_id) as memory:
+                result = await fused_recall(
+                    memory,
+                    body.query,
+                    body.top_k,
+                    layers,
+                    config,
+                    request.app.state.query_cache,
+                )
+                # Recall raises access counts, which is what promotion looks at
+                request.app.state.consolidation.mark(
+                    request.state.auth.workspace_id, memory._agent_id, summarize=False
+                )
+        _record_recall(request, t0)
+        return {
+            "query": result.query,
+            "results": [ranked_item(r) for r in result.results],
+            "total_found": result.total_found,
+            "cache_hit": result.cache_hit,
+        }
 
     @app.post(
         "/v1/context",
@@ -285,21 +770,54 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
     )
     async def context(request: Request, body: ContextRequest):
         t0 = time.monotonic()
-        memory = await get_memory(request, body.user_id, body.agent_id)
-        result = await memory.context_for(
-            query=body.query,
-            token_budget=body.token_budget,
-        )
-        await memory.close()
-        return ContextResponse(
-            query=result.query,
-            content=result.content,
-            token_count=result.token_count,
-            token_budget=result.token_budget,
-            memories_used=result.memories_used,
-            cache_hit=result.cache_hit,
-            latency_ms=round((time.monotonic() - t0) * 1000, 2),
-        )
+        if body.scope == "agent":
+            forwarded = await _affinity(request, body.user_id, body.agent_id)
+            if forwarded is not None:
+                return forwarded
+        payload = await _context(request, body)
+        payload["latency_ms"] = round((time.monotonic() - t0) * 1000, 2)
+        return render(request, payload)
+
+    async def _context(request: HTTPConnection, body: ContextRequest) -> dict:
+        tokens: TokenCounter = request.app.state.tokens
+        await _within_quota(request, "embeds_per_minute", "recall_ms_per_minute")
+        t0 = time.monotonic()
+        if body.scope == "workspace":
+            result = await _recall_scope(
+                request,
+                body,
+                tokens.fetch_size(body.token_budget),
+                None,
+                budget=body.token_budget,
+            )
+        else:
+            async with open_memory(request, body.user_id, body.agent_id) as memory:
+                result = await pack_context(
+                    memory,
+                    body.query,
+                    body.token_budget,
+                    config,
+                    tokens,
+                    request.app.state.query_cache,
+                )
+                request.app.state.consolidation.mark(
+                    request.state.auth.workspace_id, memory._agent_id, summarize=False
+                )
+        _record_recall(request, t0)
+        return {
+            "query": result.query,
+            "content": result.content,
+            "token_count": result.token_count,
+            "token_budget": result.token_budget,
+            "memories_used": result.memories_used,
+            "cache_hit": result.cache_hit,
+        }
+
+    def _record_recall(request: HTTPConnection, t0: float) -> None:
+        usage: UsageMeter = request.app.state.usage
+        workspace_id = request.state.auth.workspace_id
+        usage.record(workspace_id, "recalls")
+        usage.record(workspace_id, "recall_ms", (time.monotonic() - t0) * 1000)
 
     @app.get(
         "/v1/stats", response_model=StatsResponse, dependencies=[Depends(require_auth)]
@@ -309,12 +827,14 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
         user_id: str | None = None,
         agent_id: str | None = None,
     ):
+        forwarded = await _affinity(request, user_id, agent_id)
+        if forwarded is not None:
+            return forwarded
         auth = request.state.auth
-        memory = await get_memory(request, user_id, agent_id)
-        counts = await memory._store.count_memories()
-        cache_size = memory._cache.size if memory._cache else 0
+        async with open_memory(request, user_id, agent_id) as memory:
+            counts = await memory._store.count_memories()
+            cache_size = memory._cache.size if memory._cache else 0
         uptime = time.monotonic() - request.app.state.start_time
-        await memory.close()
         return StatsResponse(
             workspace_id=auth.workspace_id,
             working=counts.get("working", 0),
@@ -327,19 +847,305 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
     @app.delete(
         "/v1/memory",
         response_model=DeleteMemoryResponse,
+        status_code=202,
         dependencies=[Depends(require_auth)],
     )
     async def delete_memory(request: Request, body: DeleteMemoryRequest):
-        memory = await get_memory(request, body.user_id, body.agent_id)
-        layer = body.layer
-        if layer == "working" or layer is None:
-            await memory.working.clear(memory.session_id)
-        # Episodic and semantic delete not exposed in v0.3 — too destructive
-        # Future: add scoped delete by session_id or agent_id
-        await memory.close()
+        """
+        Erase memory under workspace / user / agent, including every
+        namespace nested below it. Without `layer` only working memory is
+        cleared; "all" or a list of layers erases more. Runs as a background
+        job in bounded batches; poll GET /v1/jobs/{job_id} for progress.
+        """
+        auth = request.state.auth
+        if body.layer is None:
+            layers = ["working"]
+        elif body.layer == "all":
+            layers = list(LAYER_TABLES)
+        else:
+            layers = [body.layer] if isinstance(body.layer, str) else body.layer
+            if not layers or any(layer not in LAYER_TABLES for layer in layers):
+                raise HTTPException(
+                    400, "Invalid layer. Use: working, episodic, semantic, all"
+                )
+            layers = [layer for layer in LAYER_TABLES if layer in layers]
+        prefix = namespace_id(auth.workspace_id, body.user_id, body.agent_id)
+
+        pool: ShardPool = request.app.state.shards
+        working: WorkingSetCache | None = request.app.state.working
+        dedup: DedupWindow = request.app.state.dedup
+
+        async def _erase(job: JobInfo):
+            async with pool.lease(auth.workspace_id) as shard:
+                counts = await erase_scope(
+                    str(shard.store_path),
+                    shard.vectors,
+                    prefix,
+                    layers,
+                    batch_size=config.erase_batch_size,
+                    pause_ms=config.erase_batch_pause_ms,
+                    counts=job.progress,
+                    lock=shard.write_lock,
+                )
+            if working is not None and "working" in layers:
+                working.invalidate(prefix)
+            dedup.invalidate(prefix)
+            return counts
+
+        job = request.app.state.jobs.submit("erase", auth.workspace_id, _erase)
         return DeleteMemoryResponse(
-            deleted=True,
-            message=f"Cleared {layer or 'working'} memory for agent {body.agent_id}",
+            deleted=False,
+            message=f"Erasing {', '.join(layers)} memory under {prefix}",
+            job_id=job.job_id,
+        )
+
+    @app.get(
+        "/v1/jobs/{job_id}",
+        response_model=JobInfo,
+        dependencies=[Depends(require_auth)],
+    )
+    async def get_job(request: Request, job_id: str):
+        job = request.app.state.jobs.get(job_id)
+        if job is None or job.workspace_id != request.state.auth.workspace_id:
+            raise HTTPException(404, f"Job {job_id} not found")
+        return job
+
+    @app.get(
+        "/v1/extractions/{extraction_id}",
+        response_model=ExtractionInfo,
+        dependencies=[Depends(require_auth)],
+    )
+    async def get_extraction(
+        request: Request,
+        extraction_id: str,
+        wait_ms: int = Query(0, ge=0, le=30_000),
+    ):
+        """Fact extraction of a /v1/remember; wait_ms long-polls until it ends."""
+        extractions: ExtractionTracker = request.app.state.extractions
+        entry = extractions.get(request.state.auth.workspace_id, extraction_id)
+        if entry is None:
+            raise HTTPException(404, f"Extraction {extraction_id} not found")
+        if wait_ms and not entry.done.is_set():
+            _release_admission(request)
+            await extractions.wait(entry, wait_ms)
+        return entry.info()
+
+    # ── WebSocket session channel ─────────────────────────────────────────────
+
+    session_ops = {
+        "remember": (RememberRequest, _remember),
+        "context": (ContextRequest, _context),
+        "recall": (RecallRequest, _recall),
+    }
+
+    @app.websocket("/v1/session")
+    async def session(
+        websocket: WebSocket,
+        user_id: str | None = None,
+        agent_id: str | None = None,
+    ):
+        """
+        remember / context / recall messages over one connection bound to
+        one namespace (see memory_server.session).
+        """
+        try:
+            key_hash = await authenticate(websocket)
+        except HTTPException as exc:
+            raise WebSocketException(status.WS_1008_POLICY_VIOLATION, exc.detail)
+        workspace_id = websocket.state.auth.workspace_id
+        namespaced_id = namespace_id(workspace_id, user_id, agent_id)
+        warm = WarmMemory(
+            namespaced_id,
+            functools.partial(_open_namespace, workspace_id, namespaced_id),
+            _close_namespace,
+        )
+        websocket.state.session = warm
+        bound = {"user_id": user_id, "agent_id": agent_id}
+        ready = {"namespace": namespaced_id}
+        cluster: Cluster | None = websocket.app.state.cluster
+        if cluster is not None and cluster.owner(namespaced_id) != cluster.self_url:
+            # Sessions aren't forwarded; a client can reconnect to the owner
+            ready["owner"] = cluster.owner(namespaced_id)
+        await websocket.accept()
+        await websocket.send_text(reply(None, "session", ready))
+        checked = time.monotonic()
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(
+                        websocket.receive(), config.session_idle_release_s
+                    )
+                except TimeoutError:
+                    await warm.release()  # quiet: give the shard and index back
+                    frame = await websocket.receive()
+                if frame["type"] == "websocket.disconnect":
+                    break
+                if warm.wanted:
+                    await warm.release()  # reopened after the re-index switch
+                if time.monotonic() - checked >= config.session_auth_recheck_s:
+                    key_store = websocket.app.state.key_store
+                    if await key_store.validate_key(key_hash) is None:
+                        await websocket.close(
+                            status.WS_1008_POLICY_VIOLATION,
+                            "Invalid or revoked API key.",
+                        )
+                        break
+                    checked = time.monotonic()
+                raw = frame.get("text") or frame.get("bytes") or b""
+                await websocket.send_text(
+                    await _session_message(websocket, warm, raw, bound)
+                )
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await warm.release()
+
+    async def _session_message(
+        websocket: WebSocket, warm: WarmMemory, raw: str | bytes, bound: dict
+    ) -> str:
+        msg_id = kind = None
+        try:
+            msg_id, kind, fields = parse_message(raw)
+            if kind not in session_ops:
+                raise MessageError(
+                    400,
+                    f"Unknown message type {kind!r}. Use: {', '.join(session_ops)}",
+                )
+            for field, value in bound.items():
+                if fields.setdefault(field, value) != value:
+                    raise MessageError(
+                        400, f"This session is bound to {field}={value!r}."
+                    )
+            model, handler = session_ops[kind]
+            try:
+                body = model.model_validate(fields)
+            except ValidationError as exc:
+                raise MessageError(422, jsonable_encoder(exc.errors(include_url=False)))
+            t0 = time.monotonic()
+            with websocket.app.state.tracer.trace(f"WS /v1/session {kind}"):
+                result = await _session_call(websocket, warm, kind, handler, body)
+            result["latency_ms"] = round((time.monotonic() - t0) * 1000, 2)
+            return reply(msg_id, kind, result)
+        except MessageError as exc:
+            return error_reply(msg_id, kind, exc)
+
+    async def _session_call(
+        websocket: WebSocket, warm: WarmMemory, kind: str, handler, body
+    ) -> dict:
+        """One message through admission, as the route it stands in for."""
+        admission: AdmissionController = websocket.app.state.admission
+        release = None
+        if admission.enabled:
+            cls = SESSION_MESSAGES[kind]
+            limiter = admission.limiter(cls)
+            try:
+                with span("admission", route_class=cls):
+                    await limiter.acquire(
+                        websocket.state.auth.workspace_id, admission.timeout
+                    )
+            except OverloadedError as exc:
+                raise MessageError(
+                    503, f"Server overloaded ({cls} {exc}). Retry shortly."
+                )
+            release = limiter.releaser()
+            websocket.state.release_admission = release  # before a long-poll
+        try:
+            return await handler(websocket, body)
+        except HTTPException as exc:
+            raise MessageError(exc.status_code, exc.detail)
+        except Exception:
+            logger.exception("Session %s message failed", kind)
+            await warm.release()  # don't carry a Memory in an unknown state
+            raise MessageError(500, "Internal Server Error")
+        finally:
+            if release is not None:
+                release()
+
+    @app.get("/v1/export", dependencies=[Depends(require_auth)])
+    async def export_memory(
+        request: Request,
+        user_id: str | None = None,
+        agent_id: str | None = None,
+        include_embeddings: bool = False,
+    ):
+        """Stream every row under the scope as NDJSON (constant memory)."""
+        auth = request.state.auth
+        pool: ShardPool = request.app.state.shards
+        shard = await pool.acquire(auth.workspace_id)
+
+        async def _stream():
+            try:
+                async for chunk in export_scope(
+                    str(shard.store_path),
+                    shard.vectors,
+                    namespace_id(auth.workspace_id, user_id, agent_id),
+                    workspace_id=auth.workspace_id,
+                    embed_model=config.embed_model,
+                    include_embeddings=include_embeddings,
+                    page_size=config.transfer_page_size,
+                ):
+                    yield chunk
+            finally:
+                await pool.release(shard)
+
+        return StreamingResponse(
+            _stream(),
+            media_type="application/x-ndjson",
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="{auth.workspace_id}.ndjson"'
+                )
+            },
+        )
+
+    @app.post(
+        "/v1/import",
+        response_model=ImportResponse,
+        dependencies=[Depends(require_auth)],
+    )
+    async def import_memory(request: Request):
+        """Load an NDJSON export into this workspace, batch by batch."""
+        t0 = time.monotonic()
+        auth = request.state.auth
+        pool: ShardPool = request.app.state.shards
+        usage: UsageMeter = request.app.state.usage
+        await _within_quota(request, "embeds_per_minute")
+        try:
+            async with pool.lease(auth.workspace_id) as shard:
+                await _within_quota(request, store=shard.store)
+                counts = await import_stream(
+                    str(shard.store_path),
+                    shard.vectors,
+                    usage.embedder(request.app.state.embedder, auth.workspace_id),
+                    iter_lines(request.stream()),
+                    workspace_id=auth.workspace_id,
+                    embed_model=config.embed_model,
+                    batch_size=config.transfer_page_size,
+                    embedder_for=lambda ns: (
+                        shard.vectors.model_for(ns),
+                        usage.embedder(
+                            embedder_for(shard.vectors.model_for(ns)),
+                            auth.workspace_id,
+                        ),
+                    ),
+                    tokens=request.app.state.tokens,
+                    lock=shard.write_lock,
+                )
+        except (ValueError, KeyError) as e:
+            raise HTTPException(400, f"Invalid import stream: {e}")
+        finally:
+            if request.app.state.working is not None:
+                request.app.state.working.invalidate(namespace_id(auth.workspace_id))
+            request.app.state.dedup.invalidate(namespace_id(auth.workspace_id))
+
+        return ImportResponse(
+            workspace_id=auth.workspace_id,
+            sessions=counts["session"],
+            working=counts["working"],
+            episodic=counts["episodic"],
+            semantic=counts["semantic"],
+            reembedded=counts["reembedded"],
+            latency_ms=round((time.monotonic() - t0) * 1000, 2),
         )
 
     # ── Admin routes ──────────────────────────────────────────────────────────
@@ -387,4 +1193,181 @@ def build_app(config: ServerConfig | None = None) -> FastAPI:
             raise HTTPException(404, f"Key {key_id} not found")
         return {"revoked": True, "key_id": key_id}
 
+    @app.get("/admin/usage", dependencies=[Depends(require_admin)])
+    async def list_usage(request: Request):
+        """Activity since startup of every workspace seen or given a quota."""
+        usage: UsageMeter = request.app.state.usage
+        return {
+            "since": usage.since,
+            "workspaces": {ws: usage.activity(ws) for ws in usage.workspaces},
+        }
+
+    @app.get("/admin/usage/{workspace_id}", dependencies=[Depends(require_admin)])
+    async def get_usage(request: Request, workspace_id: str):
+        """Stored memory, activity and effective quota of one workspace."""
+        usage: UsageMeter = request.app.state.usage
+        pool: ShardPool = request.app.state.shards
+        async with pool.lease(workspace_id) as shard:
+            layers = await shard.store.usage(namespace_id(workspace_id))
+        kind, _ = parse_vectors_url(config.vectors_url)
+        return {
+            "workspace_id": workspace_id,
+            "stored": usage_summary(
+                layers,
+                request.app.state.embedder.dim,
+                config.embedding_dtype if kind == "numpy" else "float32",
+            ),
+            "activity": usage.activity(workspace_id),
+            "since": usage.since,
+            "quota": await usage.quota(workspace_id),
+        }
+
+    @app.get("/admin/quotas", dependencies=[Depends(require_admin)])
+    async def list_quotas(request: Request):
+        return {
+            "defaults": request.app.state.usage.defaults,
+            "quotas": await request.app.state.key_store.list_quotas(),
+        }
+
+    @app.put(
+        "/admin/quotas/{workspace_id}",
+        response_model=WorkspaceQuotaInfo,
+        dependencies=[Depends(require_admin)],
+    )
+    async def set_quota(request: Request, workspace_id: str, body: WorkspaceQuota):
+        info = await request.app.state.key_store.set_quota(workspace_id, body)
+        await request.app.state.usage.reload()
+        return info
+
+    @app.delete("/admin/quotas/{workspace_id}", dependencies=[Depends(require_admin)])
+    async def delete_quota(request: Request, workspace_id: str):
+        ok = await request.app.state.key_store.delete_quota(workspace_id)
+        if not ok:
+            raise HTTPException(404, f"No quota for {workspace_id}")
+        await request.app.state.usage.reload()
+        return {"deleted": True, "workspace_id": workspace_id}
+
+    @app.get("/admin/retention", dependencies=[Depends(require_admin)])
+    async def list_retention(request: Request):
+        policies = await request.app.state.key_store.list_retention_policies()
+        return {
+            "policies": policies,
+            "sweeper": request.app.state.retention.stats,
+        }
+
+    @app.get(
+        "/admin/retention/{workspace_id}",
+        response_model=RetentionPolicyInfo,
+        dependencies=[Depends(require_admin)],
+    )
+    async def get_retention(request: Request, workspace_id: str):
+        info = await request.app.state.key_store.get_retention_policy(workspace_id)
+        if info is None:
+            raise HTTPException(404, f"No retention policy for {workspace_id}")
+        return info
+
+    @app.put(
+        "/admin/retention/{workspace_id}",
+        response_model=RetentionPolicyInfo,
+        dependencies=[Depends(require_admin)],
+    )
+    async def set_retention(request: Request, workspace_id: str, body: RetentionPolicy):
+        return await request.app.state.key_store.set_retention_policy(
+            workspace_id, body
+        )
+
+    @app.delete(
+        "/admin/retention/{workspace_id}", dependencies=[Depends(require_admin)]
+    )
+    async def delete_retention(request: Request, workspace_id: str):
+        ok = await request.app.state.key_store.delete_retention_policy(workspace_id)
+        if not ok:
+            raise HTTPException(404, f"No retention policy for {workspace_id}")
+        return {"deleted": True, "workspace_id": workspace_id}
+
+    @app.post(
+        "/admin/retention/{workspace_id}/sweep",
+        response_model=JobInfo,
+        status_code=202,
+        dependencies=[Depends(require_admin)],
+    )
+    async def sweep_retention(request: Request, workspace_id: str, body: SweepRequest):
+        """Apply the workspace's policy now, as a job; poll /admin/jobs/{job_id}."""
+        info = await request.app.state.key_store.get_retention_policy(workspace_id)
+        if info is None:
+            raise HTTPException(404, f"No retention policy for {workspace_id}")
+        sweeper: RetentionSweeper = request.app.state.retention
+
+        async def _sweep(job: JobInfo):
+            return await sweeper.sweep_workspace(
+                workspace_id, info.policy, dry_run=body.dry_run, counts=job.progress
+            )
+
+        return request.app.state.jobs.submit("retention", workspace_id, _sweep)
+
+    @app.post(
+        "/admin/reindex/{workspace_id}",
+        response_model=JobInfo,
+        status_code=202,
+        dependencies=[Depends(require_admin)],
+    )
+    async def reindex(request: Request, workspace_id: str, body: ReindexRequest):
+        """
+        Re-embed the workspace with another model into a shadow index and
+        switch each namespace over when done. Re-running resumes from the
+        last checkpoint. Poll /admin/jobs/{job_id}.
+        """
+        embed_model = body.embed_model or config.embed_model
+        pool: ShardPool = request.app.state.shards
+        embedder = embedder_for(embed_model)
+
+        async def _reindex(job: JobInfo):
+            async with pool.lease(workspace_id) as shard:
+                return await reindex_scope(
+                    shard.vectors,
+                    str(shard.store_path),
+                    namespace_id(workspace_id),
+                    embed_model,
+                    embedder,
+                    batch_size=config.reindex_batch_size,
+                    pause_ms=config.reindex_batch_pause_ms,
+                    max_rows_per_s=config.reindex_max_rows_per_s,
+                    switch_timeout_s=config.reindex_switch_timeout_s,
+                    counts=job.progress,
+                )
+
+        return request.app.state.jobs.submit("reindex", workspace_id, _reindex)
+
+    @app.post(
+        "/admin/snapshot",
+        response_model=JobInfo,
+        status_code=202,
+        dependencies=[Depends(require_admin)],
+    )
+    async def snapshot(request: Request):
+        """
+        Write a consistent .tar.gz of the key store and every shard to
+        snapshot_dir while traffic continues. Poll /admin/jobs/{job_id}.
+        """
+        pool: ShardPool = request.app.state.shards
+        collection = request.app.state.mem_config.chroma_collection_name
+
+        async def _snapshot(job: JobInfo):
+            return await take_snapshot(
+                config, pool, collection_name=collection, counts=job.progress
+            )
+
+        return request.app.state.jobs.submit("snapshot", None, _snapshot)
+
+    @app.get(
+        "/admin/jobs/{job_id}",
+        response_model=JobInfo,
+        dependencies=[Depends(require_admin)],
+    )
+    async def get_admin_job(request: Request, job_id: str):
+        job = request.app.state.jobs.get(job_id)
+        if job is None:
+            raise HTTPException(404, f"Job {job_id} not found")
+        return job
+
     return app
@@ -0,0 +1,442 @@
+"""
+Vectorized candidate scoring for recall.
+
+plyra-memory's HybridRetrieval scores candidates one at a time: a NumPy
+cosine per pair, a `_utcnow()` per recency score and a RankedMemory per
+candidate, all before sorting. Here candidates are gathered into flat
+columns, scored as array operations against a single `now`, and only the
+top_k chosen by argpartition become RankedMemory objects.
+
+  score = similarity * w_sim + recency * w_rec + importance * w_imp
+  fused = (1 - lexical_weight) * score + lexical_weight * lexical
+
+With mmr_lambda < 1 the survivors are picked by maximal marginal relevance
+instead: each pick maximizes λ·fused − (1−λ)·(max cosine to earlier picks),
+so near-duplicates (the same fact in working, episodic and semantic form)
+stop crowding out everything else.
+
+Workspace-scope recall (collect_scope) gathers candidates from every
+namespace under a prefix with one vector query per layer and index; rank's
+max_per_namespace then keeps any one agent from filling the top_k.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+from .lexical import LexicalHit
+from .tracing import span
+from .transfer import fetch_embeddings
+
+_MMR_POOL_FACTOR = 3  # MMR re-ranks the best top_k * factor by fused score
+
+
+@dataclass
+class Candidates:
+    """Column-oriented recall candidates."""
+
+    layer: list[str] = field(default_factory=list)
+    content: list[str] = field(default_factory=list)
+    source_id: list[str] = field(default_factory=list)
+    created_at: list[datetime] = field(default_factory=list)
+    recency_at: list[float] = field(default_factory=list)  # epoch seconds
+    similarity: list[float] = field(default_factory=list)
+    importance: list[float] = field(default_factory=list)
+    lexical: list[float] = field(default_factory=list)
+    namespace: list[str] = field(default_factory=list)  # workspace scope only
+    index: dict[str, int] = field(default_factory=dict)  # source_id → row
+    embeddings: dict[str, list[float]] = field(default_factory=dict)  # working
+
+    def __len__(self) -> int:
+        return len(self.source_id)
+
+    def add(
+        self,
+        layer: str,
+        source_id: str,
+        content: str,
+        created_at: datetime,
+        recency_at: datetime,
+        similarity: float,
+        importance: float,
+        lexical: float = 0.0,
+        namespace: str = "",
+    ) -> None:
+        self.index.setdefault(source_id, len(self.source_id))
+        self.layer.append(layer)
+        self.source_id.append(source_id)
+        self.content.append(content)
+        self.created_at.append(created_at)
+        self.recency_at.append(recency_at.timestamp())
+        self.similarity.append(similarity)
+        self.importance.append(importance)
+        self.lexical.append(lexical)
+        self.namespace.append(namespace)
+
+    def merge_lexical(self, hits: list[LexicalHit], layers: set[str]) -> None:
+        """Attach BM25 scores; hits the vector side missed enter with sim 0."""
+        for hit in hits:
+            row = self.index.get(hit.id)
+            if row is not None:
+                self.lexical[row] = hit.score
+            elif hit.layer in layers:
+                self.add(
+                    hit.layer,
+                    hit.id,
+                    hit.content,
+                    hit.created_at,
+                    hit.recency_at,
+                    0.0,
+                    hit.importance,
+                    hit.score,
+                    hit.namespace,
+                )
+
+
+async def collect(
+    memory: Any, query_embedding: list[float], layers: list[str], per_layer: int
+) -> Candidates:
+    """Vector candidates from each layer, hydrated with one query per layer."""
+    store, vectors = memory._store, memory._vectors
+    agent_id, session_id = memory._agent_id, memory._session_id
+    found = Candidates()
+
+    if "working" in layers:
+        with span("store.hydrate", layer="working") as s:
+            entries = (await memory.working.get(session_id)).entries
+            s.set(rows=len(entries))
+        if entries:
+            embedded = await memory._embedder.embed_batch([e.content for e in entries])
+            sims = cosine(np.asarray(embedded, dtype=np.float32), query_embedding)
+            for entry, emb, sim in zip(entries, embedded, sims.tolist()):
+                found.embeddings[entry.id] = emb
+                found.add(
+                    "working",
+                    entry.id,
+                    entry.content,
+                    entry.created_at,
+                    entry.created_at,
+                    sim,
+                    entry.importance,
+                )
+
+    if "episodic" in layers:
+        with span("vectors.query", layer="episodic") as s:
+            hits = await vectors.query(
+                query_embedding, per_layer * 3, {"layer": "episodic"}
+            )
+            s.set(hits=len(hits))
+        with span("store.hydrate", layer="episodic") as s:
+            episodes = await _hydrate(store, "episode", [h["id"] for h in hits])
+            s.set(rows=len(episodes))
+        touched = []
+        for h in hits:
+            ep = episodes.get(h["id"])
+            if ep is None or ep.agent_id != agent_id or ep.session_id != session_id:
+                continue
+            found.add(
+                "episodic",
+                ep.id,
+                ep.content,
+                ep.created_at,
+                ep.created_at,
+                h["score"],
+                ep.importance,
+            )
+            touched.append(ep.id)
+            if len(touched) == per_layer:
+                break
+        await touch(store, "episode", touched)
+
+    if "semantic" in layers:
+        with span("vectors.query", layer="semantic") as s:
+            hits = await vectors.query(
+                query_embedding, per_layer * 2, {"layer": "semantic"}
+            )
+            s.set(hits=len(hits))
+        with span("store.hydrate", layer="semantic") as s:
+            facts = await _hydrate(store, "fact", [h["id"] for h in hits])
+            s.set(rows=len(facts))
+        touched = []
+        for h in hits:
+            fact = facts.get(h["id"])
+            if fact is None or fact.agent_id != agent_id or fact.is_expired:
+                continue
+            found.add(
+                "semantic",
+                fact.id,
+                fact.content,
+                fact.created_at,
+                fact.last_accessed,
+                h["score"],
+                fact.importance,
+            )
+            touched.append(fact.id)
+            if len(touched) == per_layer:
+                break
+        await touch(store, "fact", touched)
+
+    return found
+
+
+@dataclass
+class ScopeIndex:
+    """Namespaces under a recall prefix whose vectors share one index."""
+
+    vectors: Any
+    embedder: Any
+    namespaces: list[str]
+
+
+async def collect_scope(
+    store: Any,
+    indexes: list[ScopeIndex],
+    query_embeddings: list[list[float]],
+    layers: list[str],
+    per_layer: int,
+) -> Candidates:
+    """
+    Vector candidates from every namespace in `indexes` (query_embeddings[i]
+    is the query embedded for indexes[i]), one query per layer and index.
+    Working memory is session-local and not searched.
+    """
+    from .namespace import session_id_for
+    from .vectors import NAMESPACE_KEY
+
+    found = Candidates()
+    wanted = {ns for index in indexes for ns in index.namespaces}
+    for layer, kind, factor in (("episodic", "episode", 3), ("semantic", "fact", 2)):
+        if layer not in layers:
+            continue
+        hits: list[dict] = []
+        with span("vectors.query", layer=layer, indexes=len(indexes)) as s:
+            for index, embedding in zip(indexes, query_embeddings):
+                where = {
+                    "$and": [
+                        {"layer": layer},
+                        {NAMESPACE_KEY: {"$in": index.namespaces}},
+                    ]
+                }
+                hits.extend(
+                    await index.vectors.query(embedding, per_layer * factor, where)
+                )
+            hits.sort(key=lambda h: h["score"], reverse=True)
+            s.set(hits=len(hits))
+        with span("store.hydrate", layer=layer) as s:
+            rows = await _hydrate(store, kind, [h["id"] for h in hits])
+            s.set(rows=len(rows))
+        touched = []
+        for h in hits:
+            row = rows.get(h["id"])
+            if row is None or row.agent_id not in wanted:
+                continue
+            if kind == "episode":
+                if row.session_id != session_id_for(row.agent_id):
+                    continue
+                recency_at = row.created_at
+            else:
+                if row.is_expired:
+                    continue
+                recency_at = row.last_accessed
+            found.add(
+                layer,
+                row.id,
+                row.content,
+                row.created_at,
+                recency_at,
+                h["score"],
+                row.importance,
+                namespace=row.agent_id,
+            )
+            touched.append(row.id)
+            if len(touched) == per_layer:
+                break
+        await touch(store, kind, touched)
+
+    return found
+
+
+async def rank(
+    found: Candidates,
+    top_k: int,
+    *,
+    weights: tuple[float, float, float],
+    decay_lambda: float,
+    lexical_weight: float = 0.0,
+    with_lexical: bool = False,
+    min_score: float = 0.0,
+    mmr_lambda: float = 1.0,
+    vectors: Any = None,
+    query_embedding: list[float] | None = None,
+    max_per_namespace: int | None = None,
+) -> tuple[list[Any], int]:
+    """
+    The top_k candidates as RankedMemory, best first, and how many candidates
+    scored at least min_score. Candidates whose fused score is below
+    min_score are left out, as in plyra-memory's retrieval. With
+    max_per_namespace, at most that many from any one namespace (by fused
+    score).
+    """
+    from plyra_memory.schema import MemoryLayer, RankedMemory, _new_id
+
+    if not found:
+        return [], 0
+    with span("score", candidates=len(found), mmr=mmr_lambda < 1.0):
+        sim_w, rec_w, imp_w = weights
+        sim = np.asarray(found.similarity, dtype=np.float64)
+        imp = np.asarray(found.importance, dtype=np.float64)
+        lex = np.asarray(found.lexical, dtype=np.float64)
+        hours = (time.time() - np.asarray(found.recency_at)) / 3600.0
+        rec = np.exp(-decay_lambda * hours)
+        base = np.minimum(sim * sim_w + rec * rec_w + imp * imp_w, 1.0)
+        score = (1.0 - lexical_weight) * base + lexical_weight * lex
+        eligible = score
+        passed = len(found)
+        if min_score > 0:
+            eligible = np.where(score >= min_score, score, -np.inf)
+            passed = int(np.isfinite(eligible).sum())
+        if top_k <= 0:
+            return [], passed
+        if max_per_namespace is not None:
+            eligible = _cap_groups(eligible, found.namespace, max_per_namespace)
+        if eligible is not score:
+            top_k = min(top_k, int(np.isfinite(eligible).sum()))
+
+        if mmr_lambda < 1.0 and len(found) > 1:
+            order = await _mmr(
+                found, eligible, top_k, mmr_lambda, vectors, query_embedding
+            )
+        else:
+            order = top_indices(eligible, top_k)
+
+        results = [
+            RankedMemory(
+                id=_new_id(),
+                layer=MemoryLayer(found.layer[i]),
+                content=found.content[i],
+                score=round(float(np.clip(score[i], 0.0, 1.0)), 4),
+                similarity=round(float(np.clip(sim[i], 0.0, 1.0)), 4),
+                recency=round(float(np.clip(rec[i], 0.0, 1.0)), 4),
+                importance=found.importance[i],
+                created_at=found.created_at[i],
+                source_id=found.source_id[i],
+                metadata=_metadata(found, i, lex, with_lexical),
+            )
+            for i in order
+        ]
+        return results, passed
+
+
+def _metadata(
+    found: Candidates, i: int, lex: np.ndarray, with_lexical: bool
+) -> dict[str, Any]:
+    metadata: dict[str, Any] = {}
+    if with_lexical:
+        metadata["lexical"] = round(float(lex[i]), 4)
+    if found.namespace[i]:
+        metadata["namespace"] = found.namespace[i]
+    return metadata
+
+
+def _cap_groups(score: np.ndarray, groups: list[str], cap: int) -> np.ndarray:
+    """`score` with everything past the best `cap` of each group set to -inf."""
+    capped = score.copy()
+    taken: dict[str, int] = {}
+    for i in np.argsort(-score, kind="stable").tolist():
+        n = taken.get(groups[i], 0)
+        if n >= cap:
+            capped[i] = -np.inf
+        else:
+            taken[groups[i]] = n + 1
+    return capped
+
+
+def top_indices(score: np.ndarray, k: int) -> list[int]:
+    """Indices of the k largest scores, best first (argpartition + small sort)."""
+    k = min(k, score.size)
+    if k == 0:
+        return []
+    part = np.argpartition(-score, k - 1)[:k]
+    return part[np.argsort(-score[part], kind="stable")].tolist()
+
+
+def cosine(matrix: np.ndarray, vector: list[float] | np.ndarray) -> np.ndarray:
+    q = np.asarray(vector, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(q)
+    return np.divide(matrix @ q, norms, out=np.zeros(len(matrix)), where=norms > 0)
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+
+async def _hydrate(store: Any, kind: str, ids: list[str]) -> dict[str, Any]:
+    if not ids:
+        return {}
+    bulk = getattr(store, f"get_{kind}s_by_ids", None)
+    if bulk is not None:
+        return await bulk(ids)
+    get_one = getattr(store, f"get_{kind}")
+    rows = await asyncio.gather(*(get_one(i) for i in ids))
+    return {r.id: r for r in rows if r is not None}
+
+
+async def touch(store: Any, kind: str, ids: list[str]) -> None:
+    if not ids:
+        return
+    if kind == "episode":
+        bulk, one = "increment_episode_access_many", "increment_episode_access"
+    else:
+        bulk, one = "update_fact_access_many", "update_fact_access"
+    if hasattr(store, bulk):
+        await getattr(store, bulk)(ids)
+    else:
+        for i in ids:
+            await getattr(store, one)(i)
+
+
+async def _mmr(
+    found: Candidates,
+    score: np.ndarray,
+    top_k: int,
+    mmr_lambda: float,
+    vectors: Any,
+    query_embedding: list[float] | None,
+) -> list[int]:
+    pool = top_indices(score, top_k * _MMR_POOL_FACTOR)
+    pool = [i for i in pool if np.isfinite(score[i])]  # capped out
+    ids = [found.source_id[i] for i in pool]
+    stored = dict(found.embeddings)
+    if vectors is not None:
+        stored.update(
+            await fetch_embeddings(vectors, [i for i in ids if i not in stored])
+        )
+    dim = len(query_embedding) if query_embedding else 0
+    if not stored or not dim:
+        return pool[:top_k]
+    emb = np.zeros((len(pool), dim), dtype=np.float32)
+    for row, vid in enumerate(ids):
+        if vid in stored:
+            emb[row] = stored[vid]
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    emb = np.divide(emb, norms, out=np.zeros_like(emb), where=norms > 0)
+    sims = emb @ emb.T  # candidates without a vector have 0 similarity
+
+    rel = score[pool]
+    chosen: list[int] = []
+    penalty = np.zeros(len(pool))
+    available = np.ones(len(pool), dtype=bool)
+    for _ in range(min(top_k, len(pool))):
+        mmr = np.where(
+            available, mmr_lambda * rel - (1 - mmr_lambda) * penalty, -np.inf
+        )
+        pick = int(np.argmax(mmr))
+        chosen.append(pick)
+        available[pick] = False
+        penalty = np.maximum(penalty, sims[pick])
+    return [pool[i] for i in chosen]
@@ -0,0 +1,117 @@
+"""
+WebSocket session channel (/v1/session).
+
+A chat agent remembers and asks for context on every turn. Over HTTP each
+of those is a request of its own: auth, namespace resolution, a shard lease,
+a vector index binding and a Memory to set up and tear down. A session does
+that once. The connection authenticates at the handshake, is bound to one
+workspace / user / agent namespace, and then carries JSON messages:
+
+  → {"id": "1", "type": "remember", "content": "..."}
+  ← {"id": "1", "type": "remember", "ok": true, "result": {...}}
+  ← {"id": "2", "type": "context", "ok": false,
+     "error": {"status": 422, "detail": ...}}
+
+The bodies are those of /v1/remember, /v1/context and /v1/recall, and so are
+the results. Messages are handled one at a time, in the order they arrive;
+clients may send the next one before the reply to the last, and match
+replies by id.
+
+The namespace's Memory (WarmMemory) stays open between messages. It is let
+go when the connection has been quiet for session_idle_release_s, or when a
+re-index is waiting to switch the namespace to another index, and reopened
+by the next message.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import orjson
+
+from .admission import RouteClass
+from .responses import encode
+
+# message type → admission class of the route it stands in for
+SESSION_MESSAGES: dict[str, RouteClass] = {
+    "remember": "write",
+    "context": "read",
+    "recall": "read",
+}
+
+
+class MessageError(Exception):
+    """A message that gets an error reply instead of a result."""
+
+    def __init__(self, status: int, detail: Any) -> None:
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def parse_message(raw: str | bytes) -> tuple[Any, str, dict]:
+    """(id, type, body) of a message; MessageError if it isn't JSON."""
+    try:
+        message = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        message = None
+    if not isinstance(message, dict):
+        raise MessageError(400, "Messages are JSON objects.")
+    return message.pop("id", None), message.pop("type", None), message
+
+
+def reply(msg_id: Any, kind: str | None, result: dict) -> str:
+    return encode({"id": msg_id, "type": kind, "ok": True, "result": result}).decode()
+
+
+def error_reply(msg_id: Any, kind: str | None, exc: MessageError) -> str:
+    return encode(
+        {
+            "id": msg_id,
+            "type": kind,
+            "ok": False,
+            "error": {"status": exc.status, "detail": exc.detail},
+        }
+    ).decode()
+
+
+class WarmMemory:
+    """
+    A namespace's Memory kept open across the messages of one session.
+
+    `open` returns (memory, shard) with the shard leased and the namespace
+    bound to its vector index; `close` gives both back.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        open: Callable[[], Awaitable[tuple[Any, Any]]],
+        close: Callable[[Any, Any], Awaitable[None]],
+    ) -> None:
+        self.namespace = namespace
+        self._open = open
+        self._close = close
+        self._memory: Any = None
+        self._shard: Any = None
+        self.opened = 0
+
+    async def get(self) -> tuple[Any, Any]:
+        """(memory, shard), opening them if the session holds none."""
+        if self._memory is None:
+            self._memory, self._shard = await self._open()
+            self.opened += 1
+        return self._memory, self._shard
+
+    @property
+    def wanted(self) -> bool:
+        """Whether a re-index is waiting for this session to let go."""
+        return self._shard is not None and self._shard.vectors.wanted(self.namespace)
+
+    async def release(self) -> None:
+        if self._memory is None:
+            return
+        memory, shard = self._memory, self._shard
+        self._memory = self._shard = None
+        await self._close(memory, shard)
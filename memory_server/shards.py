@@ -0,0 +1,255 @@
+"""
+Shard pool — where each workspace's memory lives.
+
+shard_mode = "none"       everyone shares store_url / vectors_url (default)
+shard_mode = "workspace"  one SQLite file + vector dir per workspace
+shard_mode = "hash"       workspaces hashed into shard_buckets files
+
+Splitting the SQLite file splits the WAL writer lock, so /v1/remember
+throughput grows with the number of active tenants instead of being capped
+by one file. Open shards are kept in a bounded LRU pool; idle shards beyond
+max_open_shards are closed. Writes to one shard are serialized through its
+write_lock so they never contend on the WAL lock within a process.
+
+Memory instances borrow a shard's store and vectors through a Borrowed
+proxy, so Memory.close() leaves the pooled connections open. Vector queries
+made through a Scoped proxy are restricted to the caller's namespace, which
+lets backends that partition by namespace (NumpyVectors) touch only it.
+A shard's vectors are a VectorIndexes: one index per embedding model.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .config import ServerConfig
+from .vectors import NAMESPACE_KEY, parse_vectors_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD = "default"
+
+
+class Borrowed:
+    """Forwards everything to a pooled backend except initialize/close."""
+
+    def __init__(self, target: Any):
+        self._target = target
+
+    async def initialize(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+
+class Scoped(Borrowed):
+    """Borrowed vectors whose queries only see one namespace."""
+
+    def __init__(self, target: Any, namespace: str):
+        super().__init__(target)
+        self._namespace = namespace
+
+    async def query(
+        self, embedding: list[float], top_k: int, filters: dict | None = None
+    ) -> list[dict]:
+        scope = {NAMESPACE_KEY: self._namespace}
+        where = {"$and": [filters, scope]} if filters else scope
+        return await self._target.query(embedding, top_k, where)
+
+
+@dataclass
+class Shard:
+    key: str
+    store_path: Path
+    vectors_path: Path
+    store: Any
+    vectors: Any
+    write_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    active: int = 0  # leases currently held
+
+    async def close(self) -> None:
+        await self.store.close()
+        await self.vectors.close()
+
+
+class ShardPool:
+    def __init__(self, config: ServerConfig, mem_config: Any, tokens: Any = None):
+        self._config = config
+        self._mem_config = mem_config
+        self._tokens = tokens  # TokenCounter for the stores' memory_tokens
+        self._open: OrderedDict[str, Shard] = OrderedDict()
+        self._lock = asyncio.Lock()
+        # Shards being opened, set once they are in _open (or failed to open)
+        self._opening: dict[str, asyncio.Event] = {}
+        self._pending: set[asyncio.Task] = set()
+
+    # ── Routing ───────────────────────────────────────────────────────────────
+
+    def shard_key(self, workspace_id: str) -> str:
+        mode = self._config.shard_mode
+        if mode == "none":
+            return DEFAULT_SHARD
+        digest = hashlib.sha1(workspace_id.encode()).hexdigest()
+        if mode == "hash":
+            return f"bucket-{int(digest, 16) % self._config.shard_buckets:04d}"
+        # Readable but collision-free: "acme/eu" and "acme_eu" differ by hash
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", workspace_id)[:48]
+        return f"ws-{safe}-{digest[:8]}"
+
+    def paths(self, key: str) -> tuple[Path, Path]:
+        """(SQLite file, vector dir) for a shard key."""
+        if key == DEFAULT_SHARD:
+            return (
+                Path(self._config.store_url).expanduser(),
+                Path(parse_vectors_url(self._config.vectors_url)[1]).expanduser(),
+            )
+        root = Path(self._config.shard_dir).expanduser() / key
+        return root / "memory.db", root / "memory.index"
+
+    # ── Leasing ───────────────────────────────────────────────────────────────
+
+    @asynccontextmanager
+    async def lease(self, workspace_id: str) -> AsyncIterator[Shard]:
+        async with self.lease_key(self.shard_key(workspace_id)) as shard:
+            yield shard
+
+    @asynccontextmanager
+    async def lease_key(self, key: str) -> AsyncIterator[Shard]:
+        shard = await self.acquire_key(key)
+        try:
+            yield shard
+        finally:
+            await self.release(shard)
+
+    async def acquire(self, workspace_id: str) -> Shard:
+        return await self.acquire_key(self.shard_key(workspace_id))
+
+    async def acquire_key(self, key: str) -> Shard:
+        """
+        Lease the shard for `key`, opening it if needed. Opening happens
+        outside the pool lock, so one slow shard doesn't hold up the others;
+        concurrent callers for the same key wait for the one opening it.
+        """
+        while True:
+            async with self._lock:
+                shard = self._open.get(key)
+                if shard is not None:
+                    self._open.move_to_end(key)
+                    shard.active += 1
+                    return shard
+                opening = self._opening.get(key)
+                if opening is None:
+                    opening = self._opening[key] = asyncio.Event()
+                    break
+            # Then look again: it may have failed to open, or been evicted
+            await opening.wait()
+
+        try:
+            shard = await self._open_shard(key)
+            async with self._lock:
+                self._open[key] = shard
+                shard.active += 1
+            return shard
+        finally:
+            del self._opening[key]
+            opening.set()
+
+    async def release(self, shard: Shard) -> None:
+        shard.active -= 1
+        await self._evict()
+
+    def release_after(self, shard: Shard, tasks: set[asyncio.Task]) -> None:
+        """Hold the lease until background tasks using the shard finish."""
+
+        async def _wait():
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.release(shard)
+
+        task = asyncio.create_task(_wait())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _open_shard(self, key: str) -> Shard:
+        from .reindex import VectorIndexes
+        from .storage.pooled import PooledSQLiteStore
+
+        store_path, vectors_path = self.paths(key)
+        store = PooledSQLiteStore(
+            str(store_path),
+            self._mem_config,
+            read_pool_size=self._config.store_read_pool_size,
+            commit_interval_ms=self._config.store_commit_interval_ms,
+            commit_max_batch=self._config.store_commit_max_batch,
+            synchronous=self._config.store_synchronous,
+            lexical_index=self._config.lexical_enabled,
+            token_counter=self._tokens,
+        )
+        await store.initialize()
+        # One index per embedding model, routed by namespace (see reindex.py)
+        vectors = VectorIndexes(
+            store_path, vectors_path, self._config.embed_model, self._make_vectors
+        )
+        await vectors.initialize()
+        logger.debug("Opened shard %s (%s)", key, store_path)
+        return Shard(key, store_path, vectors_path, store, vectors)
+
+    def _make_vectors(self, path: Path) -> Any:
+        kind, _ = parse_vectors_url(self._config.vectors_url)
+        if kind == "numpy":
+            from .vectors.memmap import NumpyVectors
+
+            return NumpyVectors(str(path), dtype=self._config.embedding_dtype)
+        from plyra_memory.vectors.chroma import ChromaVectors
+
+        return ChromaVectors(
+            str(path), collection_name=self._mem_config.chroma_collection_name
+        )
+
+    async def _evict(self) -> None:
+        victims: list[Shard] = []
+        async with self._lock:
+            excess = len(self._open) - max(1, self._config.max_open_shards)
+            for key in list(self._open):  # oldest first
+                if excess <= 0:
+                    break
+                if self._open[key].active == 0:
+                    victims.append(self._open.pop(key))
+                    excess -= 1
+        for shard in victims:
+            logger.debug("Closing idle shard %s", shard.key)
+            await shard.close()
+
+    # ── Introspection / lifecycle ─────────────────────────────────────────────
+
+    @property
+    def open_shards(self) -> list[str]:
+        return list(self._open)
+
+    def keys_on_disk(self) -> list[str]:
+        """Every shard with a memory DB, open or not."""
+        keys = [DEFAULT_SHARD] if self.paths(DEFAULT_SHARD)[0].exists() else []
+        root = Path(self._config.shard_dir).expanduser()
+        if root.is_dir():
+            keys += sorted(d.name for d in root.iterdir() if (d / "memory.db").exists())
+        return keys
+
+    async def close(self) -> None:
+        await asyncio.gather(*self._pending, return_exceptions=True)
+        async with self._lock:
+            shards = list(self._open.values())
+            self._open.clear()
+        for shard in shards:
+            await shard.close()
@@ -0,0 +1,376 @@
+"""
+Online snapshots: the key store plus every shard's memory DB and vector
+indexes, in one .tar.gz, taken while the server keeps serving.
+
+  SQLite  each DB is pinned with a read transaction on a connection of its
+          own and copied with the backup API in a worker thread,
+          snapshot_pages_per_step pages per step with snapshot_step_pause_ms
+          between steps. In WAL mode writers carry on meanwhile; the copy is
+          the DB as of the pin and the backup never restarts.
+  NumPy   the index's sidecar DB is pinned the same way, and each segment
+          file is copied up to the rows the pinned sidecar knows of.
+          Segment files are append-only and compaction is held off until
+          the copy is done (NumpyVectors.pin / unpin).
+  Chroma  exported page by page to vectors.jsonl and rebuilt on restore —
+          its files can't be copied consistently while it writes, so a
+          vector deleted during the export may be missing from it.
+
+A shard's memory DB and NumPy indexes are pinned together under its
+write_lock. /v1/remember, import batches and erasure / retention batches
+write rows and vectors under that lock, so none of them is caught halfway.
+Background fact extraction, consolidation and re-indexing don't take it:
+a snapshot may hold a new fact or summary row without its vector (kept
+in SQL, but only lexical search can find it), or a vector whose row
+consolidation has since removed (skipped when recall hydrates hits).
+A re-index checkpoint is only written after its vectors, so a restored
+re-index resumes where the snapshot left it.
+Pinning takes a few milliseconds; nothing waits on the copy itself.
+
+restore_snapshot() unpacks an archive into a fresh data directory and
+points each shard at the restored indexes. `plyra-restore ARCHIVE DIR` runs
+it and prints the PLYRA_* settings for a server on that directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import shutil
+import sqlite3
+import tarfile
+import time
+from contextlib import closing
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from .config import ServerConfig
+from .reindex import index_path
+from .shards import DEFAULT_SHARD, Shard, ShardPool
+from .transfer import upsert_vectors
+from .vectors import NUMPY_SCHEME, parse_vectors_url
+
+logger = logging.getLogger(__name__)
+
+FORMAT = 1
+_COPY_CHUNK = 1 << 20  # bytes per file-copy step
+_EXPORT_PAGE = 1000  # Chroma vectors per page
+_VECTORS_FILE = "vectors.jsonl"
+
+
+def pin_db(path: Path) -> sqlite3.Connection:
+    """A connection holding a read transaction: the DB as of now."""
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.execute("BEGIN")
+    conn.execute("SELECT count(*) FROM sqlite_master").fetchone()
+    return conn
+
+
+def backup_db(
+    conn: sqlite3.Connection, dest: Path, *, pages: int, pause_s: float
+) -> None:
+    """Copy a pinned DB to `dest`, a step of `pages` at a time (blocking)."""
+
+    def _pause(status: int, remaining: int, total: int) -> None:
+        if pause_s and remaining:
+            time.sleep(pause_s)
+
+    with closing(sqlite3.connect(dest)) as target:
+        conn.backup(target, pages=max(1, pages), progress=_pause)
+
+
+def copy_prefix(src: Path, dest: Path, size: int, *, pause_s: float) -> None:
+    """Copy the first `size` bytes of `src` (blocking)."""
+    with open(src, "rb") as fin, open(dest, "wb") as fout:
+        left = size
+        while left > 0:
+            chunk = fin.read(min(_COPY_CHUNK, left))
+            if not chunk:
+                raise RuntimeError(f"{src} is shorter than its index records")
+            fout.write(chunk)
+            left -= len(chunk)
+            if pause_s and left:
+                time.sleep(pause_s)
+
+
+# ── Snapshot ──────────────────────────────────────────────────────────────────
+
+
+async def take_snapshot(
+    config: ServerConfig,
+    pool: ShardPool,
+    *,
+    collection_name: str,
+    counts: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Write a snapshot archive to snapshot_dir; returns its path and size."""
+    counts = counts if counts is not None else {}
+    counts.update(shards=0, vectors_exported=0)
+    root = Path(config.snapshot_dir).expanduser()
+    name = "snapshot-" + datetime.now(UTC).strftime("%Y%m%dT%H%M%S%fZ")
+    staging = root / f".{name}"
+    staging.mkdir(parents=True)
+    pages = config.snapshot_pages_per_step
+    pause_s = config.snapshot_step_pause_ms / 1000
+    manifest: dict[str, Any] = {
+        "format": FORMAT,
+        "created_at": datetime.now(UTC).isoformat(),
+        "vectors": parse_vectors_url(config.vectors_url)[0],
+        "collection": collection_name,
+        "shard_mode": config.shard_mode,
+        "keys": None,
+        "shards": [],
+    }
+    archive = root / f"{name}.tar.gz"
+    try:
+        keys_db = Path(config.key_store_url).expanduser()
+        if keys_db.exists():
+            await asyncio.to_thread(
+                _backup_pinned, keys_db, staging / "keys.db", pages, pause_s
+            )
+            manifest["keys"] = "keys.db"
+        for key in pool.keys_on_disk():
+            async with pool.lease_key(key) as shard:
+                entry = await _snapshot_shard(
+                    shard, staging, pages=pages, pause_s=pause_s, counts=counts
+                )
+            manifest["shards"].append(entry)
+            counts["shards"] += 1
+        (staging / "manifest.json").write_text(json.dumps(manifest, indent=2))
+        await asyncio.to_thread(_pack, staging, archive)
+    finally:
+        await asyncio.to_thread(shutil.rmtree, staging, True)
+    counts.update(path=str(archive), bytes=archive.stat().st_size)
+    logger.info("Snapshot written to %s", archive)
+    return counts
+
+
+async def _snapshot_shard(
+    shard: Shard,
+    staging: Path,
+    *,
+    pages: int,
+    pause_s: float,
+    counts: dict[str, Any],
+) -> dict[str, Any]:
+    prefix = f"shards/{shard.key}"
+    dest = staging / prefix
+    dest.mkdir(parents=True)
+    indexes = shard.vectors.indexes()
+    async with shard.write_lock:
+        db, pinned = await asyncio.to_thread(_pin_shard, shard.store_path, indexes)
+    entry: dict[str, Any] = {
+        "key": shard.key,
+        "store": f"{prefix}/memory.db",
+        "indexes": [],
+    }
+    try:
+        await asyncio.to_thread(
+            backup_db, db, dest / "memory.db", pages=pages, pause_s=pause_s
+        )
+        for n, (model, (backend, path)) in enumerate(indexes.items()):
+            target = dest / f"index-{n}"
+            target.mkdir()
+            if model in pinned:
+                conn, segments = pinned[model]
+                await asyncio.to_thread(
+                    _copy_index, backend.path, conn, segments, target, pages, pause_s
+                )
+                kind = "numpy"
+            else:
+                counts["vectors_exported"] += await _export_vectors(
+                    backend, target / _VECTORS_FILE, pause_s
+                )
+                kind = "chroma"
+            entry["indexes"].append(
+                {
+                    "model": model,
+                    "kind": kind,
+                    "base": path == shard.vectors_path,
+                    "archive": f"{prefix}/index-{n}",
+                }
+            )
+    finally:
+        db.close()
+        for model, (conn, _) in pinned.items():
+            indexes[model][0].unpin(conn)
+    return entry
+
+
+def _pin_shard(
+    store_path: Path, indexes: dict[str, tuple[Any, Path]]
+) -> tuple[sqlite3.Connection, dict[str, Any]]:
+    db = pin_db(store_path)
+    pinned: dict[str, Any] = {}
+    try:
+        for model, (backend, _) in indexes.items():
+            if hasattr(backend, "pin"):  # NumpyVectors
+                pinned[model] = backend.pin()
+    except BaseException:
+        db.close()
+        for model, (conn, _) in pinned.items():
+            indexes[model][0].unpin(conn)
+        raise
+    return db, pinned
+
+
+def _backup_pinned(src: Path, dest: Path, pages: int, pause_s: float) -> None:
+    with closing(pin_db(src)) as conn:
+        backup_db(conn, dest, pages=pages, pause_s=pause_s)
+
+
+def _copy_index(
+    path: Path,
+    conn: sqlite3.Connection,
+    segments: list[tuple[str, int]],
+    dest: Path,
+    pages: int,
+    pause_s: float,
+) -> None:
+    for file, size in segments:
+        copy_prefix(path / file, dest / file, size, pause_s=pause_s)
+    backup_db(conn, dest / "index.db", pages=pages, pause_s=pause_s)
+
+
+async def _export_vectors(backend: Any, dest: Path, pause_s: float) -> int:
+    collection = backend._collection  # ChromaVectors
+    offset = 0
+    with open(dest, "w") as out:
+        while True:
+            n = await asyncio.to_thread(_export_page, collection, out, offset)
+            if n == 0:
+                return offset
+            offset += n
+            await asyncio.sleep(pause_s)
+
+
+def _export_page(collection: Any, out: Any, offset: int) -> int:
+    got = collection.get(
+        include=["embeddings", "metadatas"], limit=_EXPORT_PAGE, offset=offset
+    )
+    for vid, emb, meta in zip(got["ids"], got["embeddings"], got["metadatas"]):
+        record = {"id": vid, "embedding": [float(x) for x in emb], "metadata": meta}
+        out.write(json.dumps(record) + "\n")
+    return len(got["ids"])
+
+
+def _pack(staging: Path, archive: Path) -> None:
+    part = archive.with_name(archive.name + ".part")
+    with tarfile.open(part, "w:gz", compresslevel=6) as tar:
+        for child in sorted(staging.iterdir()):
+            tar.add(child, arcname=child.name)
+    part.rename(archive)
+
+
+# ── Restore ───────────────────────────────────────────────────────────────────
+
+
+async def restore_snapshot(archive: Path, data_dir: Path) -> dict[str, str]:
+    """
+    Unpack `archive` into `data_dir`, which must be empty or missing.
+    Returns the PLYRA_* settings that point a server at the restored data.
+    """
+    if data_dir.exists() and any(data_dir.iterdir()):
+        raise ValueError(f"{data_dir} is not empty")
+    unpacked = data_dir / ".snapshot"
+    unpacked.mkdir(parents=True)
+    await asyncio.to_thread(_unpack, archive, unpacked)
+    manifest = json.loads((unpacked / "manifest.json").read_text())
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format')}")
+
+    shard_dir = data_dir / "shards"
+    for shard in manifest["shards"]:
+        if shard["key"] == DEFAULT_SHARD:
+            store, base = data_dir / "memory.db", data_dir / "memory.vectors"
+        else:
+            store = shard_dir / shard["key"] / "memory.db"
+            base = store.with_name("memory.index")
+        store.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(unpacked / shard["store"], store)
+        paths: dict[str, str] = {}
+        for index in shard["indexes"]:
+            path = base if index["base"] else index_path(base, index["model"])
+            source = unpacked / index["archive"]
+            if index["kind"] == "numpy":
+                shutil.move(source, path)
+            else:
+                await _import_vectors(
+                    source / _VECTORS_FILE, path, manifest["collection"]
+                )
+            paths[index["model"]] = str(path)
+        _relink_indexes(store, paths)
+
+    if manifest["keys"]:
+        shutil.move(unpacked / manifest["keys"], data_dir / "keys.db")
+    shutil.rmtree(unpacked)
+    scheme = NUMPY_SCHEME if manifest["vectors"] == "numpy" else ""
+    return {
+        "PLYRA_STORE_URL": str(data_dir / "memory.db"),
+        "PLYRA_VECTORS_URL": scheme + str(data_dir / "memory.vectors"),
+        "PLYRA_KEY_STORE_URL": str(data_dir / "keys.db"),
+        "PLYRA_SHARD_MODE": manifest["shard_mode"],
+        "PLYRA_SHARD_DIR": str(shard_dir),
+    }
+
+
+def _unpack(archive: Path, dest: Path) -> None:
+    with tarfile.open(archive, "r:gz") as tar:
+        tar.extractall(dest, filter="data")
+
+
+def _relink_indexes(store: Path, paths: dict[str, str]) -> None:
+    """
+    Point vector_indexes at the restored paths. Shadow indexes that weren't
+    open at snapshot time weren't captured; forget them and their re-index
+    checkpoints so a later re-index starts that model from scratch.
+    """
+    marks = ",".join("?" for _ in paths)
+    with closing(sqlite3.connect(store)) as conn, conn:
+        conn.executemany(
+            "UPDATE vector_indexes SET path = ? WHERE embed_model = ?",
+            [(path, model) for model, path in paths.items()],
+        )
+        for table in ("vector_indexes", "reindex_checkpoints"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE embed_model NOT IN ({marks})",  # noqa: S608
+                list(paths),
+            )
+
+
+async def _import_vectors(source: Path, path: Path, collection_name: str) -> None:
+    from plyra_memory.vectors.chroma import ChromaVectors
+
+    vectors = ChromaVectors(str(path), collection_name=collection_name)
+    await vectors.initialize()
+    batch: list[tuple[str, list[float], dict[str, Any]]] = []
+    with open(source) as lines:
+        for line in lines:
+            record = json.loads(line)
+            batch.append((record["id"], record["embedding"], record["metadata"]))
+            if len(batch) == _EXPORT_PAGE:
+                await upsert_vectors(vectors, batch)
+                batch = []
+    await upsert_vectors(vectors, batch)
+    await vectors.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="plyra-restore",
+        description="Restore a plyra-memory-server snapshot into a fresh directory.",
+    )
+    parser.add_argument("archive", type=Path, help="snapshot-*.tar.gz")
+    parser.add_argument("data_dir", type=Path, help="empty or missing directory")
+    args = parser.parse_args()
+    settings = asyncio.run(
+        restore_snapshot(args.archive.expanduser(), args.data_dir.expanduser())
+    )
+    for key, value in settings.items():
+        print(f"{key}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
 from abc import ABC, abstractmethod
 
-from ..models import APIKeyInfo, AuthContext
+from ..models import (
+    APIKeyInfo,
+    AuthContext,
+    RetentionPolicy,
+    RetentionPolicyInfo,
+    WorkspaceQuota,
+    WorkspaceQuotaInfo,
+)
 
 
 class KeyStore(ABC):
@@ -40,3 +47,34 @@ class KeyStore(ABC):
 
     @abstractmethod
     async def get_key_info(self, key_id: str) -> APIKeyInfo | None: ...
+
+    # ── Retention policies (stored alongside keys, one per workspace) ─────────
+
+    @abstractmethod
+    async def set_retention_policy(
+        self, workspace_id: str, policy: RetentionPolicy
+    ) -> RetentionPolicyInfo: ...
+
+    @abstractmethod
+    async def get_retention_policy(
+        self, workspace_id: str
+    ) -> RetentionPolicyInfo | None: ...
+
+    @abstractmethod
+    async def list_retention_policies(self) -> list[RetentionPolicyInfo]: ...
+
+    @abstractmethod
+    async def delete_retention_policy(self, workspace_id: str) -> bool: ...
+
+    # ── Quotas (stored alongside keys, one per workspace) ─────────────────────
+
+    @abstractmethod
+    async def set_quota(
+        self, workspace_id: str, quota: WorkspaceQuota
+    ) -> WorkspaceQuotaInfo: ...
+
+    @abstractmethod
+    async def list_quotas(self) -> list[WorkspaceQuotaInfo]: ...
+
+    @abstractmethod
+    async def delete_quota(self, workspace_id: str) -> bool: ...
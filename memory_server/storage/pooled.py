@@ -0,0 +1,395 @@
+"""
+SQLite memory store with a read pool and a group-committing writer.
+
+plyra-memory's SQLiteStore runs every query on one aiosqlite connection —
+one background thread — so recall reads queue behind remember commits even
+in WAL mode. PooledSQLiteStore keeps SQLiteStore's SQL but routes it:
+
+  reads   → one of `read_pool_size` read-only connections
+  writes  → a single writer task that applies queued writes back to back
+            and commits them together (group commit)
+
+Each SQLiteStore method fetches its connection through _ensure_conn(); the
+override here returns whichever connection the current task was handed via
+a context variable. Inside the writer the connection's commit() is a no-op —
+the writer commits once per group, then resolves every caller's future, so
+a write returns only after it is durable.
+
+With lexical_index=True the store also maintains the FTS5 tables from
+memory_server.lexical and answers lexical_search() on a pooled reader.
+With a token_counter, every working entry, episode and fact it saves gets
+its memory_tokens count (memory_server.tokens) in the same write. Triggers
+keep each namespace's write generation (memory_server.query_cache) and its
+stored rows and bytes (memory_server.usage) current.
+
+Recall hydrates and touches its candidates in bulk (get_episodes_by_ids,
+increment_episode_access_many, …) — one query per layer instead of one
+round trip per candidate.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import aiosqlite
+from plyra_memory.schema import Episode, Fact
+from plyra_memory.storage.sqlite import SQLiteStore, _dt_to_str
+
+from .. import lexical, query_cache, tokens, usage
+from ..models import _utcnow
+from ..namespace import scope_clause
+
+logger = logging.getLogger(__name__)
+
+_current_conn: ContextVar[Any] = ContextVar("_current_conn", default=None)
+
+_READ_METHODS = (
+    "get_session",
+    "get_working_entries",
+    "get_episode",
+    "get_episodes",
+    "get_fact",
+    "get_fact_by_fingerprint",
+    "get_facts",
+    "count_memories",
+    "get_episodes_for_promotion",
+    "get_episodes_for_summarization",
+    "get_session_episode_count",
+)
+_WRITE_METHODS = (
+    "save_session",
+    "update_session",
+    "save_working_entry",
+    "delete_working_entries",
+    "delete_working_entry_by_id",
+    "save_episode",
+    "increment_episode_access",
+    "mark_episode_promoted",
+    "save_fact",
+    "update_fact_access",
+    "delete_fact",
+    "delete_episodes_by_ids",
+)
+_COUNTED_WRITES = {"save_working_entry", "save_episode", "save_fact"}
+
+
+class _DeferredCommit:
+    """Writer connection as seen by queued writes — the writer commits."""
+
+    def __init__(self, conn: aiosqlite.Connection):
+        self._conn = conn
+
+    async def commit(self) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+class PooledSQLiteStore(SQLiteStore):
+    def __init__(
+        self,
+        db_path: str,
+        config: Any,
+        *,
+        read_pool_size: int = 4,
+        commit_interval_ms: float = 0,
+        commit_max_batch: int = 64,
+        synchronous: str = "NORMAL",
+        lexical_index: bool = False,
+        token_counter: tokens.TokenCounter | None = None,
+    ) -> None:
+        super().__init__(db_path, config)
+        self._read_pool_size = max(1, read_pool_size)
+        self._commit_interval = commit_interval_ms / 1000
+        self._commit_max_batch = max(1, commit_max_batch)
+        self._synchronous = synchronous
+        self._lexical = lexical_index
+        self._tokens = token_counter
+        self._readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._reader_conns: list[aiosqlite.Connection] = []
+        self._writes: asyncio.Queue[tuple | None] = asyncio.Queue()
+        self._writer: asyncio.Task | None = None
+        self._deferred: _DeferredCommit | None = None
+        self._write_count = 0
+        self._commit_count = 0
+
+    async def initialize(self) -> None:
+        await super().initialize()  # writer connection + schema
+        await self._conn.execute(f"PRAGMA synchronous={self._synchronous}")
+        if self._lexical:
+            await lexical.ensure_fts(self._conn)
+        if self._tokens is not None:
+            await tokens.ensure_table(self._conn)
+        await query_cache.ensure_generations(self._conn)
+        await usage.ensure_table(self._conn)
+        self._deferred = _DeferredCommit(self._conn)
+
+        uri = f"file:{self._db_path}?mode=ro"
+        for _ in range(self._read_pool_size):
+            conn = await aiosqlite.connect(uri, uri=True)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA query_only=1")
+            self._reader_conns.append(conn)
+            self._readers.put_nowait(conn)
+
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            await self._writes.put(None)
+            await self._writer
+            self._writer = None
+        for conn in self._reader_conns:
+            await conn.close()
+        self._reader_conns.clear()
+        await super().close()
+
+    def _ensure_conn(self) -> aiosqlite.Connection:
+        conn = _current_conn.get()
+        if conn is not None:
+            return conn
+        return super()._ensure_conn()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "readers": self._read_pool_size,
+            "readers_idle": self._readers.qsize(),
+            "write_queue": self._writes.qsize(),
+            "writes": self._write_count,
+            "commits": self._commit_count,
+        }
+
+    @property
+    def lexical_enabled(self) -> bool:
+        return self._lexical
+
+    async def lexical_search(
+        self,
+        query: str,
+        agent_id: str,
+        layers: list[str],
+        limit: int,
+        *,
+        nested: bool = False,
+    ) -> list[lexical.LexicalHit]:
+        if not self._lexical:
+            return []
+        async with self.reader() as conn:
+            return await lexical.search(
+                conn, query, agent_id, layers, limit, nested=nested
+            )
+
+    async def namespaces(self, prefix: str) -> list[str]:
+        """Namespaces at or under `prefix` with episodes or facts."""
+        clause, params = scope_clause("agent_id", prefix)
+        sql = (
+            f"SELECT DISTINCT agent_id FROM episodes WHERE {clause} "  # noqa: S608
+            f"UNION SELECT DISTINCT agent_id FROM facts WHERE {clause}"
+        )
+        async with self.reader() as conn:
+            rows = await conn.execute_fetchall(sql, (*params, *params))
+        return sorted(r[0] for r in rows)
+
+    async def token_counts(self, ids: list[str]) -> dict[str, int]:
+        """Stored token counts of memories, for the configured tokenizer."""
+        if self._tokens is None:
+            return {}
+        async with self.reader() as conn:
+            return await tokens.lookup(conn, ids, self._tokens.name)
+
+    async def generation(self, namespace: str) -> int:
+        """The namespace's write generation, for query cache entries."""
+        async with self.reader() as conn:
+            return await query_cache.generation(conn, namespace)
+
+    async def usage(self, prefix: str) -> dict[str, dict[str, int]]:
+        """Stored rows and content bytes per layer under `prefix`."""
+        async with self.reader() as conn:
+            return await usage.stored(conn, prefix)
+
+    # ── Bulk recall helpers ───────────────────────────────────────────────────
+
+    async def get_episodes_by_ids(self, ids: list[str]) -> dict[str, Episode]:
+        rows = await self._select_ids("episodes", ids)
+        return {r["id"]: self._row_to_episode(r) for r in rows}
+
+    async def get_facts_by_ids(self, ids: list[str]) -> dict[str, Fact]:
+        rows = await self._select_ids("facts", ids)
+        return {r["id"]: self._row_to_fact(r) for r in rows}
+
+    async def increment_episode_access_many(self, ids: list[str]) -> None:
+        if ids:
+            await self._submit(_increment_episode_access_many, ids)
+
+    async def update_fact_access_many(self, ids: list[str]) -> None:
+        if ids:
+            await self._submit(_update_fact_access_many, ids)
+
+    async def _select_ids(self, table: str, ids: list[str]) -> list[aiosqlite.Row]:
+        if not ids:
+            return []
+        marks = ",".join("?" for _ in ids)
+        sql = f"SELECT * FROM {table} WHERE id IN ({marks})"  # noqa: S608
+        conn = _current_conn.get()
+        if conn is not None:
+            return list(await conn.execute_fetchall(sql, ids))
+        async with self.reader() as conn:
+            return list(await conn.execute_fetchall(sql, ids))
+
+    # ── Routing ───────────────────────────────────────────────────────────────
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection from the pool."""
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    async def _read(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        base = getattr(SQLiteStore, name)
+        if _current_conn.get() is not None:
+            # Nested inside a write (e.g. save_fact's fingerprint lookup):
+            # stay on that connection so uncommitted rows are visible
+            return await base(self, *args, **kwargs)
+        async with self.reader() as conn:
+            token = _current_conn.set(conn)
+            try:
+                return await base(self, *args, **kwargs)
+            finally:
+                _current_conn.reset(token)
+
+    async def _write(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        save = getattr(SQLiteStore, name)
+        if self._tokens is not None and name in _COUNTED_WRITES:
+            # Counted before queueing, so the writer never runs the tokenizer
+            item = args[0]
+            count = self._tokens.count(item.content)
+            return await self._submit(_save_counted, save, item, count)
+        return await self._submit(save, *args, **kwargs)
+
+    async def _submit(self, fn: Any, *args: Any, **kwargs: Any) -> Any:
+        """Run fn(self, *args) on the writer connection, in the next group."""
+        if _current_conn.get() is self._deferred:
+            return await fn(self, *args, **kwargs)
+        future = asyncio.get_running_loop().create_future()
+        await self._writes.put((fn, args, kwargs, future))
+        return await future
+
+    # ── Writer ────────────────────────────────────────────────────────────────
+
+    async def _next_group(self) -> tuple[list[tuple], bool]:
+        """Wait for one write, then take whatever else fits in the group."""
+        first = await self._writes.get()
+        if first is None:
+            return [], True
+        group = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._commit_interval
+        while len(group) < self._commit_max_batch:
+            try:
+                if self._commit_interval > 0:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    item = await asyncio.wait_for(self._writes.get(), timeout)
+                else:
+                    item = self._writes.get_nowait()
+            except (TimeoutError, asyncio.QueueEmpty):
+                break
+            if item is None:
+                return group, True
+            group.append(item)
+        return group, False
+
+    async def _write_loop(self) -> None:
+        stop = False
+        while not stop:
+            group, stop = await self._next_group()
+            if not group:
+                continue
+            outcomes: list[tuple[asyncio.Future, Any, BaseException | None]] = []
+            token = _current_conn.set(self._deferred)
+            try:
+                # One transaction for the group, a savepoint per write: a
+                # write that fails part way leaves none of its statements
+                if not self._conn.in_transaction:
+                    await self._conn.execute("BEGIN")
+                for fn, args, kwargs, future in group:
+                    await self._conn.execute("SAVEPOINT write")
+                    try:
+                        result = await fn(self, *args, **kwargs)
+                        outcomes.append((future, result, None))
+                    except Exception as e:
+                        await self._conn.execute("ROLLBACK TO write")
+                        outcomes.append((future, None, e))
+                    await self._conn.execute("RELEASE write")
+                try:
+                    await self._conn.commit()
+                    self._commit_count += 1
+                except Exception as e:
+                    logger.exception("Group commit of %d writes failed", len(group))
+                    await self._conn.rollback()
+                    outcomes = [(f, None, e) for f, _, _ in outcomes]
+            finally:
+                _current_conn.reset(token)
+            self._write_count += len(group)
+            for future, result, error in outcomes:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+
+async def _increment_episode_access_many(store: PooledSQLiteStore, ids: list[str]):
+    marks = ",".join("?" for _ in ids)
+    await store._ensure_conn().execute(
+        f"UPDATE episodes SET access_count = access_count + 1 "  # noqa: S608
+        f"WHERE id IN ({marks})",
+        ids,
+    )
+
+
+async def _update_fact_access_many(store: PooledSQLiteStore, ids: list[str]):
+    marks = ",".join("?" for _ in ids)
+    await store._ensure_conn().execute(
+        f"UPDATE facts SET last_accessed = ?, access_count = access_count + 1 "  # noqa: S608
+        f"WHERE id IN ({marks})",
+        [_dt_to_str(_utcnow()), *ids],
+    )
+
+
+async def _save_counted(store: PooledSQLiteStore, save: Any, item: Any, count: int):
+    saved = await save(store, item)
+    await store._ensure_conn().execute(
+        "INSERT OR REPLACE INTO memory_tokens (id, tokens, tokenizer) VALUES (?, ?, ?)",
+        (saved.id, count, store._tokens.name),
+    )
+    return saved
+
+
+def _route(name: str, kind: str):
+    async def method(self: PooledSQLiteStore, *args: Any, **kwargs: Any) -> Any:
+        if kind == "read":
+            return await self._read(name, *args, **kwargs)
+        return await self._write(name, *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = getattr(SQLiteStore, name).__doc__
+    return method
+
+
+for _name in _READ_METHODS:
+    setattr(PooledSQLiteStore, _name, _route(_name, "read"))
+for _name in _WRITE_METHODS:
+    setattr(PooledSQLiteStore, _name, _route(_name, "write"))
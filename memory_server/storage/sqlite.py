@@ -6,7 +6,14 @@ from uuid import uuid4
 
 import aiosqlite
 
-from ..models import APIKeyInfo, AuthContext
+from ..models import (
+    APIKeyInfo,
+    AuthContext,
+    RetentionPolicy,
+    RetentionPolicyInfo,
+    WorkspaceQuota,
+    WorkspaceQuotaInfo,
+)
 from .base import KeyStore
 
 
@@ -41,6 +48,20 @@ class SQLiteKeyStore(KeyStore):
         await self._conn.execute(
             "CREATE INDEX IF NOT EXISTS idx_keys_workspace ON api_keys(workspace_id)"
         )
+        await self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS retention_policies (
+                workspace_id TEXT PRIMARY KEY,
+                policy       TEXT NOT NULL,
+                updated_at   TEXT NOT NULL
+            )
+        """)
+        await self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS workspace_quotas (
+                workspace_id TEXT PRIMARY KEY,
+                quota        TEXT NOT NULL,
+                updated_at   TEXT NOT NULL
+            )
+        """)
         await self._conn.commit()
 
     async def create_key(
@@ -152,6 +173,99 @@ class SQLiteKeyStore(KeyStore):
             is_active=bool(row["is_active"]),
         )
 
+    async def set_retention_policy(
+        self, workspace_id: str, policy: RetentionPolicy
+    ) -> RetentionPolicyInfo:
+        now = datetime.now(UTC).isoformat()
+        await self._conn.execute(
+            """
+            INSERT INTO retention_policies (workspace_id, policy, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(workspace_id) DO UPDATE
+              SET policy = excluded.policy, updated_at = excluded.updated_at
+        """,
+            (workspace_id, policy.model_dump_json(), now),
+        )
+        await self._conn.commit()
+        return RetentionPolicyInfo(
+            workspace_id=workspace_id,
+            policy=policy,
+            updated_at=datetime.fromisoformat(now),
+        )
+
+    async def get_retention_policy(
+        self, workspace_id: str
+    ) -> RetentionPolicyInfo | None:
+        async with self._conn.execute(
+            "SELECT * FROM retention_policies WHERE workspace_id = ?",
+            (workspace_id,),
+        ) as cur:
+            row = await cur.fetchone()
+        return _policy_info(row) if row else None
+
+    async def list_retention_policies(self) -> list[RetentionPolicyInfo]:
+        async with self._conn.execute(
+            "SELECT * FROM retention_policies ORDER BY workspace_id"
+        ) as cur:
+            rows = await cur.fetchall()
+        return [_policy_info(r) for r in rows]
+
+    async def delete_retention_policy(self, workspace_id: str) -> bool:
+        cur = await self._conn.execute(
+            "DELETE FROM retention_policies WHERE workspace_id = ?", (workspace_id,)
+        )
+        await self._conn.commit()
+        return cur.rowcount > 0
+
+    async def set_quota(
+        self, workspace_id: str, quota: WorkspaceQuota
+    ) -> WorkspaceQuotaInfo:
+        now = datetime.now(UTC).isoformat()
+        await self._conn.execute(
+            """
+            INSERT INTO workspace_quotas (workspace_id, quota, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(workspace_id) DO UPDATE
+              SET quota = excluded.quota, updated_at = excluded.updated_at
+        """,
+            (workspace_id, quota.model_dump_json(), now),
+        )
+        await self._conn.commit()
+        return WorkspaceQuotaInfo(
+            workspace_id=workspace_id,
+            quota=quota,
+            updated_at=datetime.fromisoformat(now),
+        )
+
+    async def list_quotas(self) -> list[WorkspaceQuotaInfo]:
+        async with self._conn.execute(
+            "SELECT * FROM workspace_quotas ORDER BY workspace_id"
+        ) as cur:
+            rows = await cur.fetchall()
+        return [
+            WorkspaceQuotaInfo(
+                workspace_id=r["workspace_id"],
+                quota=WorkspaceQuota.model_validate_json(r["quota"]),
+                updated_at=datetime.fromisoformat(r["updated_at"]),
+            )
+            for r in rows
+        ]
+
+    async def delete_quota(self, workspace_id: str) -> bool:
+        cur = await self._conn.execute(
+            "DELETE FROM workspace_quotas WHERE workspace_id = ?", (workspace_id,)
+        )
+        await self._conn.commit()
+        return cur.rowcount > 0
+
     async def close(self) -> None:
         if self._conn:
             await self._conn.close()
+
+
+def _policy_info(row: aiosqlite.Row) -> RetentionPolicyInfo:
+    return RetentionPolicyInfo(
+        workspace_id=row["workspace_id"],
+        policy=RetentionPolicy.model_validate_json(row["policy"]),
+        updated_at=datetime.fromisoformat(row["updated_at"]),
+    )
@@ -0,0 +1,133 @@
+"""
+Token counts for context packing.
+
+/v1/context fills a token budget with the best-ranked memories. plyra-memory
+estimates each one at query time as len(words) * 1.3, which overflows the
+budget for code, identifiers and non-English text. Here each memory is
+counted once, with a real tokenizer, when it is written: PooledSQLiteStore
+and the NDJSON import keep a memory_tokens row per working entry, episode
+and fact, and packing adds those up.
+
+  context_tokenizer = words                 the word-count estimate (default)
+                      <tiktoken encoding>   cl100k_base, o200k_base, …
+
+tiktoken is optional (pip install "plyra-memory-server[tokens]"); without it
+an encoding falls back to the estimate. Rows with no count for the current
+tokenizer (written earlier, or under another one) are counted when they are
+packed.
+
+The recall behind a context is sized from the budget as well — about twice
+as many memories as the budget holds at the mean count seen so far, instead
+of a fixed 50 — so a 64-token context ranks and hydrates a handful.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+# Tables whose rows are packed into contexts; memory_tokens follows deletes
+TOKEN_SOURCES = ("working_entries", "episodes", "facts")
+
+_WORDS = "words"
+_WORDS_OVERHEAD = 5  # per packed line, as plyra-memory estimates it
+_DEFAULT_MEAN = 24.0  # tokens per memory before anything has been counted
+_FETCH_SLACK = 2.0
+_MIN_FETCH = 4
+_MAX_FETCH = 50
+
+
+async def ensure_table(conn: aiosqlite.Connection) -> None:
+    """Create memory_tokens and the triggers that drop counts with their rows."""
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS memory_tokens (
+            id        TEXT PRIMARY KEY,
+            tokens    INTEGER NOT NULL,
+            tokenizer TEXT NOT NULL
+        )
+        """
+    )
+    for source in TOKEN_SOURCES:
+        await conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {source}_tokens_ad AFTER DELETE ON {source}
+            BEGIN
+                DELETE FROM memory_tokens WHERE id = old.id;
+            END
+            """
+        )
+    await conn.commit()
+
+
+async def lookup(
+    conn: aiosqlite.Connection, ids: list[str], tokenizer: str
+) -> dict[str, int]:
+    """Stored counts for `ids` under `tokenizer`."""
+    if not ids:
+        return {}
+    marks = ",".join("?" for _ in ids)
+    rows = await conn.execute_fetchall(
+        f"SELECT id, tokens FROM memory_tokens "  # noqa: S608
+        f"WHERE tokenizer = ? AND id IN ({marks})",
+        (tokenizer, *ids),
+    )
+    return {r[0]: r[1] for r in rows}
+
+
+class TokenCounter:
+    """Counts content tokens with one tokenizer, shared by every shard."""
+
+    def __init__(self, encoding: str = _WORDS) -> None:
+        self.name = _WORDS
+        self._encode = None
+        if encoding != _WORDS:
+            try:
+                import tiktoken
+
+                self._encode = tiktoken.get_encoding(encoding).encode_ordinary
+                self.name = encoding
+            except ImportError:
+                logger.warning(
+                    "tiktoken not installed; context token counts are estimated"
+                )
+            except Exception:
+                logger.exception("Tokenizer %s unavailable; estimating", encoding)
+        self._overhead = {
+            layer: self._line_overhead(layer)
+            for layer in ("working", "episodic", "semantic")
+        }
+        self._counted = 0
+        self._total = 0
+
+    def _line_overhead(self, layer: str) -> int:
+        if self._encode is None:
+            return _WORDS_OVERHEAD
+        return len(self._encode(f"[{layer.upper()}] \n"))
+
+    def count(self, text: str) -> int:
+        if self._encode is None:
+            tokens = int(len(text.split()) * 1.3)
+        else:
+            tokens = len(self._encode(text))
+        self._counted += 1
+        self._total += tokens
+        return tokens
+
+    def line(self, layer: str, tokens: int) -> int:
+        """Tokens of one packed context line: `[LAYER] content` + newline."""
+        return tokens + self._overhead[layer]
+
+    @property
+    def mean(self) -> float:
+        return self._total / self._counted if self._counted else _DEFAULT_MEAN
+
+    def fetch_size(self, budget: int) -> int:
+        """How many memories to recall for a context of `budget` tokens."""
+        per_line = self.mean + max(self._overhead.values())
+        wanted = math.ceil(budget / per_line * _FETCH_SLACK)
+        return max(_MIN_FETCH, min(_MAX_FETCH, wanted))
@@ -0,0 +1,342 @@
+"""
+Per-request tracing.
+
+A sampled request gets a root span from the HTTP middleware; code on the
+request path opens child spans with
+
+  with span("vectors.query", layer="episodic") as s:
+      hits = await vectors.query(...)
+      s.set(hits=len(hits))
+
+The active span lives in a ContextVar, so spans nest across awaits and into
+tasks created inside the request. Outside a sampled request `span()` is one
+ContextVar lookup and yields a no-op.
+
+Finished traces are
+  - exported as OTLP/JSON in batches, off the request path: appended to
+    trace_file (trace_export=file, one ExportTraceServiceRequest per line,
+    the collector's file exporter format) or posted to a collector
+    (trace_export=otlp, OTLP/HTTP JSON);
+  - logged as an indented span tree when the request took longer than
+    trace_slow_ms.
+
+A request with a W3C `traceparent` header joins the caller's trace when it
+is sampled. Sampling stays trace_sample_rate's decision, so callers can't
+switch on tracing for every request; with trace_trust_parent (callers are
+trusted services) a parent's sampled flag is followed instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+from .config import ServerConfig
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "plyra-memory-server"
+_MAX_PENDING = 2048  # finished traces buffered for export; oldest dropped
+_EXPORT_INTERVAL_S = 2.0
+
+_current: ContextVar[Span | None] = ContextVar("plyra_span", default=None)
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    children: list[Span] = field(default_factory=list)
+    error: str | None = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns or time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def walk(self) -> Iterator[Span]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    """Child span of the active span; a no-op when the request isn't traced."""
+    parent = _current.get()
+    if parent is None:
+        yield _NOOP
+        return
+    child = Span(
+        name,
+        parent.trace_id,
+        _new_id(8),
+        parent.span_id,
+        time.time_ns(),
+        attributes=attributes,
+    )
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.error = type(exc).__name__
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        _current.reset(token)
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """(trace_id, parent span_id, sampled) from a W3C traceparent header."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3][:2], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def format_tree(root: Span) -> str:
+    """Indented span tree with durations, for the slow-request log."""
+    lines: list[str] = []
+
+    def _add(s: Span, depth: int) -> None:
+        attrs = " ".join(f"{k}={v}" for k, v in s.attributes.items())
+        error = f" error={s.error}" if s.error else ""
+        lines.append(
+            f"{'  ' * depth}{s.name} {s.duration_ms:.1f} ms {attrs}{error}".rstrip()
+        )
+        for child in s.children:
+            _add(child, depth + 1)
+
+    _add(root, 0)
+    return "\n".join(lines)
+
+
+# ── OTLP/JSON ─────────────────────────────────────────────────────────────────
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # int64 is a string in proto3 JSON
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(s: Span, kind: int) -> dict[str, Any]:
+    out: dict[str, Any] = {
+        "traceId": s.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": kind,
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns),
+        "attributes": [
+            {"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()
+        ],
+    }
+    if s.parent_id:
+        out["parentSpanId"] = s.parent_id
+    if s.error:
+        out["status"] = {"code": 2, "message": s.error}
+    return out
+
+
+def to_otlp(roots: list[Span]) -> dict[str, Any]:
+    """An OTLP ExportTraceServiceRequest for finished traces."""
+    spans = []
+    for root in roots:
+        # the root is SERVER (2), everything below it INTERNAL (1)
+        spans.append(_otlp_span(root, 2))
+        spans.extend(_otlp_span(s, 1) for s in root.walk() if s is not root)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": SERVICE_NAME}}
+                    ]
+                },
+                "scopeSpans": [
+                    {"scope": {"name": "memory_server"}, "spans": spans},
+                ],
+            }
+        ]
+    }
+
+
+# ── Tracer ────────────────────────────────────────────────────────────────────
+
+
+class Tracer:
+    """Samples requests, logs slow ones and exports finished traces."""
+
+    def __init__(self, config: ServerConfig) -> None:
+        self._sample_rate = config.trace_sample_rate
+        self._trust_parent = config.trace_trust_parent
+        self._slow_ms = config.trace_slow_ms
+        self._export = config.trace_export
+        self._file = Path(config.trace_file).expanduser()
+        self._endpoint = config.trace_otlp_endpoint
+        self._pending: deque[Span] = deque(maxlen=_MAX_PENDING)
+        self._task: asyncio.Task | None = None
+        self._client: Any = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._sample_rate > 0
+
+    def start(self) -> None:
+        if self.enabled and self._export != "none" and self._task is None:
+            self._task = asyncio.create_task(self._export_loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @contextmanager
+    def trace(
+        self, name: str, traceparent: str | None = None, **attributes: Any
+    ) -> Iterator[Span | None]:
+        """Root span for one request, or None when it isn't sampled."""
+        if not self.enabled:
+            yield None
+            return
+        parent = parse_traceparent(traceparent)
+        if self._trust_parent and parent is not None:
+            sampled = parent[2]
+        else:
+            sampled = random.random() < self._sample_rate
+        if not sampled:
+            yield None
+            return
+        if parent is not None:
+            trace_id, parent_id = parent[0], parent[1]
+        else:
+            trace_id, parent_id = _new_id(16), None
+
+        root = Span(
+            name,
+            trace_id,
+            _new_id(8),
+            parent_id,
+            time.time_ns(),
+            attributes=attributes,
+        )
+        token = _current.set(root)
+        try:
+            yield root
+        except BaseException as exc:
+            root.error = type(exc).__name__
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            _current.reset(token)
+            self._finish(root)
+
+    def _finish(self, root: Span) -> None:
+        if self._slow_ms > 0 and root.duration_ms >= self._slow_ms:
+            logger.warning(
+                "Slow request %s (%.0f ms, trace %s)\n%s",
+                root.name,
+                root.duration_ms,
+                root.trace_id,
+                format_tree(root),
+            )
+        if self._export != "none":
+            self._pending.append(root)
+
+    async def flush(self) -> None:
+        """Export everything finished so far. Failures are logged and dropped."""
+        if not self._pending:
+            return
+        roots = list(self._pending)
+        self._pending.clear()
+        payload = orjson.dumps(to_otlp(roots))
+        try:
+            if self._export == "file":
+                await asyncio.to_thread(self._append, payload)
+            elif self._export == "otlp":
+                await self._post(payload)
+        except Exception as exc:
+            logger.warning("Trace export failed (%d traces): %s", len(roots), exc)
+
+    def _append(self, payload: bytes) -> None:
+        self._file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._file, "ab") as f:
+            f.write(payload + b"\n")
+
+    async def _post(self, payload: bytes) -> None:
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(timeout=5.0)
+        resp = await self._client.post(
+            self._endpoint,
+            content=payload,
+            headers={"Content-Type": "application/json"},
+        )
+        resp.raise_for_status()
+
+    async def _export_loop(self) -> None:
+        while True:
+            await asyncio.sleep(_EXPORT_INTERVAL_S)
+            await self.flush()
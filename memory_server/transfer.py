@@ -0,0 +1,397 @@
+"""
+Streaming NDJSON export / import of a workspace's memory.
+
+Export pages through sessions, working entries, episodes and facts under a
+namespace prefix using keyset pagination on the primary key, so memory use
+is bounded by `page_size` regardless of tenant size. Each line is one JSON
+object:
+
+  {"type": "header", "version": 1, "workspace_id": "acme", ...}
+  {"type": "episodic", "row": {...raw columns...}, "embedding": "<b64>"}
+
+Embeddings are optional and encoded as base64 little-endian float32. When an
+import carries embeddings produced by the same model, they are upserted
+directly and nothing is re-embedded.
+
+Import reads the request body line by line, inserts rows in batches (one
+transaction per batch) and upserts vectors per batch. Rows exported from
+another workspace get fresh ids derived from their old ones, and ids
+already held by another namespace are refused, so an import never writes
+over another tenant. A stream that fails part way leaves the batches
+committed before the failure in place; importing it again replaces them.
+"""
+
+from __future__ import annotations
+
+import array
+import asyncio
+import base64
+import contextlib
+import hashlib
+import json
+import logging
+import sys
+import uuid
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+from typing import Any
+
+import aiosqlite
+
+from .erasure import LAYER_TABLES, VECTOR_LAYERS, table_exists
+from .models import _utcnow
+from .namespace import scope_clause, session_id_for
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+# Export order — sessions first so imports never reference a missing session
+EXPORT_TABLES = {"session": "sessions", **LAYER_TABLES}
+
+
+# ── Embedding encoding ────────────────────────────────────────────────────────
+
+
+def encode_embedding(embedding: list[float]) -> str:
+    buf = array.array("f", embedding)
+    if sys.byteorder == "big":
+        buf.byteswap()
+    return base64.b64encode(buf.tobytes()).decode()
+
+
+def decode_embedding(data: str) -> list[float]:
+    buf = array.array("f")
+    buf.frombytes(base64.b64decode(data))
+    if sys.byteorder == "big":
+        buf.byteswap()
+    return buf.tolist()
+
+
+# ── Vector helpers ────────────────────────────────────────────────────────────
+
+
+async def fetch_embeddings(vectors: Any, ids: list[str]) -> dict[str, list[float]]:
+    """Return {id: embedding} for whichever of `ids` the backend holds."""
+    if not ids:
+        return {}
+    get_many = getattr(vectors, "get_embeddings", None)
+    if get_many is not None:
+        return await get_many(ids)
+    collection = getattr(vectors, "_collection", None)
+    if collection is None:
+        return {}
+    got = await asyncio.to_thread(collection.get, ids=ids, include=["embeddings"])
+    return {
+        vid: [float(x) for x in emb] for vid, emb in zip(got["ids"], got["embeddings"])
+    }
+
+
+async def upsert_vectors(
+    vectors: Any, items: list[tuple[str, list[float], dict[str, Any]]]
+) -> None:
+    """Upsert many (id, embedding, metadata) triples in one backend call."""
+    if not items:
+        return
+    upsert_many = getattr(vectors, "upsert_many", None)
+    if upsert_many is not None:
+        await upsert_many(items)
+        return
+    collection = getattr(vectors, "_collection", None)
+    if collection is not None:
+        await asyncio.to_thread(
+            collection.upsert,
+            ids=[i for i, _, _ in items],
+            embeddings=[e for _, e, _ in items],
+            metadatas=[
+                {k: v for k, v in m.items() if v is not None} for _, _, m in items
+            ],
+        )
+        return
+    for vid, emb, meta in items:
+        await vectors.upsert(vid, emb, meta)
+
+
+def vector_metadata(layer: str, row: dict[str, Any]) -> dict[str, Any]:
+    """Rebuild the metadata plyra-memory's layers attach on upsert."""
+    if layer == "episodic":
+        return {
+            "layer": "episodic",
+            "session_id": row["session_id"],
+            "agent_id": row["agent_id"],
+            "importance": row["importance"],
+        }
+    return {
+        "layer": "semantic",
+        "agent_id": row["agent_id"],
+        "predicate": row["predicate"],
+        "confidence": row["confidence"],
+    }
+
+
+# ── Export ────────────────────────────────────────────────────────────────────
+
+
+async def export_scope(
+    db_path: str,
+    vectors: Any,
+    prefix: str,
+    *,
+    workspace_id: str,
+    embed_model: str,
+    include_embeddings: bool = False,
+    page_size: int = 500,
+) -> AsyncIterator[bytes]:
+    """Yield NDJSON lines for everything stored under `prefix`."""
+    header = {
+        "type": "header",
+        "version": FORMAT_VERSION,
+        "workspace_id": workspace_id,
+        "namespace": prefix,
+        "embed_model": embed_model,
+        "embeddings": include_embeddings,
+        "exported_at": _utcnow().isoformat(),
+    }
+    yield (json.dumps(header) + "\n").encode()
+
+    conn = await aiosqlite.connect(str(Path(db_path).expanduser()))
+    conn.row_factory = aiosqlite.Row
+    try:
+        clause, params = scope_clause("agent_id", prefix)
+        for kind, table in EXPORT_TABLES.items():
+            if not await table_exists(conn, table):
+                continue
+            last_id = ""
+            while True:
+                rows = await conn.execute_fetchall(
+                    f"SELECT * FROM {table} WHERE {clause} AND id > ? "  # noqa: S608
+                    "ORDER BY id LIMIT ?",
+                    (*params, last_id, page_size),
+                )
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+                embeddings: dict[str, list[float]] = {}
+                if include_embeddings and kind in VECTOR_LAYERS:
+                    embeddings = await fetch_embeddings(
+                        vectors, [r["id"] for r in rows]
+                    )
+                lines = []
+                for r in rows:
+                    item: dict[str, Any] = {"type": kind, "row": dict(r)}
+                    if r["id"] in embeddings:
+                        item["embedding"] = encode_embedding(embeddings[r["id"]])
+                    lines.append(json.dumps(item))
+                yield ("\n".join(lines) + "\n").encode()
+    finally:
+        await conn.close()
+
+
+# ── Import ────────────────────────────────────────────────────────────────────
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into lines without buffering the whole body."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            if line.strip():
+                yield line.decode()
+    if pending.strip():
+        yield pending.decode()
+
+
+# Columns holding the id of another exported row, remapped with it
+_REFERENCES = ("session_id", "promoted_to", "source_episode_id", "promoted_from")
+
+
+def moved_id(dst_prefix: str, old_id: str) -> str:
+    """The id a row from another workspace takes in `dst_prefix`.
+
+    Derived rather than random so references between rows map the same way
+    and importing one export twice replaces its rows instead of copying them.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{dst_prefix}/{old_id}"))
+
+
+def _rebase(row: dict[str, Any], src_prefix: str, dst_prefix: str) -> dict[str, Any]:
+    """Move a row from one workspace namespace to another, under fresh ids."""
+    old_ns = row.get("agent_id") or ""
+    if src_prefix == dst_prefix or not (
+        old_ns == src_prefix or old_ns.startswith(src_prefix + ":")
+    ):
+        return row
+    new_ns = dst_prefix + old_ns[len(src_prefix) :]
+    row = {**row, "agent_id": new_ns}
+    for column in ("id", *_REFERENCES):
+        if not row.get(column):
+            continue
+        # Server sessions are derived from the namespace — keep them derived
+        if column in ("id", "session_id") and row[column] == session_id_for(old_ns):
+            row[column] = session_id_for(new_ns)
+        else:
+            row[column] = moved_id(dst_prefix, row[column])
+    if row.get("fingerprint"):
+        # Same derivation as plyra_memory.schema.Fact — keyed on agent_id
+        raw = f"{new_ns}:{row['subject'].lower()}:{row['predicate']}"
+        row["fingerprint"] = hashlib.sha256(raw.encode()).hexdigest()[:16]
+    return row
+
+
+async def foreign_ids(
+    conn: aiosqlite.Connection, tables: list[str], ids: list[str], prefix: str
+) -> list[str]:
+    """Those of `ids` that rows outside `prefix` already use in `tables`."""
+    clause, params = scope_clause("agent_id", prefix)
+    placeholders = ",".join("?" for _ in ids)
+    found: list[str] = []
+    for table in tables:
+        rows = await conn.execute_fetchall(
+            f"SELECT id FROM {table} WHERE id IN ({placeholders}) "  # noqa: S608
+            f"AND NOT {clause}",
+            (*ids, *params),
+        )
+        found.extend(r[0] for r in rows)
+    return found
+
+
+async def import_stream(
+    db_path: str,
+    vectors: Any,
+    embedder: Any,
+    lines: AsyncIterator[str],
+    *,
+    workspace_id: str,
+    embed_model: str,
+    batch_size: int = 500,
+    embedder_for: Callable[[str], tuple[str, Any]] | None = None,
+    tokens: Any = None,
+    lock: asyncio.Lock | None = None,
+) -> dict[str, int]:
+    """
+    Load an export into `workspace_id`. Rows from another workspace are
+    re-namespaced under fresh ids (see `moved_id`). Existing rows with the
+    same id in this workspace are replaced; an id used outside it raises
+    ValueError before its batch is written. Batches committed before an
+    error stay.
+    Returns per-type counts plus how many vectors had to be re-embedded.
+
+    `embedder_for(namespace)` gives the (model, embedder) of a namespace's
+    vector index when it isn't `embed_model` / `embedder` for every one.
+    With a TokenCounter (`tokens`), memories get their memory_tokens counts.
+    Each batch is embedded first, then written with its vectors under `lock`.
+    """
+    embedder_for = embedder_for or (lambda namespace: (embed_model, embedder))
+
+    counts: dict[str, int] = {k: 0 for k in EXPORT_TABLES}
+    counts["reembedded"] = 0
+    dst_prefix = f"ws_{workspace_id}"
+    src_prefix = dst_prefix
+    src_model: str | None = None  # model of the embeddings in the stream
+
+    conn = await aiosqlite.connect(str(Path(db_path).expanduser()))
+    try:
+        await conn.execute("PRAGMA busy_timeout=5000")
+        # Rows replaced by id fire the delete triggers (usage accounting)
+        await conn.execute("PRAGMA recursive_triggers=ON")
+        columns = {}
+        for table in EXPORT_TABLES.values():
+            info = await conn.execute_fetchall(f"PRAGMA table_info({table})")
+            columns[table] = {c[1] for c in info}
+
+        batch: dict[str, list[dict[str, Any]]] = {k: [] for k in EXPORT_TABLES}
+        embeddings: dict[str, list[float]] = {}
+
+        async def flush(kind: str) -> None:
+            rows = batch[kind]
+            if not rows:
+                return
+            table = EXPORT_TABLES[kind]
+            # Vector ids are shared by the episodic and semantic layers
+            taken = await foreign_ids(
+                conn,
+                [LAYER_TABLES[k] for k in sorted(VECTOR_LAYERS)]
+                if kind in VECTOR_LAYERS
+                else [table],
+                [r["id"] for r in rows],
+                dst_prefix,
+            )
+            if taken:
+                raise ValueError(f"Row {taken[0]} belongs to another namespace")
+            if kind in VECTOR_LAYERS:
+                missing: dict[str, list[dict[str, Any]]] = {}
+                for r in rows:
+                    if r["id"] not in embeddings:
+                        missing.setdefault(r["agent_id"], []).append(r)
+                for ns, todo in missing.items():
+                    fresh = await embedder_for(ns)[1].embed_batch(
+                        [r["content"] for r in todo]
+                    )
+                    embeddings.update(zip((r["id"] for r in todo), fresh))
+                    counts["reembedded"] += len(todo)
+            cols = sorted(set(rows[0]) & columns[table])
+            placeholders = ",".join("?" for _ in cols)
+            # Rows and their vectors land together under `lock`
+            async with lock or contextlib.nullcontext():
+                await conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({','.join(cols)}) "  # noqa: S608
+                    f"VALUES ({placeholders})",
+                    [tuple(r.get(c) for c in cols) for r in rows],
+                )
+                if tokens is not None and kind in LAYER_TABLES:
+                    await conn.executemany(
+                        "INSERT OR REPLACE INTO memory_tokens (id, tokens, tokenizer) "
+                        "VALUES (?, ?, ?)",
+                        [
+                            (r["id"], tokens.count(r["content"]), tokens.name)
+                            for r in rows
+                        ],
+                    )
+                await conn.commit()
+                if kind in VECTOR_LAYERS:
+                    await upsert_vectors(
+                        vectors,
+                        [
+                            (
+                                r["id"],
+                                embeddings.pop(r["id"]),
+                                vector_metadata(kind, r),
+                            )
+                            for r in rows
+                        ],
+                    )
+            counts[kind] += len(rows)
+            batch[kind] = []
+
+        async for line in lines:
+            item = json.loads(line)
+            kind = item.get("type")
+            if kind == "header":
+                if item.get("version") != FORMAT_VERSION:
+                    raise ValueError(
+                        f"Unsupported export version {item.get('version')}"
+                    )
+                src_prefix = f"ws_{item['workspace_id']}"
+                if item.get("embeddings"):
+                    src_model = item.get("embed_model")
+                continue
+            if kind not in EXPORT_TABLES:
+                raise ValueError(f"Unknown record type {kind!r}")
+            row = _rebase(item["row"], src_prefix, dst_prefix)
+            ns = row.get("agent_id") or ""
+            if ns != dst_prefix and not ns.startswith(dst_prefix + ":"):
+                raise ValueError(f"Row {row.get('id')} is outside {dst_prefix}")
+            if "embedding" in item and embedder_for(ns)[0] == src_model:
+                embeddings[row["id"]] = decode_embedding(item["embedding"])
+            batch[kind].append(row)
+            if len(batch[kind]) >= batch_size:
+                await flush(kind)
+
+        for kind in EXPORT_TABLES:
+            await flush(kind)
+    finally:
+        await conn.close()
+
+    logger.info("Imported into ws_%s: %s", workspace_id, counts)
+    return counts
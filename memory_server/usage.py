@@ -0,0 +1,367 @@
+"""
+Per-workspace resource accounting and quotas.
+
+Every workspace shares the embedder, the shard writers and the vector
+indexes. UsageMeter tracks what each one uses, keyed by
+AuthContext.workspace_id:
+
+  stored     rows and content bytes per namespace and layer, kept in each
+             shard's memory_usage table by insert / delete / update triggers
+             on working_entries, episodes and facts, so every write path
+             (remember, extraction, consolidation, erasure, retention,
+             import) is counted. Episodes and facts each have a vector.
+  activity   embeddings, LLM fact extractions, recalls and the time spent in
+             them, counted in process since startup. Embedders and
+             extractors handed to a workspace's Memory are wrapped
+             (MeteredEmbedder, MeteredExtractor), so background work is
+             charged to its workspace as well.
+
+Quotas (WorkspaceQuota, set with PUT /admin/quotas/{workspace_id}, unset
+fields falling back to PLYRA_QUOTA_*):
+
+  max_rows, max_bytes        remember and import are refused (429) once the
+                             workspace stores this much
+  embeds_per_minute          requests that embed are refused (429 +
+  recall_ms_per_minute       Retry-After) while the last minute's total is
+                             at the limit
+  llm_extractions_per_hour   further extractions use the regex rules, the
+                             same as a server without an LLM key
+
+Rates are sliding windows in this process. In cluster mode each node
+enforces them over the requests it serves.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+import aiosqlite
+
+from .config import ServerConfig
+from .models import WorkspaceQuota
+from .namespace import scope_clause
+
+logger = logging.getLogger(__name__)
+
+# Tables counted in memory_usage, with the layer they are reported under
+USAGE_SOURCES = {
+    "working_entries": "working",
+    "episodes": "episodic",
+    "facts": "semantic",
+}
+VECTOR_LAYERS = ("episodic", "semantic")
+
+# Sliding window per rate quota: (activity counter, window seconds)
+_RATES = {
+    "embeds_per_minute": ("embeds", 60.0),
+    "recall_ms_per_minute": ("recall_ms", 60.0),
+    "llm_extractions_per_hour": ("llm_extractions", 3600.0),
+}
+
+
+async def ensure_table(conn: aiosqlite.Connection) -> None:
+    """Create memory_usage and its triggers, counting existing rows once."""
+    rows = await conn.execute_fetchall(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memory_usage'"
+    )
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS memory_usage (
+            namespace     TEXT NOT NULL,
+            layer         TEXT NOT NULL,
+            row_count     INTEGER NOT NULL,
+            content_bytes INTEGER NOT NULL,
+            PRIMARY KEY (namespace, layer)
+        ) WITHOUT ROWID
+        """
+    )
+    size = "length(CAST({row}.content AS BLOB))"
+    for source, layer in USAGE_SOURCES.items():
+        if not rows:
+            await conn.execute(
+                f"INSERT INTO memory_usage "  # noqa: S608
+                f"SELECT agent_id, '{layer}', COUNT(*), "
+                f"COALESCE(SUM(length(CAST(content AS BLOB))), 0) "
+                f"FROM {source} GROUP BY agent_id"
+            )
+        await conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {source}_usage_ai AFTER INSERT ON {source}
+            BEGIN
+                INSERT INTO memory_usage VALUES
+                    (new.agent_id, '{layer}', 1, {size.format(row="new")})
+                ON CONFLICT(namespace, layer) DO UPDATE SET
+                    row_count = row_count + 1,
+                    content_bytes = content_bytes + excluded.content_bytes;
+            END
+            """
+        )
+        await conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {source}_usage_ad AFTER DELETE ON {source}
+            BEGIN
+                UPDATE memory_usage SET
+                    row_count = row_count - 1,
+                    content_bytes = content_bytes - {size.format(row="old")}
+                WHERE namespace = old.agent_id AND layer = '{layer}';
+            END
+            """
+        )
+        await conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {source}_usage_au
+            AFTER UPDATE OF content ON {source}
+            BEGIN
+                UPDATE memory_usage SET content_bytes = content_bytes
+                    - {size.format(row="old")} + {size.format(row="new")}
+                WHERE namespace = old.agent_id AND layer = '{layer}';
+            END
+            """
+        )
+    await conn.commit()
+
+
+async def stored(conn: aiosqlite.Connection, prefix: str) -> dict[str, dict[str, int]]:
+    """{layer: {"rows", "bytes"}} summed over `prefix` and its namespaces."""
+    clause, params = scope_clause("namespace", prefix)
+    rows = await conn.execute_fetchall(
+        f"SELECT layer, SUM(row_count), SUM(content_bytes) "  # noqa: S608
+        f"FROM memory_usage WHERE {clause} GROUP BY layer",
+        params,
+    )
+    found = {r[0]: {"rows": r[1], "bytes": r[2]} for r in rows}
+    return {
+        layer: found.get(layer, {"rows": 0, "bytes": 0})
+        for layer in USAGE_SOURCES.values()
+    }
+
+
+def summary(
+    layers: dict[str, dict[str, int]], dim: int, vector_dtype: str
+) -> dict[str, Any]:
+    """Totals for stored(): rows, bytes, and vectors with their size."""
+    from .quantize import record_dtype
+
+    vectors = sum(layers[layer]["rows"] for layer in VECTOR_LAYERS)
+    return {
+        "rows": sum(v["rows"] for v in layers.values()),
+        "bytes": sum(v["bytes"] for v in layers.values()),
+        "vectors": vectors,
+        "vector_bytes": vectors * record_dtype(vector_dtype, dim).itemsize,
+        "layers": layers,
+    }
+
+
+class QuotaExceededError(Exception):
+    """A workspace is at one of its quotas."""
+
+    def __init__(self, quota: str, limit: float, retry_after: int | None = None):
+        self.quota, self.limit, self.retry_after = quota, limit, retry_after
+        super().__init__(f"Workspace quota exceeded: {quota} ({limit:g})")
+
+
+class _Window:
+    """Sum of amounts recorded over the last `span` seconds."""
+
+    def __init__(self, span: float) -> None:
+        self.span = span
+        self._events: deque[tuple[float, float]] = deque()
+        self._total = 0.0
+
+    def add(self, now: float, amount: float) -> None:
+        self.total(now)  # trims, so the window stays bounded by its span
+        self._events.append((now, amount))
+        self._total += amount
+
+    def total(self, now: float) -> float:
+        while self._events and self._events[0][0] <= now - self.span:
+            self._total -= self._events.popleft()[1]
+        return self._total
+
+    def below_in(self, now: float, limit: float) -> float:
+        """Seconds until the total drops below `limit`."""
+        total = self.total(now)
+        for at, amount in self._events:
+            total -= amount
+            if total < limit:
+                return at + self.span - now
+        return self.span
+
+
+@dataclass
+class _Activity:
+    counts: dict[str, float] = field(
+        default_factory=lambda: {
+            "embeds": 0,
+            "llm_extractions": 0,
+            "llm_extractions_throttled": 0,
+            "recalls": 0,
+            "recall_ms": 0.0,
+            "rejected": 0,
+        }
+    )
+    windows: dict[str, _Window] = field(
+        default_factory=lambda: {
+            counter: _Window(span) for counter, span in _RATES.values()
+        }
+    )
+
+
+class UsageMeter:
+    """Activity counters and quota checks for every workspace."""
+
+    def __init__(self, config: ServerConfig, key_store: Any) -> None:
+        self._config = config
+        self._key_store = key_store
+        self.defaults = WorkspaceQuota(
+            max_rows=config.quota_max_rows,
+            max_bytes=config.quota_max_bytes,
+            embeds_per_minute=config.quota_embeds_per_minute,
+            recall_ms_per_minute=config.quota_recall_ms_per_minute,
+            llm_extractions_per_hour=config.quota_llm_extractions_per_hour,
+        )
+        self._quotas: dict[str, WorkspaceQuota] = {}
+        self._loaded = -math.inf
+        self._activity: dict[str, _Activity] = {}
+        self.since = time.time()
+
+    # ── Quotas ────────────────────────────────────────────────────────────────
+
+    async def reload(self) -> None:
+        """Re-read every workspace's quota from the key store."""
+        self._quotas = {
+            info.workspace_id: info.quota
+            for info in await self._key_store.list_quotas()
+        }
+        self._loaded = time.monotonic()
+
+    async def quota(self, workspace_id: str) -> WorkspaceQuota:
+        """The workspace's effective quota: its own fields over the defaults."""
+        if time.monotonic() - self._loaded >= self._config.quota_reload_s:
+            await self.reload()
+        own = self._quotas.get(workspace_id)
+        if own is None:
+            return self.defaults
+        return self.defaults.model_copy(update=own.model_dump(exclude_none=True))
+
+    async def check_rates(self, workspace_id: str, *quotas: str) -> None:
+        """Raise QuotaExceededError if a rate quota's window is full."""
+        quota = await self.quota(workspace_id)
+        now = time.monotonic()
+        for name in quotas:
+            limit = getattr(quota, name)
+            if limit is None:
+                continue
+            window = self._get(workspace_id).windows[_RATES[name][0]]
+            if window.total(now) >= limit:
+                self._get(workspace_id).counts["rejected"] += 1
+                wait = window.below_in(now, limit)
+                raise QuotaExceededError(name, limit, max(1, math.ceil(wait)))
+
+    async def check_storage(self, workspace_id: str, store: Any, prefix: str) -> None:
+        """Raise QuotaExceededError if the workspace is at a storage quota."""
+        quota = await self.quota(workspace_id)
+        if quota.max_rows is None and quota.max_bytes is None:
+            return
+        layers = await store.usage(prefix)
+        for name, key in (("max_rows", "rows"), ("max_bytes", "bytes")):
+            limit = getattr(quota, name)
+            if limit is not None and sum(v[key] for v in layers.values()) >= limit:
+                self._get(workspace_id).counts["rejected"] += 1
+                raise QuotaExceededError(name, limit)
+
+    async def allow_llm_extraction(self, workspace_id: str) -> bool:
+        quota = await self.quota(workspace_id)
+        limit = quota.llm_extractions_per_hour
+        if limit is None:
+            return True
+        window = self._get(workspace_id).windows["llm_extractions"]
+        return window.total(time.monotonic()) < limit
+
+    # ── Activity ──────────────────────────────────────────────────────────────
+
+    def _get(self, workspace_id: str) -> _Activity:
+        activity = self._activity.get(workspace_id)
+        if activity is None:
+            activity = self._activity[workspace_id] = _Activity()
+        return activity
+
+    def record(self, workspace_id: str, counter: str, amount: float = 1) -> None:
+        activity = self._get(workspace_id)
+        activity.counts[counter] += amount
+        if counter in activity.windows:
+            activity.windows[counter].add(time.monotonic(), amount)
+
+    def activity(self, workspace_id: str) -> dict[str, Any]:
+        activity = self._get(workspace_id)
+        now = time.monotonic()
+        counts = dict(activity.counts)
+        counts["recall_ms"] = round(counts["recall_ms"], 1)
+        return {
+            **counts,
+            "windows": {
+                name: round(activity.windows[counter].total(now), 1)
+                for name, (counter, _) in _RATES.items()
+            },
+        }
+
+    @property
+    def workspaces(self) -> list[str]:
+        """Workspaces with activity since startup or a quota of their own."""
+        return sorted(self._activity.keys() | self._quotas.keys())
+
+    # ── Wrappers ──────────────────────────────────────────────────────────────
+
+    def embedder(self, target: Any, workspace_id: str) -> Any:
+        return MeteredEmbedder(target, self, workspace_id)
+
+    def extractor(self, target: Any, workspace_id: str) -> Any:
+        if target is None:
+            return None  # regex rules: nothing to meter
+        return MeteredExtractor(target, self, workspace_id)
+
+
+class MeteredEmbedder:
+    """A shared embedder that charges the texts it embeds to a workspace."""
+
+    def __init__(self, target: Any, meter: UsageMeter, workspace_id: str) -> None:
+        self._target = target
+        self._meter = meter
+        self._workspace_id = workspace_id
+
+    async def embed(self, text: str) -> Any:
+        self._meter.record(self._workspace_id, "embeds")
+        return await self._target.embed(text)
+
+    async def embed_batch(self, texts: list[str]) -> Any:
+        self._meter.record(self._workspace_id, "embeds", len(texts))
+        return await self._target.embed_batch(texts)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+
+class MeteredExtractor:
+    """The LLM extractor, charged to a workspace and held to its hourly quota."""
+
+    def __init__(self, target: Any, meter: UsageMeter, workspace_id: str) -> None:
+        self._target = target
+        self._meter = meter
+        self._workspace_id = workspace_id
+
+    async def extract(self, text: str, *args: Any, **kwargs: Any) -> Any:
+        if not await self._meter.allow_llm_extraction(self._workspace_id):
+            from plyra_memory.extraction.regex import RegexExtractor
+
+            self._meter.record(self._workspace_id, "llm_extractions_throttled")
+            return await RegexExtractor().extract(text, *args, **kwargs)
+        self._meter.record(self._workspace_id, "llm_extractions")
+        return await self._target.extract(text, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
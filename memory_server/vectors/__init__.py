@@ -0,0 +1,14 @@
+"""Vector backends beyond the ones plyra-memory ships."""
+
+NUMPY_SCHEME = "numpy://"
+NAMESPACE_KEY = "agent_id"  # metadata key holding the namespace
+
+
+def parse_vectors_url(url: str) -> tuple[str, str]:
+    """("numpy" | "chroma", path) for a vectors_url."""
+    if url.startswith(NUMPY_SCHEME):
+        return "numpy", url[len(NUMPY_SCHEME) :]
+    return "chroma", url
+
+
+__all__ = ["NAMESPACE_KEY", "NUMPY_SCHEME", "parse_vectors_url"]
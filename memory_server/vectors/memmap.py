@@ -0,0 +1,535 @@
+"""
+Exact NumPy vector backend — an alternative to Chroma for small namespaces.
+
+  vectors_url = "numpy://~/.plyra/memory.vectors"
+
+Each namespace (the `agent_id` metadata key) gets its own append-only file
+of unit-normalized rows, opened with np.memmap only when that
+namespace is queried. A sidecar SQLite table maps ids to (namespace, slot)
+and holds metadata. A query is one matrix-vector product over the
+namespace's rows plus argpartition — exact, no index to build or maintain.
+A filter with agent_id {"$in": [...]} searches just those namespaces.
+
+Upserts append a new row; the replaced or deleted row becomes a dead slot.
+Once dead slots outnumber live ones the namespace is rewritten into a new
+file (compaction) and the old file is removed. While a snapshot has the
+index pinned (pin() / unpin()) compaction waits, so files only grow.
+
+Rows are stored as float32, float16 or int8 + per-row scale
+(memory_server.quantize), chosen per namespace when its file is created;
+changing `dtype` later affects new namespaces and compactions.
+
+Scores match ChromaVectors: (1 + cosine) / 2 ∈ [0, 1].
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from plyra_memory.vectors.base import VectorBackend
+
+from .. import quantize
+from . import NAMESPACE_KEY
+
+logger = logging.getLogger(__name__)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    namespace TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    dtype TEXT NOT NULL DEFAULT 'float32'
+);
+CREATE TABLE IF NOT EXISTS vectors (
+    id TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vectors_namespace ON vectors(namespace);
+"""
+
+
+# ── Metadata filters (the subset of Chroma `where` plyra-memory uses) ─────────
+
+
+def matches(metadata: dict[str, Any], where: dict[str, Any] | None) -> bool:
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(matches(metadata, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, c) for c in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = metadata.get(key)
+            for op, arg in cond.items():
+                if op == "$eq" and value != arg:
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$nin" and value in arg:
+                    return False
+        elif metadata.get(key) != cond:
+            return False
+    return True
+
+
+def namespace_of(where: dict[str, Any] | None) -> str | None:
+    """The namespace a filter pins with agent_id equality, if any."""
+    if not where:
+        return None
+    cond = where.get(NAMESPACE_KEY)
+    if isinstance(cond, str):
+        return cond
+    if isinstance(cond, dict) and isinstance(cond.get("$eq"), str):
+        return cond["$eq"]
+    for sub in where.get("$and", []):
+        ns = namespace_of(sub)
+        if ns is not None:
+            return ns
+    return None
+
+
+def namespaces_of(where: dict[str, Any] | None) -> list[str] | None:
+    """The namespaces a filter pins with agent_id equality or $in, if any."""
+    ns = namespace_of(where)
+    if ns is not None:
+        return [ns]
+    if not where:
+        return None
+    cond = where.get(NAMESPACE_KEY)
+    if isinstance(cond, dict) and isinstance(cond.get("$in"), list):
+        return list(cond["$in"])
+    for sub in where.get("$and", []):
+        found = namespaces_of(sub)
+        if found is not None:
+            return found
+    return None
+
+
+# ── Segments ──────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class _Segment:
+    namespace: str
+    file: Path
+    dim: int
+    kind: str = "float32"
+    ids: list[str | None] = field(default_factory=list)
+    metadata: list[dict[str, Any] | None] = field(default_factory=list)
+    _matrix: np.ndarray | None = None
+
+    @property
+    def rows(self) -> int:
+        return len(self.ids)
+
+    @property
+    def live(self) -> int:
+        return sum(1 for i in self.ids if i is not None)
+
+    @property
+    def record(self) -> np.dtype:
+        return quantize.record_dtype(self.kind, self.dim)
+
+    def matrix(self) -> np.ndarray:
+        """Structured records (see quantize), memory-mapped."""
+        if self._matrix is None or self._matrix.shape[0] != self.rows:
+            if self.rows == 0:
+                self._matrix = np.empty(0, dtype=self.record)
+            else:
+                self._matrix = np.memmap(
+                    self.file, dtype=self.record, mode="r", shape=(self.rows,)
+                )
+        return self._matrix
+
+
+class NumpyVectors(VectorBackend):
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_loaded: int = 256,
+        compact_min_dead: int = 64,
+        dtype: str = "float32",
+    ) -> None:
+        quantize.record_dtype(dtype, 1)  # validate early
+        self._path = Path(path).expanduser()
+        self._dtype = dtype
+        self._max_loaded = max(1, max_loaded)
+        self._compact_min_dead = compact_min_dead
+        self._db: sqlite3.Connection | None = None
+        self._loaded: OrderedDict[str, _Segment] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pins = 0  # snapshots copying the files; compaction waits
+
+    async def initialize(self) -> None:
+        self._path.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self._path / "index.db", check_same_thread=False)
+        db.executescript(_SCHEMA)
+        columns = {c[1] for c in db.execute("PRAGMA table_info(segments)")}
+        if "dtype" not in columns:  # index created before quantized storage
+            db.execute(
+                "ALTER TABLE segments ADD COLUMN dtype TEXT NOT NULL DEFAULT 'float32'"
+            )
+        db.execute("PRAGMA journal_mode=WAL")
+        self._db = db
+        logger.info("Initialised NumPy vectors at %s", self._path)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._loaded.clear()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ── VectorBackend ─────────────────────────────────────────────────────────
+
+    async def upsert(self, id: str, embedding: list[float], metadata: dict) -> None:
+        await self.upsert_many([(id, embedding, metadata)])
+
+    async def query(
+        self, embedding: list[float], top_k: int, filters: dict | None = None
+    ) -> list[dict]:
+        return await asyncio.to_thread(self._query, embedding, top_k, filters)
+
+    async def delete(self, id: str) -> bool:
+        return await self.delete_many([id]) > 0
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(self._count)
+
+    # ── Bulk operations (used by erasure / transfer / re-indexing) ────────────
+
+    async def upsert_many(
+        self, items: list[tuple[str, list[float], dict[str, Any]]]
+    ) -> None:
+        if items:
+            await asyncio.to_thread(self._upsert_many, items)
+
+    async def delete_many(self, ids: list[str]) -> int:
+        if not ids:
+            return 0
+        return await asyncio.to_thread(self._delete_many, ids)
+
+    async def get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        return await asyncio.to_thread(self._get_embeddings, ids)
+
+    async def ids_for(self, namespace: str) -> list[str]:
+        return await asyncio.to_thread(self._ids_for, namespace)
+
+    # ── Snapshots (memory_server.snapshot; call from a worker thread) ─────────
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def pin(self) -> tuple[sqlite3.Connection, list[tuple[str, int]]]:
+        """
+        A read transaction on the sidecar DB plus (file, bytes) of every
+        segment as of that transaction. Until unpin(), segment files are only
+        appended to, so those leading bytes stay exactly as pinned.
+        """
+        with self._lock:
+            conn = sqlite3.connect(
+                self._path / "index.db", isolation_level=None, check_same_thread=False
+            )
+            conn.execute("BEGIN")
+            segments = [
+                (file, rows * quantize.record_dtype(kind, dim).itemsize)
+                for file, dim, rows, kind in conn.execute(
+                    "SELECT file, dim, rows, dtype FROM segments"
+                )
+            ]
+            self._pins += 1
+        return conn, segments
+
+    def unpin(self, conn: sqlite3.Connection) -> None:
+        conn.close()
+        with self._lock:
+            self._pins -= 1
+
+    # ── Internals (run in a worker thread, under self._lock) ──────────────────
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            raise RuntimeError("NumpyVectors not initialized")
+        return self._db
+
+    def _segment(self, namespace: str) -> _Segment | None:
+        seg = self._loaded.get(namespace)
+        if seg is not None:
+            self._loaded.move_to_end(namespace)
+            return seg
+        db = self._conn()
+        row = db.execute(
+            "SELECT file, dim, rows, dtype FROM segments WHERE namespace = ?",
+            (namespace,),
+        ).fetchone()
+        if row is None:
+            return None
+        file, dim, rows, kind = row
+        seg = _Segment(namespace, self._path / file, dim, kind)
+        seg.ids = [None] * rows
+        seg.metadata = [None] * rows
+        for vid, slot, meta in db.execute(
+            "SELECT id, slot, metadata FROM vectors WHERE namespace = ?", (namespace,)
+        ):
+            seg.ids[slot] = vid
+            seg.metadata[slot] = json.loads(meta)
+        self._loaded[namespace] = seg
+        while len(self._loaded) > self._max_loaded:
+            self._loaded.popitem(last=False)  # drops the memmap too
+        return seg
+
+    def _new_segment(self, namespace: str, dim: int) -> _Segment:
+        digest = hashlib.sha1(namespace.encode()).hexdigest()[:16]
+        seg = _Segment(namespace, self._path / f"{digest}-0.vec", dim, self._dtype)
+        seg.file.write_bytes(b"")
+        self._conn().execute(
+            "INSERT INTO segments (namespace, file, dim, rows, dtype) "
+            "VALUES (?, ?, ?, 0, ?)",
+            (namespace, seg.file.name, dim, self._dtype),
+        )
+        self._loaded[namespace] = seg
+        return seg
+
+    def _locate(self, ids: list[str]) -> dict[str, tuple[str, int]]:
+        db = self._conn()
+        found: dict[str, tuple[str, int]] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            marks = ",".join("?" for _ in chunk)
+            for vid, ns, slot in db.execute(
+                f"SELECT id, namespace, slot FROM vectors WHERE id IN ({marks})",  # noqa: S608
+                chunk,
+            ):
+                found[vid] = (ns, slot)
+        return found
+
+    def _upsert_many(
+        self, items: list[tuple[str, list[float], dict[str, Any]]]
+    ) -> None:
+        with self._lock:
+            db = self._conn()
+            old = self._locate([vid for vid, _, _ in items])
+            by_ns: dict[str, list[tuple[str, list[float], dict[str, Any]]]] = {}
+            for vid, emb, meta in items:
+                clean = {k: v for k, v in meta.items() if v is not None}
+                by_ns.setdefault(str(clean.get(NAMESPACE_KEY, "")), []).append(
+                    (vid, emb, clean)
+                )
+            touched: set[str] = set()
+            with self._transaction() as obsolete:
+                for vid, (ns, slot) in old.items():
+                    seg = self._segment(ns)
+                    if seg is not None:
+                        seg.ids[slot] = seg.metadata[slot] = None
+                    touched.add(ns)
+                for ns, group in by_ns.items():
+                    matrix = np.asarray([e for _, e, _ in group], dtype="<f4")
+                    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                    matrix /= np.where(norms == 0, 1, norms)
+                    seg = self._segment(ns) or self._new_segment(ns, matrix.shape[1])
+                    if matrix.shape[1] != seg.dim:
+                        raise ValueError(
+                            f"Embedding dim {matrix.shape[1]} != {seg.dim} for {ns}"
+                        )
+                    first = seg.rows
+                    with open(seg.file, "r+b") as f:
+                        # Drop any tail left by a write that never committed
+                        f.seek(first * seg.record.itemsize)
+                        f.write(quantize.encode(matrix, seg.kind).tobytes())
+                        f.truncate()
+                    for vid, _, meta in group:
+                        seg.ids.append(vid)
+                        seg.metadata.append(meta)
+                    db.executemany(
+                        "INSERT OR REPLACE INTO vectors "
+                        "(id, namespace, slot, metadata) VALUES (?, ?, ?, ?)",
+                        [
+                            (vid, ns, first + i, json.dumps(meta))
+                            for i, (vid, _, meta) in enumerate(group)
+                        ],
+                    )
+                    db.execute(
+                        "UPDATE segments SET rows = ? WHERE namespace = ?",
+                        (seg.rows, ns),
+                    )
+                    touched.discard(ns)
+                    obsolete += self._maybe_compact(seg)
+                for ns in touched:
+                    seg = self._segment(ns)
+                    if seg is not None:
+                        obsolete += self._maybe_compact(seg)
+
+    def _delete_many(self, ids: list[str]) -> int:
+        with self._lock:
+            db = self._conn()
+            found = self._locate(ids)
+            if not found:
+                return 0
+            with self._transaction() as obsolete:
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start : start + 500]
+                    marks = ",".join("?" for _ in chunk)
+                    db.execute(
+                        f"DELETE FROM vectors WHERE id IN ({marks})",  # noqa: S608
+                        chunk,
+                    )
+                for ns in {ns for ns, _ in found.values()}:
+                    seg = self._segment(ns)
+                    if seg is None:
+                        continue
+                    for vid, (vns, slot) in found.items():
+                        if vns == ns:
+                            seg.ids[slot] = seg.metadata[slot] = None
+                    obsolete += self._maybe_compact(seg)
+            return len(found)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[list[Path]]:
+        """
+        One index transaction. Files appended to the yielded list are unlinked
+        once it commits; if it rolls back they stay, and loaded segments are
+        dropped so they reload as committed.
+        """
+        obsolete: list[Path] = []
+        try:
+            with self._conn():
+                yield obsolete
+        except BaseException:
+            self._loaded.clear()
+            raise
+        for file in obsolete:
+            file.unlink(missing_ok=True)
+
+    def _maybe_compact(self, seg: _Segment) -> list[Path]:
+        """
+        Rewrite `seg` without its dead rows, inside the caller's transaction.
+        Returns the files that are obsolete once it commits; unlinking them
+        any earlier would leave a rolled-back (or crashed) index pointing at
+        a missing file.
+        """
+        live = seg.live
+        dead = seg.rows - live
+        if dead < self._compact_min_dead or dead <= live or self._pins:
+            return []
+        db = self._conn()
+        keep = [slot for slot, vid in enumerate(seg.ids) if vid is not None]
+        data = np.array(seg.matrix()[keep])
+        if seg.kind != self._dtype:
+            data = quantize.encode(quantize.decode(data), self._dtype)
+            seg.kind = self._dtype
+        stem, gen = seg.file.stem.rsplit("-", 1)
+        new_file = seg.file.with_name(f"{stem}-{int(gen) + 1}{seg.file.suffix}")
+        new_file.write_bytes(data.tobytes())
+        old_file = seg.file
+        seg.ids = [seg.ids[s] for s in keep]
+        seg.metadata = [seg.metadata[s] for s in keep]
+        seg.file = new_file
+        seg._matrix = None
+        db.executemany(
+            "UPDATE vectors SET slot = ? WHERE id = ?",
+            [(slot, vid) for slot, vid in enumerate(seg.ids)],
+        )
+        db.execute(
+            "UPDATE segments SET file = ?, rows = ?, dtype = ? WHERE namespace = ?",
+            (new_file.name, seg.rows, seg.kind, seg.namespace),
+        )
+        logger.debug("Compacted %s: %d dead rows dropped", seg.namespace, dead)
+        if live == 0:
+            db.execute("DELETE FROM segments WHERE namespace = ?", (seg.namespace,))
+            self._loaded.pop(seg.namespace, None)
+            return [old_file, new_file]
+        return [old_file]
+
+    def _query(
+        self, embedding: list[float], top_k: int, filters: dict | None
+    ) -> list[dict]:
+        q = np.asarray(embedding, dtype="<f4")
+        norm = np.linalg.norm(q)
+        if norm == 0 or top_k <= 0:
+            return []
+        q /= norm
+        with self._lock:
+            namespaces = namespaces_of(filters)
+            if namespaces is None:
+                namespaces = [
+                    r[0] for r in self._conn().execute("SELECT namespace FROM segments")
+                ]
+            found: list[dict] = []
+            for name in namespaces:
+                seg = self._segment(name)
+                if seg is None or seg.rows == 0:
+                    continue
+                found.extend(self._search(seg, q, top_k, filters))
+        found.sort(key=lambda r: r["score"], reverse=True)
+        return found[:top_k]
+
+    @staticmethod
+    def _search(
+        seg: _Segment, q: np.ndarray, top_k: int, filters: dict | None
+    ) -> list[dict]:
+        sims = quantize.similarities(seg.matrix(), q)
+        alive = np.fromiter(
+            (m is not None and matches(m, filters) for m in seg.metadata),
+            dtype=bool,
+            count=seg.rows,
+        )
+        candidates = np.flatnonzero(alive)
+        if candidates.size == 0:
+            return []
+        scores = sims[candidates]
+        k = min(top_k, candidates.size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            {
+                "id": seg.ids[candidates[i]],
+                "score": float(max(0.0, min(1.0, (1.0 + scores[i]) / 2.0))),
+                "metadata": seg.metadata[candidates[i]],
+            }
+            for i in best
+        ]
+
+    def _get_embeddings(self, ids: list[str]) -> dict[str, list[float]]:
+        with self._lock:
+            out: dict[str, list[float]] = {}
+            for vid, (ns, slot) in self._locate(ids).items():
+                seg = self._segment(ns)
+                if seg is not None:
+                    out[vid] = quantize.decode(seg.matrix()[slot : slot + 1])[
+                        0
+                    ].tolist()
+            return out
+
+    def _ids_for(self, namespace: str) -> list[str]:
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT id FROM vectors WHERE namespace = ?", (namespace,)
+            )
+            return [r[0] for r in rows]
+
+    def _count(self) -> int:
+        with self._lock:
+            return self._conn().execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
@@ -0,0 +1,210 @@
+"""
+In-process working-memory buffer for hot sessions.
+
+plyra-memory's WorkingMemoryLayer.add() SELECTs the whole session and
+re-estimates every entry's tokens to decide whether to evict, then deletes
+and inserts; every recall reads the session again. Here each hot session
+is kept in a SessionBuffer:
+
+  entries   insertion-ordered dict (the order get_working_entries returns)
+  heap      (importance, created_at, id) — the eviction candidate is on top
+  tokens    running token total, updated on insert / evict
+
+so add and evict are O(log n) and reads never touch SQLite. Writes go
+through to the shard's store in the background, in order, as tasks on the
+Memory's _bg_tasks (the shard lease is held until they land). A session
+that isn't buffered is loaded from disk on first use; the least recently
+used sessions are dropped beyond working_buffer_sessions. A dropped
+session's writes may still be in flight; loading it again waits for them.
+A write-through that fails drops the session, so it is re-read from disk.
+
+The buffer is per process. Erasure, retention and import change working
+entries behind its back, so they call invalidate() for their scope.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import heapq
+import logging
+from collections import OrderedDict
+from typing import Any
+
+from plyra_memory.layers.working import WorkingMemoryLayer
+from plyra_memory.schema import WorkingEntry, WorkingMemoryState
+
+logger = logging.getLogger(__name__)
+
+_estimate_tokens = WorkingMemoryLayer._estimate_tokens
+
+
+class SessionBuffer:
+    __slots__ = ("agent_id", "entries", "heap", "tokens", "tail")
+
+    def __init__(self, agent_id: str, entries: list[WorkingEntry]) -> None:
+        self.agent_id = agent_id
+        self.entries: dict[str, WorkingEntry] = {}
+        self.heap: list[tuple[float, float, str]] = []
+        self.tokens = 0
+        self.tail: asyncio.Task | None = None  # last write-through, for ordering
+        for entry in entries:
+            self.insert(entry)
+
+    def insert(self, entry: WorkingEntry) -> None:
+        self.entries[entry.id] = entry
+        heapq.heappush(
+            self.heap, (entry.importance, entry.created_at.timestamp(), entry.id)
+        )
+        self.tokens += _estimate_tokens(entry.content)
+
+    def evict(self) -> WorkingEntry:
+        """Remove the least important (oldest on ties) entry."""
+        _, _, entry_id = heapq.heappop(self.heap)
+        entry = self.entries.pop(entry_id)
+        self.tokens -= _estimate_tokens(entry.content)
+        return entry
+
+
+class WorkingSetCache:
+    """Shared LRU of SessionBuffers, keyed by session_id."""
+
+    def __init__(self, max_sessions: int = 1024) -> None:
+        self._max = max(1, max_sessions)
+        self._sessions: OrderedDict[str, SessionBuffer] = OrderedDict()
+        self._loading: dict[str, asyncio.Future[SessionBuffer]] = {}
+        # session_id → last write-through of a dropped buffer, until it lands
+        self._draining: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def buffer(self, store: Any, session_id: str, agent_id: str) -> SessionBuffer:
+        buf = self._sessions.get(session_id)
+        if buf is not None:
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return buf
+        loading = self._loading.get(session_id)
+        if loading is not None:  # someone else is reading it from disk
+            return await asyncio.shield(loading)
+
+        self.misses += 1
+        fut: asyncio.Future[SessionBuffer] = asyncio.get_running_loop().create_future()
+        self._loading[session_id] = fut
+        try:
+            draining = self._draining.get(session_id)
+            if draining is not None:
+                await asyncio.wait({draining})
+            buf = SessionBuffer(agent_id, await store.get_working_entries(session_id))
+        except BaseException as exc:
+            fut.set_exception(exc)
+            fut.exception()  # retrieved; waiters re-raise it
+            raise
+        finally:
+            self._loading.pop(session_id, None)
+        fut.set_result(buf)
+        self._sessions[session_id] = buf
+        while len(self._sessions) > self._max:
+            self._drop(next(iter(self._sessions)))
+        return buf
+
+    def invalidate(self, prefix: str) -> int:
+        """Forget buffered sessions in `prefix` and every namespace under it."""
+        stale = [
+            sid
+            for sid, buf in self._sessions.items()
+            if buf.agent_id == prefix or buf.agent_id.startswith(prefix + ":")
+        ]
+        for sid in stale:
+            self._drop(sid)
+        return len(stale)
+
+    def discard(self, session_id: str, buf: SessionBuffer) -> None:
+        """Drop `buf` if it is still the buffered copy of `session_id`."""
+        if self._sessions.get(session_id) is buf:
+            self._drop(session_id)
+
+    def _drop(self, session_id: str) -> None:
+        buf = self._sessions.pop(session_id)
+        if buf.tail is not None and not buf.tail.done():
+            self._draining[session_id] = buf.tail
+            buf.tail.add_done_callback(functools.partial(self._drained, session_id))
+
+    def _drained(self, session_id: str, task: asyncio.Task) -> None:
+        if self._draining.get(session_id) is task:
+            del self._draining[session_id]
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "entries": sum(len(b.entries) for b in self._sessions.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class BufferedWorkingLayer(WorkingMemoryLayer):
+    """WorkingMemoryLayer for one Memory, backed by the shared cache."""
+
+    def __init__(self, cache: WorkingSetCache, memory: Any) -> None:
+        super().__init__(memory._store, memory._config)
+        self._cache = cache
+        self._agent_id = memory._agent_id
+        self._bg_tasks: set[asyncio.Task] = memory._bg_tasks
+
+    @classmethod
+    def install(cls, cache: WorkingSetCache, memory: Any) -> None:
+        """Swap the layer into an initialized Memory (and its retrieval engine)."""
+        layer = cls(cache, memory)
+        memory.working = layer
+        memory._retrieval._working = layer
+
+    async def add(self, entry: WorkingEntry) -> WorkingEntry:
+        buf = await self._cache.buffer(self._store, entry.session_id, self._agent_id)
+        evicted = []
+        while len(buf.entries) >= self._config.working_max_entries:
+            evicted.append(buf.evict())
+        buf.insert(entry)
+        self._write_through(buf, entry, evicted)
+        return entry
+
+    async def get(self, session_id: str) -> WorkingMemoryState:
+        buf = await self._cache.buffer(self._store, session_id, self._agent_id)
+        return WorkingMemoryState(
+            session_id=session_id,
+            entries=list(buf.entries.values()),
+            total_tokens=buf.tokens,
+            max_entries=self._config.working_max_entries,
+        )
+
+    async def clear(self, session_id: str) -> int:
+        buf = await self._cache.buffer(self._store, session_id, self._agent_id)
+        buf.entries.clear()
+        buf.heap.clear()
+        buf.tokens = 0
+        if buf.tail is not None:
+            await asyncio.gather(buf.tail, return_exceptions=True)
+        return await self._store.delete_working_entries(session_id)
+
+    def _write_through(
+        self, buf: SessionBuffer, entry: WorkingEntry, evicted: list[WorkingEntry]
+    ) -> None:
+        store, cache, previous = self._store, self._cache, buf.tail
+
+        async def _persist() -> None:
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+            try:
+                for old in evicted:
+                    await store.delete_working_entry_by_id(old.id)
+                await store.save_working_entry(entry)
+            except Exception:
+                logger.exception("Working memory write-through failed")
+                cache.discard(entry.session_id, buf)
+                raise
+
+        task = asyncio.create_task(_persist())
+        buf.tail = task
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
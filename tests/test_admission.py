@@ -0,0 +1,132 @@
+"""Tests for per-route-class admission control and fair queuing."""
+
+import asyncio
+
+import pytest
+
+from memory_server.admission import Limiter, OverloadedError, route_class
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_route_classes():
+    assert route_class("POST", "/v1/remember") == "write"
+    assert route_class("POST", "/v1/context") == "read"
+    assert route_class("GET", "/v1/jobs/abc") == "read"
+    assert route_class("DELETE", "/admin/keys/k1") == "admin"
+    assert route_class("GET", "/health") is None
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_and_deadline():
+    lim = Limiter(limit=1, queue_size=1, fair=False)
+    await lim.acquire("a", 1.0)
+    waiter = asyncio.create_task(lim.acquire("a", 1.0))
+    await _settle()
+    with pytest.raises(OverloadedError, match="queue full"):
+        await lim.acquire("b", 1.0)
+
+    lim.release()  # slot passes to the waiter
+    await waiter
+    assert lim.stats == {"limit": 1, "active": 1, "queued": 0, "rejected": 1}
+
+    with pytest.raises(OverloadedError, match="timeout"):
+        await lim.acquire("a", 0.01)
+    assert lim.stats["queued"] == 0
+    lim.release()
+    assert lim.stats["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_fair_queue_round_robins_and_evicts_the_noisy_tenant():
+    lim = Limiter(limit=1, queue_size=3, fair=True)
+    await lim.acquire("noisy", 1.0)
+    order: list[str] = []
+
+    async def request(tenant: str, tag: str):
+        try:
+            await lim.acquire(tenant, 1.0)
+        except OverloadedError:
+            order.append(f"{tag}:503")
+            return
+        order.append(tag)
+        await asyncio.sleep(0)
+        lim.release()
+
+    tasks = [asyncio.create_task(request("noisy", f"n{i}")) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(request("quiet", "q0")))
+    await _settle()
+    assert order == ["n2:503"]  # the newcomer took the noisy tenant's last slot
+
+    lim.release()
+    await asyncio.gather(*tasks)
+    assert order == ["n2:503", "n0", "q0", "n1"]
+
+
+@pytest.mark.asyncio
+async def test_eviction_skips_a_waiter_that_was_cancelled():
+    lim = Limiter(limit=1, queue_size=3, fair=True)
+    await lim.acquire("noisy", 1.0)
+    order: list[str] = []
+
+    async def request(tenant: str, tag: str):
+        try:
+            await lim.acquire(tenant, 1.0)
+        except OverloadedError:
+            order.append(f"{tag}:503")
+            return
+        order.append(tag)
+        await asyncio.sleep(0)
+        lim.release()
+
+    tasks = [asyncio.create_task(request("noisy", f"n{i}")) for i in range(3)]
+    await _settle()
+    quiet = asyncio.create_task(request("quiet", "q0"))
+    # n2's future is cancelled, but n2 hasn't yet run to leave the queue
+    lim._waiting["noisy"][-1].cancel()
+    await _settle()
+    assert order == ["n1:503"]
+
+    lim.release()
+    await asyncio.gather(quiet, *tasks[:2])
+    assert tasks[2].cancelled()
+    assert order == ["n1:503", "n0", "q0"]
+    assert lim.stats["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_overloaded_route_gets_503_with_retry_after(config, tmp_path):
+    from httpx import ASGITransport, AsyncClient
+
+    from memory_server.router import build_app
+
+    cfg = config.model_copy(
+        update={"admission_read_limit": 1, "admission_queue_size": 0}
+    )
+    app = build_app(cfg)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.post(
+                "/admin/keys",
+                json={"workspace_id": "ws", "label": "t", "env": "test"},
+                headers={"Authorization": "Bearer plm_admin_test_key"},
+            )
+            headers = {"Authorization": f"Bearer {resp.json()['key']}"}
+
+            limiter = app.state.admission.limiter("read")
+            await limiter.acquire("someone-else", 1.0)
+            resp = await client.post("/v1/recall", json={"query": "x"}, headers=headers)
+            assert resp.status_code == 503
+            assert resp.headers["Retry-After"] == "1"
+
+            limiter.release()
+            resp = await client.post("/v1/recall", json={"query": "x"}, headers=headers)
+            assert resp.status_code == 200
+            health = (await client.get("/health")).json()
+            assert health["admission"]["read"]["rejected"] == 1
@@ -0,0 +1,132 @@
+"""Tests for cluster mode: the hash ring, forwarding and redirect hints."""
+
+from contextlib import AsyncExitStack
+
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from memory_server.cluster import HashRing
+from memory_server.namespace import namespace_id
+from memory_server.router import build_app
+
+A, B = "http://node-a", "http://node-b"
+
+
+def test_ring_spreads_keys_and_moves_only_a_leaving_nodes_share():
+    nodes = ["http://n1", "http://n2", "http://n3"]
+    keys = [namespace_id("acme", f"user{i}", "agent") for i in range(3000)]
+    ring = HashRing(nodes)
+    owners = {k: ring.owner(k) for k in keys}
+    for node in nodes:
+        assert 700 < list(owners.values()).count(node) < 1300
+
+    smaller = HashRing(nodes[:2])
+    moved = [k for k in keys if smaller.owner(k) != owners[k]]
+    assert moved and all(owners[k] == "http://n3" for k in moved)
+    assert HashRing([]).owner("anything") is None
+
+
+@pytest.fixture
+async def cluster(config, tmp_path):
+    """Two nodes with their own data, sharing the key store."""
+    apps = {}
+    for url, name in ((A, "a"), (B, "b")):
+        apps[url] = build_app(
+            config.model_copy(
+                update={
+                    "store_url": str(tmp_path / name / "memory.db"),
+                    "vectors_url": str(tmp_path / name / "vectors"),
+                    "cluster_mode": "proxy",
+                    "cluster_self_url": url,
+                    "cluster_nodes": [A, B],
+                }
+            )
+        )
+    async with AsyncExitStack() as stack:
+        for app in apps.values():
+            await stack.enter_async_context(app.router.lifespan_context(app))
+        mounts = {url: ASGITransport(app=app) for url, app in apps.items()}
+        for app in apps.values():
+            await app.state.cluster._client.aclose()
+            app.state.cluster._client = AsyncClient(mounts=mounts)
+        clients = {
+            url: await stack.enter_async_context(
+                AsyncClient(transport=ASGITransport(app=app), base_url=url)
+            )
+            for url, app in apps.items()
+        }
+        resp = await clients[A].post(
+            "/admin/keys",
+            json={"workspace_id": "test-workspace", "env": "test"},
+            headers={"Authorization": f"Bearer {config.admin_api_key}"},
+        )
+        headers = {"Authorization": f"Bearer {resp.json()['key']}"}
+        yield apps, clients, headers
+
+
+def _agent_owned_by(app, url):
+    for i in range(100):
+        ns = namespace_id("test-workspace", None, f"agent{i}")
+        if app.state.cluster.owner(ns) == url:
+            return f"agent{i}"
+
+
+@pytest.mark.asyncio
+async def test_proxy_mode_forwards_to_the_owner(cluster):
+    apps, clients, headers = cluster
+    agent = _agent_owned_by(apps[A], B)
+
+    resp = await clients[A].post(
+        "/v1/remember",
+        json={"content": "user flies to lisbon", "agent_id": agent},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.headers["X-Plyra-Node"] == B
+    assert apps[A].state.cluster.forwarded == 1
+
+    # Stored on the owner only
+    query = {"query": "user flies to lisbon", "agent_id": agent}
+    on_b = await clients[B].post("/v1/recall", json=query, headers=headers)
+    assert on_b.headers["X-Plyra-Node"] == B
+    assert "user flies to lisbon" in [r["content"] for r in on_b.json()["results"]]
+    local = await clients[A].post(
+        "/v1/recall", json=query, headers={**headers, "X-Plyra-Forwarded": B}
+    )
+    assert local.headers["X-Plyra-Node"] == A
+    assert local.json()["results"] == []
+
+    mine = _agent_owned_by(apps[A], A)
+    stats = await clients[A].get(
+        "/v1/stats", params={"agent_id": mine}, headers=headers
+    )
+    assert stats.headers["X-Plyra-Node"] == A
+    assert apps[A].state.cluster.forwarded == 1
+
+
+@pytest.mark.asyncio
+async def test_redirect_hint_and_local_fallback(cluster):
+    apps, clients, headers = cluster
+    agent = _agent_owned_by(apps[A], B)
+    body = {"content": "user is allergic to nuts", "agent_id": agent}
+
+    apps[A].state.cluster.mode = "redirect"
+    resp = await clients[A].post("/v1/remember", json=body, headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["X-Plyra-Node"] == A
+    assert resp.headers["X-Plyra-Owner"] == B
+
+    def unreachable(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    apps[A].state.cluster.mode = "proxy"
+    apps[A].state.cluster._client = AsyncClient(
+        transport=httpx.MockTransport(unreachable)
+    )
+    resp = await clients[A].post("/v1/remember", json=body, headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["X-Plyra-Node"] == A
+    assert apps[A].state.cluster.forward_errors == 1
+    health = (await clients[A].get("/health")).json()
+    assert health["cluster"]["members"] == [A, B]
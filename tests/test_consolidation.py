@@ -0,0 +1,100 @@
+"""Tests for the background consolidation scheduler."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from memory_server.consolidation import ConsolidationScheduler
+
+
+class _Promoter:
+    def __init__(self, delay: float = 0.0):
+        self.calls: list[str] = []
+        self.delay = delay
+
+    async def check_and_promote(self, agent_id):
+        self.calls.append(agent_id)
+        await asyncio.sleep(self.delay)
+        return ["fact"]
+
+
+class _Summarizer:
+    def __init__(self):
+        self.calls: list[str] = []
+
+    async def maybe_summarize(self, session_id, agent_id):
+        self.calls.append(agent_id)
+        return True
+
+
+def _scheduler(config, promoter, summarizer, **overrides):
+    cfg = config.model_copy(
+        update={"consolidation_delay_s": 0, "consolidation_jitter_s": 0, **overrides}
+    )
+
+    @asynccontextmanager
+    async def opener(workspace_id, namespace, *, write=False):
+        yield SimpleNamespace(
+            _agent_id=namespace,
+            _session_id="s",
+            _promoter=promoter,
+            _summarizer=summarizer,
+        )
+
+    return ConsolidationScheduler(cfg, opener)
+
+
+@pytest.mark.asyncio
+async def test_dirty_namespaces_are_coalesced_and_consolidated(config):
+    promoter, summarizer = _Promoter(), _Summarizer()
+    sched = _scheduler(config, promoter, summarizer)
+    sched.mark("ws", "ws_ws:a_1", summarize=False)
+    sched.mark("ws", "ws_ws:a_1")  # a write upgrades it to summarize too
+    sched.mark("ws", "ws_ws:a_2", summarize=False)
+    assert sched.stats["backlog"] == 2
+
+    assert await sched.run_due() == 2
+    assert sorted(promoter.calls) == ["ws_ws:a_1", "ws_ws:a_2"]
+    assert summarizer.calls == ["ws_ws:a_1"]
+    stats = sched.stats
+    assert stats["backlog"] == 0
+    assert stats["promoted"] == 2 and stats["summarized"] == 1
+
+
+@pytest.mark.asyncio
+async def test_not_due_until_delay_and_budget_requeues(config):
+    promoter = _Promoter(delay=1.0)
+    sched = _scheduler(config, promoter, _Summarizer(), consolidation_delay_s=60)
+    sched.mark("ws", "ws_ws")
+    assert await sched.run_due() == 0
+
+    sched._config = sched._config.model_copy(
+        update={"consolidation_budget_s": 0.01, "consolidation_delay_s": 0}
+    )
+    assert await sched.run_due(force=True) == 1
+    stats = sched.stats
+    assert stats["timeouts"] == 1 and stats["backlog"] == 1
+
+
+@pytest.mark.asyncio
+async def test_recall_access_leads_to_promotion(app, client, auth_headers):
+    await client.post(
+        "/v1/remember",
+        json={"content": "user deploys on Fridays", "agent_id": "bot"},
+        headers=auth_headers,
+    )
+    for _ in range(3):  # semantic_promotion_threshold accesses
+        await client.post(
+            "/v1/recall",
+            json={"query": "user deploys on Fridays", "agent_id": "bot"},
+            headers=auth_headers,
+        )
+    sched = app.state.consolidation
+    assert sched.stats["backlog"] == 1
+
+    await sched.run_due(force=True)
+    assert sched.stats["promoted"] >= 1
+    health = (await client.get("/health")).json()
+    assert health["consolidation"]["backlog"] == 0
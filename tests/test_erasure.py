@@ -0,0 +1,153 @@
+"""Tests for scoped erasure."""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from memory_server.namespace import scope_clause
+
+
+def _count(config, table: str, prefix: str) -> int:
+    clause, params = scope_clause("agent_id", prefix)
+    conn = sqlite3.connect(Path(config.store_url))
+    try:
+        row = conn.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE {clause}", params
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0]
+
+
+async def _remember(client, headers, content, **ids):
+    resp = await client.post(
+        "/v1/remember", json={"content": content, **ids}, headers=headers
+    )
+    assert resp.status_code == 200
+
+
+def test_scope_clause_matches_nested_namespaces_only():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (agent_id TEXT)")
+    conn.executemany(
+        "INSERT INTO t VALUES (?)",
+        [("ws_a:u_1",), ("ws_a:u_1:a_x",), ("ws_a:u_10",), ("ws_a",), ("ws_ab",)],
+    )
+    clause, params = scope_clause("agent_id", "ws_a:u_1")
+    rows = conn.execute(f"SELECT agent_id FROM t WHERE {clause}", params).fetchall()
+    assert sorted(r[0] for r in rows) == ["ws_a:u_1", "ws_a:u_1:a_x"]
+
+
+@pytest.mark.asyncio
+async def test_delete_user_scope_runs_as_job(app, client, auth_headers, config):
+    await _remember(client, auth_headers, "alice likes tea", user_id="alice")
+    await _remember(
+        client, auth_headers, "alice uses vim", user_id="alice", agent_id="coder"
+    )
+    await _remember(client, auth_headers, "bob likes coffee", user_id="bob")
+
+    resp = await client.request(
+        "DELETE",
+        "/v1/memory",
+        json={"user_id": "alice", "layer": "all"},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+
+    job = await app.state.jobs.wait(job_id)
+    assert job.status == "done"
+
+    status = await client.get(f"/v1/jobs/{job_id}", headers=auth_headers)
+    assert status.status_code == 200
+    data = status.json()
+    assert data["status"] == "done"
+    assert data["progress"]["episodic"] == 2
+
+    alice = "ws_test-workspace:u_alice"
+    assert _count(config, "episodes", alice) == 0
+    assert _count(config, "working_entries", alice) == 0
+    assert _count(config, "episodes", "ws_test-workspace:u_bob") == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_single_layer(app, client, auth_headers, config):
+    await _remember(client, auth_headers, "carol prefers dark mode", user_id="carol")
+
+    resp = await client.request(
+        "DELETE",
+        "/v1/memory",
+        json={"user_id": "carol", "layer": "working"},
+        headers=auth_headers,
+    )
+    await app.state.jobs.wait(resp.json()["job_id"])
+
+    carol = "ws_test-workspace:u_carol"
+    assert _count(config, "working_entries", carol) == 0
+    assert _count(config, "episodes", carol) == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_without_layer_clears_working_memory_only(
+    app, client, auth_headers, config
+):
+    await _remember(client, auth_headers, "dave reads sci-fi", user_id="dave")
+
+    resp = await client.request(
+        "DELETE", "/v1/memory", json={"user_id": "dave"}, headers=auth_headers
+    )
+    assert "Erasing working memory" in resp.json()["message"]
+    await app.state.jobs.wait(resp.json()["job_id"])
+
+    dave = "ws_test-workspace:u_dave"
+    assert _count(config, "working_entries", dave) == 0
+    assert _count(config, "episodes", dave) == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_layer_list(app, client, auth_headers, config):
+    await _remember(client, auth_headers, "erin runs at dawn", user_id="erin")
+
+    resp = await client.request(
+        "DELETE",
+        "/v1/memory",
+        json={"user_id": "erin", "layer": ["episodic", "working"]},
+        headers=auth_headers,
+    )
+    assert "Erasing working, episodic memory" in resp.json()["message"]
+    await app.state.jobs.wait(resp.json()["job_id"])
+
+    erin = "ws_test-workspace:u_erin"
+    assert _count(config, "working_entries", erin) == 0
+    assert _count(config, "episodes", erin) == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_invalid_layer_returns_400(client, auth_headers):
+    resp = await client.request(
+        "DELETE", "/v1/memory", json={"layer": "everything"}, headers=auth_headers
+    )
+    assert resp.status_code == 400
+    resp = await client.request(
+        "DELETE", "/v1/memory", json={"layer": []}, headers=auth_headers
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_job_not_visible_to_other_workspace(app, client, auth_headers, config):
+    resp = await client.request("DELETE", "/v1/memory", json={}, headers=auth_headers)
+    job_id = resp.json()["job_id"]
+    await app.state.jobs.wait(job_id)
+
+    other = await client.post(
+        "/admin/keys",
+        json={"workspace_id": "someone-else", "env": "test"},
+        headers={"Authorization": f"Bearer {config.admin_api_key}"},
+    )
+    status = await client.get(
+        f"/v1/jobs/{job_id}",
+        headers={"Authorization": f"Bearer {other.json()['key']}"},
+    )
+    assert status.status_code == 404
@@ -0,0 +1,92 @@
+"""Tests for fact extraction status and wait_for_facts_ms."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from memory_server.extraction import ExtractionTracker
+
+
+@pytest.mark.asyncio
+async def test_remember_waits_for_facts(client, auth_headers, config):
+    resp = await client.post(
+        "/v1/remember",
+        json={"content": "I like green tea", "wait_for_facts_ms": 2000},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    extraction = data["extraction"]
+    assert extraction["extraction_id"] == data["extraction_id"]
+    assert extraction["status"] == "done"
+    assert len(extraction["fact_ids"]) == 1
+
+    # Read-your-writes: the fact is there on the next recall
+    recall = await client.post(
+        "/v1/recall",
+        json={"query": "user prefers green tea", "layers": ["semantic"]},
+        headers=auth_headers,
+    )
+    assert [r["source_id"] for r in recall.json()["results"]] == extraction["fact_ids"]
+
+    status = await client.get(
+        f"/v1/extractions/{data['extraction_id']}", headers=auth_headers
+    )
+    assert status.json()["status"] == "done"
+
+    other = await client.post(
+        "/admin/keys",
+        json={"workspace_id": "workspace-other", "env": "test"},
+        headers={"Authorization": f"Bearer {config.admin_api_key}"},
+    )
+    hidden = await client.get(
+        f"/v1/extractions/{data['extraction_id']}",
+        headers={"Authorization": f"Bearer {other.json()['key']}"},
+    )
+    assert hidden.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_remember_without_wait_returns_extraction_id(client, auth_headers):
+    resp = await client.post(
+        "/v1/remember", json={"content": "it is raining"}, headers=auth_headers
+    )
+    data = resp.json()
+    assert data["facts_queued"] is True
+    assert data["extraction_id"]
+    assert data["extraction"] is None
+
+    status = await client.get(
+        f"/v1/extractions/{data['extraction_id']}",
+        params={"wait_ms": 2000},
+        headers=auth_headers,
+    )
+    assert status.json()["status"] == "done"
+    assert status.json()["fact_ids"] == []
+
+
+@pytest.mark.asyncio
+async def test_tracker_times_out_and_records_failures():
+    gate = asyncio.Event()
+
+    async def extract(text):
+        await gate.wait()
+        raise RuntimeError("extractor unavailable")
+
+    memory = SimpleNamespace(_agent_id="ws_w:a_1", _extract_and_learn=extract)
+    tracker = ExtractionTracker()
+    entry = tracker.track(memory, "w", "text")
+    task = asyncio.create_task(memory._extract_and_learn("text"))
+
+    await tracker.wait(entry, 20)
+    assert entry.status == "running"
+
+    gate.set()
+    await tracker.wait(entry, 1000)
+    assert entry.status == "failed"
+    assert entry.error == "extractor unavailable"
+    assert entry.finished_at is not None
+    with pytest.raises(RuntimeError):
+        await task
+    assert tracker.get("other", entry.extraction_id) is None
@@ -0,0 +1,112 @@
+"""Tests for Idempotency-Key replay and content-hash dedup on /v1/remember."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from memory_server.idempotency import DedupWindow, IdempotencyStore, KeyReusedError
+from memory_server.router import build_app
+
+
+@pytest.mark.asyncio
+async def test_store_replays_and_waits_for_inflight():
+    store = IdempotencyStore(ttl_s=60)
+    assert await store.begin("ws", "k1", "body") is None
+    retry = asyncio.create_task(store.begin("ws", "k1", "body"))
+    await asyncio.sleep(0)
+    assert not retry.done()  # waits for the original
+
+    store.finish("ws", "k1", {"episode_id": "e1"})
+    assert await retry == {"episode_id": "e1"}
+    with pytest.raises(KeyReusedError):
+        await store.begin("ws", "k1", "other body")
+    assert await store.begin("other-ws", "k1", "body") is None
+
+    store.abort("other-ws", "k1")  # a failed request can be retried
+    assert await store.begin("other-ws", "k1", "body") is None
+
+
+@pytest.mark.asyncio
+async def test_idempotency_key_replays_remember(client, auth_headers):
+    headers = {**auth_headers, "Idempotency-Key": "retry-123"}
+    body = {"content": "user switched to the annual plan"}
+
+    first = await client.post("/v1/remember", json=body, headers=headers)
+    with patch("plyra_memory.Memory.remember") as remember:
+        again = await client.post("/v1/remember", json=body, headers=headers)
+        remember.assert_not_called()
+    assert again.json() == first.json()
+    assert again.headers["Idempotent-Replayed"] == "true"
+
+    clash = await client.post(
+        "/v1/remember", json={"content": "something else"}, headers=headers
+    )
+    assert clash.status_code == 422
+
+
+@pytest_asyncio.fixture
+async def dedup_client(config):
+    app = build_app(config.model_copy(update={"remember_dedup_window_s": 60}))
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as c:
+            resp = await c.post(
+                "/admin/keys",
+                json={"workspace_id": "ws", "label": "t", "env": "test"},
+                headers={"Authorization": "Bearer plm_admin_test_key"},
+            )
+            yield c, {"Authorization": f"Bearer {resp.json()['key']}"}
+
+
+@pytest.mark.asyncio
+async def test_dedup_window_skips_repeat_content(dedup_client):
+    client, headers = dedup_client
+    body = {"content": "user prefers email over phone", "agent_id": "a1"}
+
+    first = (await client.post("/v1/remember", json=body, headers=headers)).json()
+    with patch("plyra_memory.Memory.remember") as remember:
+        again = await client.post("/v1/remember", json=body, headers=headers)
+        remember.assert_not_called()
+    again = again.json()
+    assert again["episode_id"] == first["episode_id"]
+    assert again["deduplicated"] and not again["facts_queued"]
+
+    other = await client.post(
+        "/v1/remember", json={**body, "agent_id": "a2"}, headers=headers
+    )
+    assert other.json()["deduplicated"] is False
+
+
+@pytest.mark.asyncio
+async def test_erasure_forgets_deduplicated_content(dedup_client):
+    client, headers = dedup_client
+    body = {"content": "user prefers email over phone", "user_id": "u1"}
+    await client.post("/v1/remember", json=body, headers=headers)
+
+    resp = await client.request(
+        "DELETE", "/v1/memory", json={"user_id": "u1"}, headers=headers
+    )
+    job_id = resp.json()["job_id"]
+    for _ in range(50):
+        job = (await client.get(f"/v1/jobs/{job_id}", headers=headers)).json()
+        if job["status"] == "done":
+            break
+        await asyncio.sleep(0.02)
+    assert job["status"] == "done"
+
+    again = await client.post("/v1/remember", json=body, headers=headers)
+    assert again.json()["deduplicated"] is False
+
+
+def test_dedup_invalidate_drops_the_scope_and_below():
+    window = DedupWindow(60)
+    for ns in ("ws_a", "ws_a:u_1", "ws_ab", "ws_b:u_1"):
+        window.put(ns, "same text", {"episode_id": ns})
+    assert window.invalidate("ws_a") == 2
+    assert window.get("ws_a:u_1", "same text") is None
+    assert window.get("ws_ab", "same text") == {"episode_id": "ws_ab"}
+    assert window.get("ws_b:u_1", "same text") is not None
@@ -0,0 +1,165 @@
+"""Tests for the FTS5 lexical index and fused recall."""
+
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from plyra_memory import MemoryConfig
+from plyra_memory.schema import Episode, EpisodeEvent
+
+from memory_server.lexical import match_expression
+from memory_server.router import build_app
+from memory_server.storage.pooled import PooledSQLiteStore
+
+_CONTENTS = [
+    "The user prefers dark mode in every editor",
+    "Ticket INC-88231 was escalated to the database team",
+    "The user lives in Lisbon and works remotely",
+]
+
+
+@pytest.fixture
+def config(config):
+    return config.model_copy(update={"lexical_enabled": True})
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    s = PooledSQLiteStore(
+        str(tmp_path / "memory.db"), MemoryConfig(), lexical_index=True
+    )
+    await s.initialize()
+    yield s
+    await s.close()
+
+
+def _episode(content: str, agent_id: str = "ws_a") -> Episode:
+    return Episode(
+        session_id="s1",
+        agent_id=agent_id,
+        event=EpisodeEvent.AGENT_RESPONSE,
+        content=content,
+    )
+
+
+def test_match_expression_quotes_operators():
+    assert match_expression('ERR-4021 NOT "x"') == '"ERR-4021" OR "NOT" OR "x"'
+    assert match_expression("  ?! ") is None
+
+
+@pytest.mark.asyncio
+async def test_search_finds_identifier_in_namespace(store):
+    hit = _episode("Customer reported ERR-4021 after the upgrade")
+    await store.save_episode(hit)
+    await store.save_episode(_episode("Customer asked about billing"))
+    await store.save_episode(_episode("ERR-4021 again", agent_id="ws_b"))
+
+    hits = await store.lexical_search("ERR-4021", "ws_a", ["episodic"], 10)
+    assert [h.id for h in hits] == [hit.id]
+    assert hits[0].score == 1.0
+
+    await store.delete_episodes_by_ids([hit.id])
+    assert await store.lexical_search("ERR-4021", "ws_a", ["episodic"], 10) == []
+
+
+@pytest.mark.asyncio
+async def test_existing_rows_are_backfilled(tmp_path):
+    path = str(tmp_path / "memory.db")
+    plain = PooledSQLiteStore(path, MemoryConfig())
+    await plain.initialize()
+    ep = _episode("Deploy failed with code E1234")
+    await plain.save_episode(ep)
+    await plain.close()
+
+    indexed = PooledSQLiteStore(path, MemoryConfig(), lexical_index=True)
+    await indexed.initialize()
+    try:
+        hits = await indexed.lexical_search("E1234", "ws_a", ["episodic"], 5)
+        assert [h.id for h in hits] == [ep.id]
+    finally:
+        await indexed.close()
+
+
+@pytest.mark.asyncio
+async def test_recall_ranks_exact_identifier_first(client, auth_headers):
+    for content in _CONTENTS:
+        resp = await client.post(
+            "/v1/remember",
+            json={"content": content, "agent_id": "a1"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 200
+
+    resp = await client.post(
+        "/v1/recall",
+        json={
+            "query": "what happened with INC-88231 and the escalation",
+            "agent_id": "a1",
+            "top_k": 1,
+            "layers": ["episodic"],
+        },
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    top = resp.json()["results"][0]
+    assert "INC-88231" in top["content"]
+    assert top["metadata"]["lexical"] > 0
+
+
+@pytest.mark.asyncio
+async def test_short_keyword_query_skips_embedder(client, auth_headers):
+    await client.post(
+        "/v1/remember",
+        json={"content": "Invoice INV-2024-117 is overdue", "agent_id": "a1"},
+        headers=auth_headers,
+    )
+
+    with patch(
+        "plyra_memory.embedders.sentence_transformers.SentenceTransformerEmbedder.embed",
+        side_effect=AssertionError("embedder called"),
+    ):
+        resp = await client.post(
+            "/v1/recall",
+            json={"query": "INV-2024-117", "agent_id": "a1", "top_k": 1},
+            headers=auth_headers,
+        )
+    assert resp.status_code == 200
+    assert "INV-2024-117" in resp.json()["results"][0]["content"]
+
+
+@pytest.mark.asyncio
+async def test_zero_weight_keeps_vector_ranking(config):
+    admin = {"Authorization": f"Bearer {config.admin_api_key}"}
+    query = {
+        "query": "what happened with INC-88231 and the escalation",
+        "agent_id": "a1",
+        "layers": ["episodic"],
+    }
+
+    async def recall(update, write=False):
+        app = build_app(config.model_copy(update=update))
+        async with app.router.lifespan_context(app):
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                resp = await client.post(
+                    "/admin/keys", json={"workspace_id": "lex"}, headers=admin
+                )
+                headers = {"Authorization": f"Bearer {resp.json()['key']}"}
+                for content in _CONTENTS if write else []:
+                    await client.post(
+                        "/v1/remember",
+                        json={"content": content, "agent_id": "a1"},
+                        headers=headers,
+                    )
+                resp = await client.post("/v1/recall", json=query, headers=headers)
+                return resp.json()["results"]
+
+    fused = await recall({}, write=True)
+    plain = await recall({"lexical_enabled": False})
+    zero = await recall({"lexical_weight": 0.0})
+    assert "INC-88231" in fused[0]["content"]
+    assert [r["source_id"] for r in zero] == [r["source_id"] for r in plain]
+    assert [r["score"] for r in zero] == [r["score"] for r in plain]
+    assert all("lexical" not in r["metadata"] for r in zero)
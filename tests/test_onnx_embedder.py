@@ -0,0 +1,79 @@
+"""Tests for the ONNX Runtime embedder against the torch path."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+from memory_server.onnx_embedder import OnnxEmbedder  # noqa: E402
+
+TEXTS = [
+    "the user likes green tea",
+    "tea",
+    "the user likes the green tea the user likes",
+]
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """A small random BERT saved locally — same architecture as MiniLM."""
+    path = tmp_path_factory.mktemp("tiny-bert")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab += list("abcdefghijklmnopqrstuvwxyz") + ["the", "user", "likes", "tea"]
+    (path / "vocab.txt").write_text("\n".join(vocab))
+    transformers.BertTokenizerFast(str(path / "vocab.txt")).save_pretrained(path)
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=64,
+    )
+    transformers.BertModel(config).save_pretrained(path)
+    return path
+
+
+def _torch_reference(model_path) -> np.ndarray:
+    from sentence_transformers import SentenceTransformer, models
+
+    st = SentenceTransformer(
+        modules=[
+            models.Transformer(str(model_path)),
+            models.Pooling(32, "mean"),
+            models.Normalize(),
+        ],
+        device="cpu",
+    )
+    return st.encode(TEXTS)
+
+
+@pytest.mark.asyncio
+async def test_matches_sentence_transformers(tiny_model, tmp_path):
+    embedder = OnnxEmbedder(
+        str(tiny_model), model_dir=tmp_path / "onnx", threads=1, batch_size=2
+    )
+    got = np.asarray(await embedder.embed_batch(TEXTS))
+    assert (tmp_path / "onnx" / "model.onnx").exists()
+    assert embedder.dim == 32
+
+    expected = _torch_reference(tiny_model)
+    assert np.abs(got - expected).max() < 1e-4
+    single = await embedder.embed(TEXTS[1])
+    assert single == pytest.approx(expected[1].tolist(), abs=1e-4)
+
+
+@pytest.mark.asyncio
+async def test_quantized_model_stays_close(tiny_model, tmp_path):
+    embedder = OnnxEmbedder(str(tiny_model), model_dir=tmp_path / "onnx", quantize=True)
+    got = np.asarray(await embedder.embed_batch(TEXTS))
+    assert (tmp_path / "onnx" / "model_int8.onnx").exists()
+
+    expected = _torch_reference(tiny_model)
+    cosine = (got * expected).sum(axis=1)
+    assert cosine.min() > 0.98
@@ -0,0 +1,96 @@
+"""Tests for the pooled SQLite memory store."""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from plyra_memory import MemoryConfig
+from plyra_memory.schema import Episode, EpisodeEvent, Fact, FactRelation
+from plyra_memory.storage.sqlite import SQLiteStore
+
+from memory_server.storage.pooled import PooledSQLiteStore
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    s = PooledSQLiteStore(
+        str(tmp_path / "memory.db"),
+        MemoryConfig(),
+        read_pool_size=2,
+        commit_interval_ms=5,
+    )
+    await s.initialize()
+    yield s
+    await s.close()
+
+
+def _episode(i: int) -> Episode:
+    return Episode(
+        session_id="s1",
+        agent_id="ws_a",
+        event=EpisodeEvent.AGENT_RESPONSE,
+        content=f"episode {i}",
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_are_group_committed(store):
+    episodes = [_episode(i) for i in range(20)]
+    await asyncio.gather(*(store.save_episode(ep) for ep in episodes))
+
+    assert store.stats["writes"] == 20
+    assert store.stats["commits"] < 20
+    # Every write is visible to the read pool once it has returned
+    for ep in episodes:
+        assert await store.get_episode(ep.id) is not None
+    assert (await store.count_memories())["episodic"] == 20
+
+
+@pytest.mark.asyncio
+async def test_write_errors_reach_the_caller(store):
+    ep = _episode(0)
+    await store.save_episode(ep)
+    with pytest.raises(Exception, match="UNIQUE"):
+        await store.save_episode(ep)
+    # The writer keeps going after a failed write
+    await store.save_episode(_episode(1))
+    assert (await store.count_memories())["episodic"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_write_leaves_none_of_its_statements(store):
+    async def half_write(s, ep):
+        await SQLiteStore.save_episode(s, ep)
+        raise RuntimeError("second statement failed")
+
+    lost, kept = _episode(0), _episode(1)
+    results = await asyncio.gather(
+        store._submit(half_write, lost),
+        store.save_episode(kept),
+        return_exceptions=True,
+    )
+    assert isinstance(results[0], RuntimeError)
+    assert await store.get_episode(lost.id) is None
+    assert await store.get_episode(kept.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_fact_upsert_sees_its_own_write(store):
+    fact = Fact(
+        agent_id="ws_a", subject="user", predicate=FactRelation.PREFERS, object="tea"
+    )
+    await store.save_fact(fact)
+    again = fact.model_copy(update={"id": "other", "object": "coffee"})
+    merged = await store.save_fact(again)
+    assert merged.id == fact.id
+    assert merged.object == "coffee"
+
+
+@pytest.mark.asyncio
+async def test_read_connections_are_read_only(store):
+    conn = await store._readers.get()
+    try:
+        with pytest.raises(Exception, match="readonly|read-only"):
+            await conn.execute("DELETE FROM episodes")
+    finally:
+        store._readers.put_nowait(conn)
@@ -0,0 +1,68 @@
+"""Tests for compact embedding storage and the shared embedder cache."""
+
+import numpy as np
+import pytest
+
+from memory_server import quantize
+from memory_server.embedding import CachedEmbedder
+from memory_server.vectors.memmap import NumpyVectors
+
+
+def _unit_rows(n: int, dim: int = 384, seed: int = 0) -> np.ndarray:
+    m = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize(
+    ("kind", "itemsize", "tol"),
+    [("float32", 1536, 1e-6), ("float16", 768, 1e-3), ("int8", 388, 2e-2)],
+)
+def test_scores_on_compact_records_track_float32(kind, itemsize, tol):
+    rows, query = _unit_rows(50), _unit_rows(1, seed=1)[0]
+    records = quantize.encode(rows, kind)
+
+    assert records.dtype.itemsize == itemsize
+    assert np.abs(quantize.decode(records) - rows).max() < tol
+    exact = rows @ query
+    assert np.abs(quantize.similarities(records, query) - exact).max() < tol
+
+
+def test_unknown_dtype_is_rejected():
+    with pytest.raises(ValueError, match="bfloat16"):
+        quantize.record_dtype("bfloat16", 4)
+
+
+@pytest.mark.asyncio
+async def test_cached_embedder_keeps_float32_vectors(mock_embedder):
+    embedder = CachedEmbedder(mock_embedder, cache_size=2)
+    first = await embedder.embed("hello")
+    again = await embedder.embed("hello")
+    # Hits get written as vectors too: float32 exact, not a quantized copy
+    assert again == pytest.approx(first, abs=1e-7)
+
+    await embedder.embed_batch(["a", "b", "hello"])
+    stats = embedder.cache_stats
+    assert stats["size"] == 2  # LRU bound
+    assert stats["hits"] == 2
+    assert stats["bytes"] == 2 * 1536
+
+
+@pytest.mark.asyncio
+async def test_int8_numpy_vectors_rank_like_float32(tmp_path):
+    rows = _unit_rows(200)
+    vectors = NumpyVectors(str(tmp_path / "vec"), dtype="int8")
+    await vectors.initialize()
+    try:
+        await vectors.upsert_many(
+            [
+                (f"v{i}", row.tolist(), {"agent_id": "ws_a"})
+                for i, row in enumerate(rows)
+            ]
+        )
+        hits = await vectors.query(rows[17].tolist(), 3, {"agent_id": "ws_a"})
+        assert hits[0]["id"] == "v17"
+        assert hits[0]["score"] == pytest.approx(1.0, abs=0.01)
+        size = next((tmp_path / "vec").glob("*.vec")).stat().st_size
+        assert size == 200 * 388
+    finally:
+        await vectors.close()
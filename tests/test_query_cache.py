@@ -0,0 +1,130 @@
+"""Tests for the recall query cache and its persisted tier."""
+
+import sqlite3
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from memory_server.router import build_app
+
+
+async def _recall(client, headers, query="lisbon trip"):
+    resp = await client.post("/v1/recall", json={"query": query}, headers=headers)
+    assert resp.status_code == 200
+    return resp.json()
+
+
+@pytest.mark.asyncio
+async def test_repeated_and_similar_queries_hit_until_a_write(client, auth_headers):
+    await client.post(
+        "/v1/remember",
+        json={"content": "user flies to lisbon on monday"},
+        headers=auth_headers,
+    )
+    first = await _recall(client, auth_headers)
+    assert first["cache_hit"] is False and first["results"]
+
+    again = await _recall(client, auth_headers, "  Lisbon   TRIP ")
+    assert again["cache_hit"] is True
+    assert [r["source_id"] for r in again["results"]] == [
+        r["source_id"] for r in first["results"]
+    ]
+    # Same embedding under the test embedder (same characters): a semantic hit
+    assert (await _recall(client, auth_headers, "trip lisbon"))["cache_hit"] is True
+
+    await client.post(
+        "/v1/remember",
+        json={"content": "user books a hotel in lisbon"},
+        headers=auth_headers,
+    )
+    fresh = await _recall(client, auth_headers)
+    assert fresh["cache_hit"] is False
+    assert any("hotel" in r["content"] for r in fresh["results"])
+
+
+@pytest.mark.asyncio
+async def test_writes_outside_remember_move_the_generation_on(
+    client, auth_headers, app
+):
+    await client.post(
+        "/v1/remember", json={"content": "user likes green tea"}, headers=auth_headers
+    )
+    await _recall(client, auth_headers, "green tea")
+    assert (await _recall(client, auth_headers, "green tea"))["cache_hit"] is True
+
+    db = app.state.shards._open["default"].store_path
+    with sqlite3.connect(db) as conn:
+        before = conn.execute("SELECT generation FROM memory_generations").fetchall()
+        conn.execute("UPDATE episodes SET access_count = access_count + 5")
+        assert conn.execute("SELECT generation FROM memory_generations").fetchall() == (
+            before
+        )
+        conn.execute("UPDATE episodes SET content = 'user likes black coffee'")
+
+    stale = await _recall(client, auth_headers, "green tea")
+    assert stale["cache_hit"] is False
+    assert app.state.query_cache.stats["stale"] == 1
+
+
+@pytest.mark.asyncio
+async def test_persisted_entries_are_reloaded_and_checked(config, tmp_path):
+    config = config.model_copy(
+        update={"query_cache_path": str(tmp_path / "query_cache.db")}
+    )
+    admin = {"Authorization": f"Bearer {config.admin_api_key}"}
+
+    async def run(steps):
+        app = build_app(config)
+        async with app.router.lifespan_context(app):
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                return await steps(app, client)
+
+    async def first(app, client):
+        resp = await client.post(
+            "/admin/keys", json={"workspace_id": "test-workspace"}, headers=admin
+        )
+        headers = {"Authorization": f"Bearer {resp.json()['key']}"}
+        await client.post(
+            "/v1/remember",
+            json={"content": "user deploys on fridays"},
+            headers=headers,
+        )
+        await _recall(client, headers, "deploy day")
+        await _recall(client, headers, "release day")
+        await client.post(
+            "/v1/remember",
+            json={"content": "user deploys on fridays", "agent_id": "bot"},
+            headers=headers,
+        )
+        await client.post(
+            "/v1/recall",
+            json={"query": "deploy day", "agent_id": "bot"},
+            headers=headers,
+        )
+        return headers
+
+    headers = await run(first)
+
+    # Offline: a write to one namespace while the server is down
+    with sqlite3.connect(config.store_url) as conn:
+        conn.execute(
+            "UPDATE episodes SET content = 'user deploys on mondays' "
+            "WHERE agent_id LIKE '%:a_bot'"
+        )
+
+    async def second(app, client):
+        assert app.state.query_cache.stats["loaded"] == 3
+        assert (await _recall(client, headers, "deploy day"))["cache_hit"] is True
+        resp = await client.post(
+            "/v1/recall",
+            json={"query": "deploy day", "agent_id": "bot"},
+            headers=headers,
+        )
+        assert resp.json()["cache_hit"] is False
+        assert "mondays" in resp.json()["results"][0]["content"]
+        health = (await client.get("/health")).json()
+        assert health["query_cache"]["stale"] == 1
+
+    await run(second)
@@ -0,0 +1,98 @@
+"""Tests for per-model vector indexes and the online re-index job."""
+
+import asyncio
+
+import pytest
+
+from memory_server.reindex import reindex_scope, vector_ids
+
+
+async def _remember(client, headers, agent, *contents):
+    for content in contents:
+        resp = await client.post(
+            "/v1/remember",
+            json={"content": content, "agent_id": agent},
+            headers=headers,
+        )
+        assert resp.status_code == 200
+
+
+async def _wait(client, admin, job_id):
+    for _ in range(100):
+        job = (await client.get(f"/admin/jobs/{job_id}", headers=admin)).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.02)
+    return job
+
+
+@pytest.mark.asyncio
+async def test_reindex_job_switches_every_namespace(client, config, auth_headers, app):
+    admin = {"Authorization": f"Bearer {config.admin_api_key}"}
+    await _remember(client, auth_headers, "a1", "user likes green tea", "it rains")
+    await _remember(client, auth_headers, "a2", "user drives a blue car")
+
+    resp = await client.post(
+        "/admin/reindex/test-workspace",
+        json={"embed_model": "other-model"},
+        headers=admin,
+    )
+    assert resp.status_code == 202
+    job = await _wait(client, admin, resp.json()["job_id"])
+    assert job["status"] == "done", job
+    assert job["progress"]["episodic"] == 3
+    assert job["progress"]["switched"] >= 2
+    assert job["progress"]["deferred"] == 0
+    assert job["progress"]["default_model"] == "other-model"
+
+    indexes = app.state.shards._open["default"].vectors
+    assert indexes.default_model == "other-model"
+    assert indexes.backend(config.embed_model) is None  # retired
+    assert "other-model" in app.state.embedders
+
+    # Served from the new index with the new model's embedder
+    resp = await client.post(
+        "/v1/recall",
+        json={"query": "user drives a blue car", "agent_id": "a2"},
+        headers=auth_headers,
+    )
+    contents = [r["content"] for r in resp.json()["results"]]
+    assert "user drives a blue car" in contents
+
+
+@pytest.mark.asyncio
+async def test_busy_namespace_is_deferred_and_resumed(
+    client, config, auth_headers, app
+):
+    await _remember(client, auth_headers, "a1", "first note", "second note")
+    shard = app.state.shards._open["default"]
+    indexes = shard.vectors
+    ns = "ws_test-workspace:a_a1"
+    embedder = app.state.embedder
+
+    async def run(**kw):
+        return await reindex_scope(
+            indexes,
+            str(shard.store_path),
+            "ws_test-workspace",
+            "other-model",
+            embedder,
+            pause_ms=0,
+            **kw,
+        )
+
+    await indexes.bind(ns)  # a request still using the old index
+    first = await run(switch_timeout_s=0.05)
+    assert first["episodic"] == 2
+    assert first["deferred"] == 1
+    assert indexes.model_for(ns) == config.embed_model
+
+    # Written after the backfill: picked up when the namespace switches
+    await _remember(client, auth_headers, "a1", "third note")
+    indexes.unbind(ns)
+    second = await run()
+    # Resumed after the checkpoint: only the new row can sort after it
+    assert second["episodic"] <= 1
+    assert second["deferred"] == 0
+    assert indexes.model_for(ns) == "other-model"
+    assert len(await vector_ids(indexes.backend("other-model"), ns)) == 3
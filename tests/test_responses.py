@@ -0,0 +1,49 @@
+"""Tests for direct JSON / msgpack serialization of memory routes."""
+
+import pytest
+
+from memory_server.models import RecallResponse
+
+
+async def _seed(client, auth_headers):
+    await client.post(
+        "/v1/remember",
+        json={"content": "user prefers dark mode in every editor"},
+        headers=auth_headers,
+    )
+
+
+@pytest.mark.asyncio
+async def test_recall_items_match_response_model(client, auth_headers):
+    await _seed(client, auth_headers)
+    resp = await client.post(
+        "/v1/recall",
+        json={"query": "dark mode", "top_k": 5},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    parsed = RecallResponse.model_validate(resp.json())
+    assert parsed.results
+    assert parsed.results[0].layer in ("working", "episodic", "semantic")
+    assert "dark mode" in parsed.results[0].content
+
+
+@pytest.mark.asyncio
+async def test_msgpack_when_accepted(client, auth_headers):
+    msgpack = pytest.importorskip("msgpack")
+    await _seed(client, auth_headers)
+    headers = {**auth_headers, "Accept": "application/msgpack"}
+
+    resp = await client.post(
+        "/v1/recall", json={"query": "dark mode", "top_k": 5}, headers=headers
+    )
+    assert resp.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(resp.content)
+    RecallResponse.model_validate(data)
+
+    resp = await client.post(
+        "/v1/context", json={"query": "dark mode"}, headers=headers
+    )
+    data = msgpack.unpackb(resp.content)
+    assert "dark mode" in data["content"]
@@ -0,0 +1,140 @@
+"""Tests for retention policies and the expiry sweeper."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from plyra_memory import MemoryConfig
+from plyra_memory.schema import Episode, EpisodeEvent
+
+from memory_server.models import RetentionPolicy
+from memory_server.retention import sweep_scope
+from memory_server.storage.pooled import PooledSQLiteStore
+
+
+class _Vectors:
+    def __init__(self):
+        self.deleted: list[str] = []
+
+    async def delete_many(self, ids):
+        self.deleted.extend(ids)
+
+
+async def _seed(path) -> dict[str, list[str]]:
+    store = PooledSQLiteStore(str(path), MemoryConfig())
+    await store.initialize()
+    now = datetime.now(UTC)
+    ids: dict[str, list[str]] = {"old": [], "recent": [], "other": [], "dull": []}
+
+    async def add(kind, agent, age_days, importance=0.5):
+        ep = Episode(
+            session_id="s",
+            agent_id=agent,
+            event=EpisodeEvent.AGENT_RESPONSE,
+            content=f"{kind} {len(ids[kind])}",
+            importance=importance,
+            created_at=now - timedelta(days=age_days),
+        )
+        await store.save_episode(ep)
+        ids[kind].append(ep.id)
+
+    for i in range(3):
+        await add("old", "ws_a:a_1", 40 + i)
+    for i in range(4):
+        await add("recent", "ws_a:a_1", i / 24)
+    await add("dull", "ws_a:a_2", 3, importance=0.1)
+    await add("other", "ws_b", 90)
+    await store.close()
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_dry_run_counts_then_sweep_deletes(tmp_path):
+    db = tmp_path / "memory.db"
+    ids = await _seed(db)
+    policy = RetentionPolicy(
+        episodic_max_age_days=30, max_episodes_per_agent=2, min_importance=0.2
+    )
+    vectors = _Vectors()
+
+    dry = await sweep_scope(str(db), vectors, "ws_a", policy, dry_run=True)
+    assert dry["episodic.max_age"] == 3
+    assert dry["episodic.min_importance"] == 1
+    assert dry["episodic.max_per_agent"] == 5  # 7 episodes for a_1, keep 2
+    assert vectors.deleted == []
+
+    counts = await sweep_scope(str(db), vectors, "ws_a", policy, batch_size=2)
+    assert counts == {
+        "episodic.max_age": 3,
+        "episodic.min_importance": 1,
+        "semantic.min_importance": 0,
+        "episodic.max_per_agent": 2,
+    }
+    assert set(vectors.deleted) == {*ids["old"], *ids["dull"], *ids["recent"][2:]}
+
+    store = PooledSQLiteStore(str(db), MemoryConfig())
+    await store.initialize()
+    try:
+        left = await store.get_episodes_by_ids([i for v in ids.values() for i in v])
+    finally:
+        await store.close()
+    # the two newest for a_1 stay, and the other workspace is untouched
+    assert set(left) == {*ids["recent"][:2], *ids["other"]}
+
+
+@pytest.mark.asyncio
+async def test_sweep_batches_wait_for_the_write_lock(tmp_path):
+    db = tmp_path / "memory.db"
+    await _seed(db)
+    vectors = _Vectors()
+    lock = asyncio.Lock()
+    policy = RetentionPolicy(episodic_max_age_days=30)
+
+    async with lock:
+        sweep = asyncio.create_task(
+            sweep_scope(str(db), vectors, "ws_a", policy, lock=lock)
+        )
+        await asyncio.sleep(0.2)
+        assert not sweep.done()
+        assert vectors.deleted == []
+    counts = await sweep
+    assert counts["episodic.max_age"] == 3
+
+
+@pytest.mark.asyncio
+async def test_admin_policy_and_sweep_job(client, config, auth_headers):
+    admin = {"Authorization": f"Bearer {config.admin_api_key}"}
+    await client.post(
+        "/v1/remember", json={"content": "keep me around"}, headers=auth_headers
+    )
+    resp = await client.put(
+        "/admin/retention/test-workspace",
+        json={"episodic_max_age_days": 30, "max_facts_per_agent": 100},
+        headers=admin,
+    )
+    assert resp.status_code == 200
+    assert resp.json()["policy"]["episodic_max_age_days"] == 30
+
+    resp = await client.post(
+        "/admin/retention/test-workspace/sweep",
+        json={"dry_run": True},
+        headers=admin,
+    )
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+    for _ in range(50):
+        job = (await client.get(f"/admin/jobs/{job_id}", headers=admin)).json()
+        if job["status"] == "done":
+            break
+        await asyncio.sleep(0.02)
+    assert job["status"] == "done"
+    assert job["progress"]["episodic.max_age"] == 0
+
+    listing = (await client.get("/admin/retention", headers=admin)).json()
+    assert [p["workspace_id"] for p in listing["policies"]] == ["test-workspace"]
+    assert listing["sweeper"]["runs"] == 0
+
+    resp = await client.delete("/admin/retention/test-workspace", headers=admin)
+    assert resp.json()["deleted"] is True
+    resp = await client.get("/admin/retention/test-workspace", headers=admin)
+    assert resp.status_code == 404
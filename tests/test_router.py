@@ -135,3 +135,58 @@ async def test_invalid_layer_returns_400(client, auth_headers):
         headers=auth_headers,
     )
     assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_workspace_scope_recall_spans_agents(client, auth_headers, config):
+    for agent, content in [
+        ("a1", "deploy window is friday evening"),
+        ("a1", "deploy freeze starts in december"),
+        ("a2", "deploy needs two approvals"),
+        ("a3", "the office plant needs water"),
+    ]:
+        await client.post(
+            "/v1/remember",
+            json={"content": content, "agent_id": agent},
+            headers=auth_headers,
+        )
+    other = await client.post(
+        "/admin/keys",
+        json={"workspace_id": "workspace-other", "env": "test"},
+        headers={"Authorization": f"Bearer {config.admin_api_key}"},
+    )
+    await client.post(
+        "/v1/remember",
+        json={"content": "deploy secrets of another workspace", "agent_id": "a1"},
+        headers={"Authorization": f"Bearer {other.json()['key']}"},
+    )
+
+    resp = await client.post(
+        "/v1/recall",
+        json={"query": "deploy", "scope": "workspace", "layers": ["episodic"]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    namespaces = {r["metadata"]["namespace"] for r in results}
+    assert {"ws_test-workspace:a_a1", "ws_test-workspace:a_a2"} <= namespaces
+    assert all(ns.startswith("ws_test-workspace:") for ns in namespaces)
+
+    capped = await client.post(
+        "/v1/recall",
+        json={
+            "query": "when is the deploy window",
+            "scope": "workspace",
+            "max_per_agent": 1,
+        },
+        headers=auth_headers,
+    )
+    per_agent = [r["metadata"]["namespace"] for r in capped.json()["results"]]
+    assert len(per_agent) == len(set(per_agent)) == 3
+
+    context = await client.post(
+        "/v1/context",
+        json={"query": "deploy approvals", "scope": "workspace"},
+        headers=auth_headers,
+    )
+    assert "deploy needs two approvals" in context.json()["content"]
@@ -0,0 +1,145 @@
+"""Tests for vectorized recall scoring."""
+
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+from plyra_memory import MemoryConfig
+from plyra_memory.schema import Episode, EpisodeEvent
+
+from memory_server.scoring import Candidates, rank, top_indices
+from memory_server.storage.pooled import PooledSQLiteStore
+
+WEIGHTS = (0.5, 0.3, 0.2)
+
+
+def test_top_indices_matches_full_sort():
+    scores = np.random.default_rng(3).random(250)
+    assert top_indices(scores, 10) == list(np.argsort(-scores)[:10])
+    assert top_indices(scores[:3], 10) == list(np.argsort(-scores[:3]))
+    assert top_indices(scores[:0], 5) == []
+
+
+@pytest.mark.asyncio
+async def test_rank_fuses_components_and_keeps_top_k():
+    now = datetime.now(UTC)
+    found = Candidates()
+    found.add("episodic", "old", "old", now, now - timedelta(days=30), 0.9, 0.5)
+    found.add("episodic", "new", "new", now, now, 0.9, 0.5)
+    found.add("semantic", "weak", "weak", now, now, 0.1, 0.1)
+    found.add("episodic", "kw", "kw", now, now, 0.0, 0.5, lexical=1.0)
+
+    results, total = await rank(found, 2, weights=WEIGHTS, decay_lambda=0.05)
+    assert total == 4
+    assert [r.source_id for r in results] == ["new", "old"]
+    assert results[0].score == pytest.approx(0.9 * 0.5 + 0.3 + 0.5 * 0.2, abs=1e-3)
+
+    fused, _ = await rank(
+        found,
+        1,
+        weights=WEIGHTS,
+        decay_lambda=0.05,
+        lexical_weight=0.5,
+        with_lexical=True,
+    )
+    assert fused[0].source_id == "kw"
+    assert fused[0].metadata == {"lexical": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_rank_drops_fused_scores_below_min_score():
+    now = datetime.now(UTC)
+    found = Candidates()
+    found.add("episodic", "strong", "strong", now, now, 0.9, 0.5)
+    found.add("semantic", "weak", "weak", now, now, 0.1, 0.1)
+    found.add("episodic", "kw", "kw", now, now, 0.0, 0.5, lexical=1.0)
+
+    results, total = await rank(
+        found, 3, weights=WEIGHTS, decay_lambda=0.05, min_score=0.5
+    )
+    assert [r.source_id for r in results] == ["strong"]
+    assert total == 1  # total_found counts only what clears min_score
+
+    # Applied to the fused score: the keyword match clears it, and the
+    # vector match no longer does
+    fused, _ = await rank(
+        found,
+        3,
+        weights=WEIGHTS,
+        decay_lambda=0.05,
+        lexical_weight=0.5,
+        with_lexical=True,
+        min_score=0.5,
+    )
+    assert [r.source_id for r in fused] == ["kw"]
+
+
+@pytest.mark.asyncio
+async def test_mmr_skips_near_duplicates():
+    now = datetime.now(UTC)
+    found = Candidates()
+    for sid, sim, emb in [
+        ("a", 0.95, [1.0, 0.0]),
+        ("a-copy", 0.94, [1.0, 0.01]),
+        ("b", 0.80, [0.0, 1.0]),
+    ]:
+        found.embeddings[sid] = emb
+        found.add("working", sid, sid, now, now, sim, 0.5)
+
+    plain, _ = await rank(found, 2, weights=WEIGHTS, decay_lambda=0.05)
+    assert [r.source_id for r in plain] == ["a", "a-copy"]
+    diverse, _ = await rank(
+        found,
+        2,
+        weights=WEIGHTS,
+        decay_lambda=0.05,
+        mmr_lambda=0.5,
+        query_embedding=[1.0, 0.0],
+    )
+    assert [r.source_id for r in diverse] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_hydration_and_access(tmp_path):
+    store = PooledSQLiteStore(str(tmp_path / "memory.db"), MemoryConfig())
+    await store.initialize()
+    try:
+        episodes = [
+            Episode(
+                session_id="s1",
+                agent_id="ws_a",
+                event=EpisodeEvent.AGENT_RESPONSE,
+                content=f"episode {i}",
+            )
+            for i in range(3)
+        ]
+        for ep in episodes:
+            await store.save_episode(ep)
+        ids = [ep.id for ep in episodes[:2]]
+
+        got = await store.get_episodes_by_ids([*ids, "missing"])
+        assert set(got) == set(ids)
+        await store.increment_episode_access_many(ids)
+        assert (await store.get_episode(ids[0])).access_count == 1
+        assert (await store.get_episode(episodes[2].id)).access_count == 0
+    finally:
+        await store.close()
+
+
+@pytest.mark.asyncio
+async def test_rank_caps_results_per_namespace():
+    now = datetime.now(UTC)
+    found = Candidates()
+    for sid, sim, ns in [
+        ("a1", 0.9, "ws:a_a"),
+        ("a2", 0.8, "ws:a_a"),
+        ("a3", 0.7, "ws:a_a"),
+        ("b1", 0.2, "ws:a_b"),
+    ]:
+        found.add("episodic", sid, sid, now, now, sim, 0.5, namespace=ns)
+
+    results, _ = await rank(
+        found, 3, weights=WEIGHTS, decay_lambda=0.05, max_per_namespace=2
+    )
+    assert [r.source_id for r in results] == ["a1", "a2", "b1"]
+    assert results[2].metadata == {"namespace": "ws:a_b"}
@@ -0,0 +1,127 @@
+"""Tests for the /v1/session WebSocket channel."""
+
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from memory_server.router import build_app
+
+NS = "ws_test-workspace:a_chat"
+
+
+@pytest.fixture
+def server(config):
+    app = build_app(config.model_copy(update={"session_idle_release_s": 0.2}))
+    with TestClient(app) as client:
+        resp = client.post(
+            "/admin/keys",
+            json={"workspace_id": "test-workspace", "env": "test"},
+            headers={"Authorization": f"Bearer {config.admin_api_key}"},
+        )
+        yield app, client, {"Authorization": f"Bearer {resp.json()['key']}"}
+
+
+def _send(ws, msg_id, kind, **body):
+    ws.send_text(json.dumps({"id": msg_id, "type": kind, **body}))
+    return ws.receive_json()
+
+
+def test_session_remembers_and_packs_context_over_one_connection(server):
+    app, client, headers = server
+    with client.websocket_connect("/v1/session?agent_id=chat", headers=headers) as ws:
+        ready = ws.receive_json()
+        assert ready["type"] == "session"
+        assert ready["result"] == {"namespace": NS}
+
+        first = _send(ws, "m1", "remember", content="user flies to lisbon on monday")
+        assert first["id"] == "m1" and first["ok"] is True
+        assert first["result"]["episode_id"]
+        _send(ws, "m2", "remember", content="user is allergic to nuts")
+
+        # The namespace stays bound between messages
+        vectors = app.state.shards._open["default"].vectors
+        assert vectors._users[NS] == 1
+
+        ctx = _send(ws, "m3", "context", query="user flies to lisbon", token_budget=512)
+        assert ctx["id"] == "m3" and ctx["type"] == "context"
+        assert "lisbon" in ctx["result"]["content"]
+        assert ctx["result"]["latency_ms"] >= 0
+
+        recall = _send(ws, "m4", "recall", query="allergic", layers=["episodic"])
+        contents = [r["content"] for r in recall["result"]["results"]]
+        assert "user is allergic to nuts" in contents
+
+        # Quiet for longer than session_idle_release_s: the binding is given back
+        time.sleep(0.4)
+        assert NS not in vectors._users
+        again = _send(ws, "m5", "recall", query="lisbon")
+        assert again["ok"] is True
+    assert NS not in vectors._users
+
+    # Written over the session, visible over HTTP
+    resp = client.post(
+        "/v1/recall",
+        json={"query": "user flies to lisbon on monday", "agent_id": "chat"},
+        headers=headers,
+    )
+    assert resp.json()["results"]
+
+
+def test_session_errors_are_replied_per_message(server):
+    _, client, headers = server
+    with client.websocket_connect("/v1/session?agent_id=chat", headers=headers) as ws:
+        ws.receive_json()
+        ws.send_text("not json")
+        assert ws.receive_json()["error"]["status"] == 400
+
+        unknown = _send(ws, 7, "forget", content="x")
+        assert unknown["id"] == 7 and unknown["ok"] is False
+        assert unknown["error"]["status"] == 400
+
+        other = _send(ws, 8, "remember", content="x", agent_id="someone-else")
+        assert other["error"]["status"] == 400
+
+        invalid = _send(ws, 9, "context", token_budget=512)
+        assert invalid["error"]["status"] == 422
+        assert invalid["error"]["detail"][0]["loc"] == ["query"]
+
+        layers = _send(ws, 10, "recall", query="x", layers=["bogus"])
+        assert layers["error"]["status"] == 400
+
+        # Still open after the errors
+        assert _send(ws, 11, "remember", content="still here")["ok"] is True
+
+
+def test_session_rejects_missing_or_bad_key(server):
+    _, client, _ = server
+    for headers in ({}, {"Authorization": "Bearer plm_bogus"}):
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with client.websocket_connect("/v1/session", headers=headers):
+                pass
+        assert exc.value.code == 1008
+
+
+def test_session_remembers_report_their_own_extractions(server):
+    _, client, headers = server
+    with client.websocket_connect("/v1/session?agent_id=chat", headers=headers) as ws:
+        ws.receive_json()
+        first = _send(
+            ws, 1, "remember", content="I prefer dark mode", wait_for_facts_ms=2000
+        )
+        second = _send(
+            ws, 2, "remember", content="I live in Lisbon", wait_for_facts_ms=2000
+        )
+    ids = []
+    for msg in (first, second):
+        extraction_id = msg["result"]["extraction_id"]
+        status = client.get(
+            f"/v1/extractions/{extraction_id}",
+            params={"wait_ms": 2000},
+            headers=headers,
+        ).json()
+        assert status["status"] == "done" and len(status["fact_ids"]) == 1
+        ids.append(status["fact_ids"][0])
+    assert ids[0] != ids[1]
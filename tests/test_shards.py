@@ -0,0 +1,145 @@
+"""Tests for per-workspace SQLite sharding."""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from memory_server.config import ServerConfig
+from memory_server.router import build_app
+from memory_server.shards import DEFAULT_SHARD, Shard, ShardPool
+
+
+@pytest.fixture
+def sharded_config(tmp_path):
+    return ServerConfig(
+        admin_api_key="plm_admin_test_key",
+        key_store_url=str(tmp_path / "keys.db"),
+        store_url=str(tmp_path / "memory.db"),
+        vectors_url=str(tmp_path / "vectors"),
+        shard_mode="workspace",
+        shard_dir=str(tmp_path / "shards"),
+        max_open_shards=1,
+    )
+
+
+@pytest_asyncio.fixture
+async def sharded_app(sharded_config):
+    application = build_app(sharded_config)
+    async with application.router.lifespan_context(application):
+        yield application
+
+
+@pytest_asyncio.fixture
+async def sharded_client(sharded_app):
+    async with AsyncClient(
+        transport=ASGITransport(app=sharded_app), base_url="http://test"
+    ) as c:
+        yield c
+
+
+async def _headers(client, config, workspace_id):
+    resp = await client.post(
+        "/admin/keys",
+        json={"workspace_id": workspace_id, "env": "test"},
+        headers={"Authorization": f"Bearer {config.admin_api_key}"},
+    )
+    return {"Authorization": f"Bearer {resp.json()['key']}"}
+
+
+def test_shard_keys(config):
+    assert ShardPool(config, None).shard_key("acme") == DEFAULT_SHARD
+
+    by_ws = ShardPool(config.model_copy(update={"shard_mode": "workspace"}), None)
+    assert by_ws.shard_key("acme/eu") != by_ws.shard_key("acme_eu")
+    assert by_ws.shard_key("acme") == by_ws.shard_key("acme")
+
+    hashed = ServerConfig(shard_mode="hash", shard_buckets=4)
+    keys = {ShardPool(hashed, None).shard_key(f"ws{i}") for i in range(50)}
+    assert len(keys) <= 4
+
+
+@pytest.mark.asyncio
+async def test_workspaces_get_their_own_files(
+    sharded_app, sharded_client, sharded_config
+):
+    pool = sharded_app.state.shards
+    for ws in ("alpha", "beta"):
+        headers = await _headers(sharded_client, sharded_config, ws)
+        resp = await sharded_client.post(
+            "/v1/remember", json={"content": f"{ws} data"}, headers=headers
+        )
+        assert resp.status_code == 200
+
+    for ws in ("alpha", "beta"):
+        store_path, vectors_path = pool.paths(pool.shard_key(ws))
+        assert store_path.exists()
+        assert vectors_path.exists()
+
+    # max_open_shards=1 — the idle alpha shard was closed once beta opened
+    assert pool.open_shards == [pool.shard_key("beta")]
+
+
+@pytest.mark.asyncio
+async def test_sharded_stats_are_per_workspace(sharded_client, sharded_config):
+    alpha = await _headers(sharded_client, sharded_config, "alpha")
+    beta = await _headers(sharded_client, sharded_config, "beta")
+    await sharded_client.post(
+        "/v1/remember", json={"content": "alpha only"}, headers=alpha
+    )
+
+    assert (await sharded_client.get("/v1/stats", headers=alpha)).json()[
+        "episodic"
+    ] == 1
+    assert (await sharded_client.get("/v1/stats", headers=beta)).json()["episodic"] == 0
+
+
+@pytest.mark.asyncio
+async def test_remember_embeds_outside_the_write_lock(
+    app, client, auth_headers, mock_embedder, monkeypatch
+):
+    locked = []
+
+    async def embed(text):
+        shard = app.state.shards._open.get(DEFAULT_SHARD)
+        locked.append(shard is not None and shard.write_lock.locked())
+        return await mock_embedder.embed(text)
+
+    monkeypatch.setattr(
+        "plyra_memory.embedders.sentence_transformers.SentenceTransformerEmbedder.embed",
+        staticmethod(embed),
+    )
+    resp = await client.post(
+        "/v1/remember",
+        json={"content": "user ships on thursdays"},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    assert locked and not any(locked)
+
+
+@pytest.mark.asyncio
+async def test_shards_open_outside_the_pool_lock(config, monkeypatch):
+    pool = ShardPool(config.model_copy(update={"shard_mode": "workspace"}), None)
+    opened = []
+    gate = asyncio.Event()
+
+    async def open_shard(key):
+        opened.append(key)
+        if key == pool.shard_key("slow"):
+            await gate.wait()
+        return Shard(key, *pool.paths(key), store=None, vectors=None)
+
+    monkeypatch.setattr(pool, "_open_shard", open_shard)
+    slow = [asyncio.create_task(pool.acquire("slow")) for _ in range(3)]
+    await asyncio.sleep(0)
+    # Another workspace isn't held up by the shard still opening
+    fast = await asyncio.wait_for(pool.acquire("fast"), timeout=1)
+    assert fast.active == 1
+
+    gate.set()
+    shards = await asyncio.gather(*slow)
+    assert all(shard is shards[0] for shard in shards)
+    assert shards[0].active == 3
+    assert opened == [pool.shard_key("slow"), pool.shard_key("fast")]
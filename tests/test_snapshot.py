@@ -0,0 +1,107 @@
+"""Tests for online snapshots and restore."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from memory_server.config import ServerConfig
+from memory_server.router import build_app
+from memory_server.snapshot import restore_snapshot
+from memory_server.vectors.memmap import NumpyVectors
+
+
+@pytest.fixture
+def config(config, tmp_path):
+    return config.model_copy(update={"snapshot_dir": str(tmp_path / "snapshots")})
+
+
+async def _snapshot(client, admin):
+    resp = await client.post("/admin/snapshot", headers=admin)
+    assert resp.status_code == 202
+    for _ in range(200):
+        job = (
+            await client.get(f"/admin/jobs/{resp.json()['job_id']}", headers=admin)
+        ).json()
+        if job["status"] in ("done", "failed"):
+            break
+        await asyncio.sleep(0.02)
+    assert job["status"] == "done", job
+    return job["progress"]
+
+
+async def _recall_restored(settings, config, api_key, query):
+    restored = ServerConfig(
+        admin_api_key=config.admin_api_key,
+        key_store_url=settings["PLYRA_KEY_STORE_URL"],
+        store_url=settings["PLYRA_STORE_URL"],
+        vectors_url=settings["PLYRA_VECTORS_URL"],
+        shard_mode=settings["PLYRA_SHARD_MODE"],
+        shard_dir=settings["PLYRA_SHARD_DIR"],
+        env="local",
+    )
+    app = build_app(restored)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.post(
+                "/v1/recall",
+                json={"query": query, "layers": ["episodic"]},
+                headers={"Authorization": f"Bearer {api_key}"},
+            )
+    assert resp.status_code == 200  # the key came back with the snapshot
+    return [r["content"] for r in resp.json()["results"]]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_restores_into_fresh_directory(
+    client, config, api_key, auth_headers, tmp_path
+):
+    admin = {"Authorization": f"Bearer {config.admin_api_key}"}
+    for content in ("user flies to lisbon on monday", "user is allergic to nuts"):
+        await client.post(
+            "/v1/remember", json={"content": content}, headers=auth_headers
+        )
+
+    progress = await _snapshot(client, admin)
+    assert progress["shards"] == 1
+    assert progress["vectors_exported"] == 2
+    assert progress["path"].endswith(".tar.gz") and progress["bytes"] > 0
+
+    settings = await restore_snapshot(Path(progress["path"]), tmp_path / "restored")
+    contents = await _recall_restored(
+        settings, config, api_key, "user flies to lisbon on monday"
+    )
+    assert "user flies to lisbon on monday" in contents
+
+    with pytest.raises(ValueError, match="not empty"):
+        await restore_snapshot(Path(progress["path"]), tmp_path / "restored")
+
+
+@pytest.mark.asyncio
+async def test_pinned_numpy_index_copies_as_of_the_pin(tmp_path):
+    vectors = NumpyVectors(str(tmp_path / "idx"), compact_min_dead=1)
+    await vectors.initialize()
+    await vectors.upsert_many(
+        [(f"v{i}", [1.0, float(i)], {"agent_id": "ns"}) for i in range(4)]
+    )
+    conn, segments = await asyncio.to_thread(vectors.pin)
+    ((file, size),) = segments
+
+    # Writes after the pin append; deletes don't compact while pinned
+    await vectors.upsert_many([("v9", [0.0, 1.0], {"agent_id": "ns"})])
+    await vectors.delete_many(["v0", "v1", "v2", "v3"])
+    assert (vectors.path / file).stat().st_size > size
+    assert [r[0] for r in conn.execute("SELECT id FROM vectors ORDER BY id")] == [
+        "v0",
+        "v1",
+        "v2",
+        "v3",
+    ]
+
+    vectors.unpin(conn)
+    await vectors.delete_many(["v9"])  # compacts now
+    assert not (vectors.path / file).exists()
+    await vectors.close()
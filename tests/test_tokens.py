@@ -0,0 +1,98 @@
+"""Tests for stored token counts and budget-sized context packing."""
+
+import asyncio
+import sqlite3
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from memory_server import retrieval
+from memory_server.tokens import TokenCounter
+
+
+def test_counter_uses_tiktoken_when_available(monkeypatch):
+    fake = SimpleNamespace(
+        get_encoding=lambda name: SimpleNamespace(encode_ordinary=list)
+    )
+    monkeypatch.setitem(sys.modules, "tiktoken", fake)
+    counter = TokenCounter("cl100k_base")
+    assert counter.name == "cl100k_base"
+    assert counter.count("abcd") == 4
+    assert counter.line("episodic", 4) == 4 + len("[EPISODIC] \n")
+
+    words = TokenCounter()
+    assert words.name == "words"
+    assert words.count("one two three four") == 5
+    assert words.line("semantic", 5) == 10
+
+
+def test_fetch_size_follows_the_budget():
+    counter = TokenCounter("words")
+    counter.count(" ".join(["word"] * 10))  # mean 13 tokens
+    assert counter.fetch_size(64) == 8
+    assert counter.fetch_size(32_000) == 50
+    assert counter.fetch_size(1) == 4
+
+
+@pytest.mark.asyncio
+async def test_context_packs_stored_counts_within_budget(
+    client, auth_headers, app, monkeypatch
+):
+    contents = [f"user note number {i} about the lisbon trip" for i in range(12)]
+    for content in contents:
+        await client.post(
+            "/v1/remember", json={"content": content}, headers=auth_headers
+        )
+
+    db = app.state.shards._open["default"].store_path
+    with sqlite3.connect(db) as conn:
+        rows = conn.execute(
+            "SELECT e.id, t.tokens, t.tokenizer FROM episodes e "
+            "JOIN memory_tokens t ON t.id = e.id"
+        ).fetchall()
+    assert len(rows) == len(contents)
+    counter = app.state.tokens
+    assert {r[2] for r in rows} == {counter.name}
+
+    fetched = []
+    recall = retrieval.recall
+
+    async def spy(memory, query, top_k, layers, config, cache=None):
+        fetched.append(top_k)
+        return await recall(memory, query, top_k, layers, config, cache)
+
+    monkeypatch.setattr(retrieval, "recall", spy)
+    resp = await client.post(
+        "/v1/context",
+        json={"query": "lisbon trip", "token_budget": 64},
+        headers=auth_headers,
+    )
+    data = resp.json()
+    assert fetched == [counter.fetch_size(64)] and fetched[0] < 50
+    assert 0 < data["token_count"] <= 64
+    assert data["memories_used"] == data["content"].count("\n") + 1
+
+    # Packing reads the stored count instead of counting again
+    with sqlite3.connect(db) as conn:
+        conn.execute("UPDATE memory_tokens SET tokens = 10000")
+    resp = await client.post(
+        "/v1/context",
+        json={"query": "lisbon trip", "token_budget": 2048},
+        headers=auth_headers,
+    )
+    assert resp.json()["memories_used"] == 0
+
+    # Erasure drops the counts with their rows
+    resp = await client.request(
+        "DELETE", "/v1/memory", json={"layer": "episodic"}, headers=auth_headers
+    )
+    job_id = resp.json()["job_id"]
+    for _ in range(100):
+        job = (await client.get(f"/v1/jobs/{job_id}", headers=auth_headers)).json()
+        if job["status"] == "done":
+            break
+        await asyncio.sleep(0.02)
+    with sqlite3.connect(db) as conn:
+        left = conn.execute("SELECT COUNT(*) FROM memory_tokens").fetchone()[0]
+    assert left == len(contents)  # the working entries' counts
@@ -0,0 +1,129 @@
+"""Tests for per-request tracing, OTLP file export and the slow log."""
+
+import json
+import logging
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from memory_server.router import build_app
+from memory_server.tracing import parse_traceparent, span
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture
+def traced_config(config, tmp_path):
+    return config.model_copy(
+        update={
+            "trace_sample_rate": 1.0,
+            "trace_export": "file",
+            "trace_file": str(tmp_path / "traces.jsonl"),
+            "trace_slow_ms": 0.001,
+        }
+    )
+
+
+@pytest_asyncio.fixture
+async def traced(traced_config):
+    app = build_app(traced_config)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.post(
+                "/admin/keys",
+                json={"workspace_id": "ws", "label": "t", "env": "test"},
+                headers={"Authorization": "Bearer plm_admin_test_key"},
+            )
+            headers = {"Authorization": f"Bearer {resp.json()['key']}"}
+            yield app, client, headers
+
+
+def test_span_without_trace_is_noop():
+    with span("orphan") as s:
+        s.set(rows=3)
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-01") == (
+        TRACE_ID,
+        "00f067aa0ba902b7",
+        True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_recall_spans_exported_as_otlp(traced, traced_config):
+    app, client, headers = traced
+    await client.post(
+        "/v1/remember", json={"content": "user prefers tabs"}, headers=headers
+    )
+    resp = await client.post(
+        "/v1/recall", json={"query": "what does the user prefer"}, headers=headers
+    )
+    trace_id = resp.headers["X-Trace-Id"]
+    await app.state.tracer.flush()
+
+    with open(traced_config.trace_file) as f:
+        batches = [json.loads(line) for line in f]
+    spans = [
+        s
+        for b in batches
+        for rs in b["resourceSpans"]
+        for ss in rs["scopeSpans"]
+        for s in ss["spans"]
+        if s["traceId"] == trace_id
+    ]
+    names = {s["name"] for s in spans}
+    assert {"POST /v1/recall", "auth", "namespace", "embed", "score"} <= names
+    assert {"vectors.query", "store.hydrate"} <= names
+    root = next(s for s in spans if s["name"] == "POST /v1/recall")
+    assert root["kind"] == 2 and "parentSpanId" not in root
+    embed = next(s for s in spans if s["name"] == "embed")
+    assert {"key": "cache_hit", "value": {"boolValue": False}} in embed["attributes"]
+
+
+@pytest.mark.asyncio
+async def test_slow_request_logs_span_tree(traced, caplog):
+    _, client, headers = traced
+    with caplog.at_level(logging.WARNING, logger="memory_server.tracing"):
+        await client.post("/v1/context", json={"query": "anything"}, headers=headers)
+    slow = [r.getMessage() for r in caplog.records if "Slow request" in r.getMessage()]
+    assert slow and "POST /v1/context" in slow[-1]
+    assert "\n  auth " in slow[-1]
+    assert "context.pack" in slow[-1]
+
+
+@pytest.mark.asyncio
+async def test_traceparent_joins_caller_trace(traced):
+    _, client, headers = traced
+    resp = await client.get(
+        "/v1/stats",
+        headers={**headers, "traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"},
+    )
+    assert resp.headers["X-Trace-Id"] == TRACE_ID
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("trust", [False, True])
+async def test_sampled_parent_is_followed_only_when_trusted(traced_config, trust):
+    config = traced_config.model_copy(
+        update={"trace_sample_rate": 1e-9, "trace_trust_parent": trust}
+    )
+    app = build_app(config)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            sampled = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+            resp = await client.get("/health", headers={"traceparent": sampled})
+            assert ("X-Trace-Id" in resp.headers) is trust
+            unsampled = sampled[:-2] + "00"
+            resp = await client.get("/health", headers={"traceparent": unsampled})
+            assert "X-Trace-Id" not in resp.headers
+
+
+@pytest.mark.asyncio
+async def test_untraced_by_default(client):
+    resp = await client.get("/health")
+    assert "X-Trace-Id" not in resp.headers
@@ -0,0 +1,140 @@
+"""Tests for NDJSON export / import."""
+
+import json
+
+import pytest
+
+from memory_server.transfer import (
+    _rebase,
+    decode_embedding,
+    encode_embedding,
+    moved_id,
+)
+
+
+async def _key(client, config, workspace_id):
+    resp = await client.post(
+        "/admin/keys",
+        json={"workspace_id": workspace_id, "env": "test"},
+        headers={"Authorization": f"Bearer {config.admin_api_key}"},
+    )
+    return {"Authorization": f"Bearer {resp.json()['key']}"}
+
+
+def test_embedding_roundtrip():
+    vec = [0.25, -1.5, 3.0]
+    assert decode_embedding(encode_embedding(vec)) == vec
+
+
+@pytest.mark.asyncio
+async def test_export_streams_ndjson(client, auth_headers):
+    await client.post(
+        "/v1/remember",
+        json={"content": "user works on billing service", "user_id": "u1"},
+        headers=auth_headers,
+    )
+    resp = await client.get(
+        "/v1/export", params={"include_embeddings": "true"}, headers=auth_headers
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert lines[0]["type"] == "header"
+    assert lines[0]["workspace_id"] == "test-workspace"
+    types = [line["type"] for line in lines[1:]]
+    assert {"session", "working", "episodic"} <= set(types)
+    episode = next(line for line in lines if line["type"] == "episodic")
+    assert len(decode_embedding(episode["embedding"])) == 384
+
+
+@pytest.mark.asyncio
+async def test_import_into_other_workspace(client, auth_headers, config):
+    await client.post(
+        "/v1/remember",
+        json={"content": "user prefers postgres", "agent_id": "db-bot"},
+        headers=auth_headers,
+    )
+    export = await client.get(
+        "/v1/export", params={"include_embeddings": "true"}, headers=auth_headers
+    )
+
+    target = await _key(client, config, "migrated")
+    resp = await client.post("/v1/import", content=export.content, headers=target)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["episodic"] == 1
+    assert data["working"] == 1
+    assert data["reembedded"] == 0
+
+    # The source workspace keeps its rows; a second import replaces the copy
+    again = await client.post("/v1/import", content=export.content, headers=target)
+    assert again.status_code == 200
+    admin = {"Authorization": f"Bearer {config.admin_api_key}"}
+    for workspace_id in ("test-workspace", "migrated"):
+        usage = await client.get(f"/admin/usage/{workspace_id}", headers=admin)
+        assert usage.json()["stored"]["layers"]["episodic"]["rows"] == 1
+
+    # The migrated agent can recall its memory under the new workspace
+    recall = await client.post(
+        "/v1/recall",
+        json={"query": "user prefers postgres", "agent_id": "db-bot"},
+        headers=target,
+    )
+    assert recall.json()["total_found"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_import_without_embeddings_reembeds(client, auth_headers, config):
+    await client.post(
+        "/v1/remember", json={"content": "user likes rust"}, headers=auth_headers
+    )
+    export = await client.get("/v1/export", headers=auth_headers)
+
+    target = await _key(client, config, "reembed")
+    resp = await client.post("/v1/import", content=export.content, headers=target)
+    assert resp.json()["reembedded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_rows_outside_workspace(client, auth_headers):
+    line = json.dumps({"type": "working", "row": {"id": "x", "agent_id": "ws_evil"}})
+    resp = await client.post("/v1/import", content=line, headers=auth_headers)
+    assert resp.status_code == 400
+
+
+def test_rebase_moves_only_namespaces_under_the_source_workspace():
+    row = {"id": "e1", "agent_id": "ws_a:u_1"}
+    assert _rebase(row, "ws_a", "ws_b")["agent_id"] == "ws_b:u_1"
+    assert _rebase({**row, "agent_id": "ws_a"}, "ws_a", "ws_b")["agent_id"] == "ws_b"
+    moved = _rebase({**row, "source_episode_id": "e0"}, "ws_a", "ws_b")
+    assert moved["id"] == moved_id("ws_b", "e1") != "e1"
+    assert moved["source_episode_id"] == moved_id("ws_b", "e0")
+    other = {"id": "e2", "agent_id": "ws_ab:u_1"}
+    assert _rebase(other, "ws_a", "ws_b") == other
+
+
+@pytest.mark.asyncio
+async def test_import_refuses_ids_of_another_workspace(client, auth_headers, config):
+    victim = await _key(client, config, "victim")
+    await client.post(
+        "/v1/remember", json={"content": "victim's secret plan"}, headers=victim
+    )
+    export = await client.get("/v1/export", headers=victim)
+    episode = next(
+        json.loads(line)
+        for line in export.text.splitlines()
+        if json.loads(line)["type"] == "episodic"
+    )
+    episode["row"].update(agent_id="ws_test-workspace", content="overwritten")
+
+    resp = await client.post(
+        "/v1/import", content=json.dumps(episode), headers=auth_headers
+    )
+    assert resp.status_code == 400
+    assert "another namespace" in resp.json()["detail"]
+
+    recall = await client.post(
+        "/v1/recall", json={"query": "victim's secret plan"}, headers=victim
+    )
+    assert recall.json()["results"][0]["content"] == "victim's secret plan"
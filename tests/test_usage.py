@@ -0,0 +1,143 @@
+"""Tests for per-workspace accounting and quotas."""
+
+import asyncio
+import sqlite3
+
+import aiosqlite
+import pytest
+
+from memory_server import usage
+from memory_server.models import WorkspaceQuota, WorkspaceQuotaInfo
+from memory_server.usage import UsageMeter
+
+ADMIN = {"Authorization": "Bearer plm_admin_test_key"}
+
+
+@pytest.mark.asyncio
+async def test_usage_counts_rows_bytes_and_activity(client, auth_headers, app):
+    contents = ["user likes green tea", "user flies to lisbon on monday"]
+    for i, content in enumerate(contents):
+        await client.post(
+            "/v1/remember",
+            json={"content": content, "agent_id": f"bot{i}"},
+            headers=auth_headers,
+        )
+    await client.post(
+        "/v1/recall", json={"query": "what does the user drink?"}, headers=auth_headers
+    )
+
+    resp = await client.get("/admin/usage/test-workspace", headers=ADMIN)
+    data = resp.json()
+    stored = data["stored"]
+    size = sum(len(c.encode()) for c in contents)
+    assert stored["layers"]["working"] == {"rows": 2, "bytes": size}
+    assert stored["layers"]["episodic"] == {"rows": 2, "bytes": size}
+    assert stored["vectors"] == 2 + stored["layers"]["semantic"]["rows"]
+    assert stored["vector_bytes"] == stored["vectors"] * 384 * 4
+    assert data["activity"]["embeds"] >= 3
+    assert data["activity"]["recalls"] == 1 and data["activity"]["recall_ms"] > 0
+    assert data["quota"]["max_rows"] is None
+
+    listed = (await client.get("/admin/usage", headers=ADMIN)).json()
+    assert listed["workspaces"]["test-workspace"]["recalls"] == 1
+
+    # Erasure is counted by the triggers like any other write
+    resp = await client.request(
+        "DELETE",
+        "/v1/memory",
+        json={"agent_id": "bot0", "layer": "episodic"},
+        headers=auth_headers,
+    )
+    job_id = resp.json()["job_id"]
+    for _ in range(100):
+        job = (await client.get(f"/v1/jobs/{job_id}", headers=auth_headers)).json()
+        if job["status"] == "done":
+            break
+        await asyncio.sleep(0.02)
+    data = (await client.get("/admin/usage/test-workspace", headers=ADMIN)).json()
+    assert data["stored"]["layers"]["episodic"] == {
+        "rows": 1,
+        "bytes": len(contents[1].encode()),
+    }
+
+    # A store that predates the table is counted once when it is created
+    db = app.state.shards._open["default"].store_path
+    with sqlite3.connect(db) as conn:
+        expected = conn.execute("SELECT * FROM memory_usage ORDER BY 1, 2").fetchall()
+    async with aiosqlite.connect(db) as conn:
+        await conn.execute("DROP TABLE memory_usage")
+        await usage.ensure_table(conn)
+        rows = await conn.execute_fetchall("SELECT * FROM memory_usage ORDER BY 1, 2")
+    assert [tuple(r) for r in rows] == [r for r in expected if r[2]]
+
+
+@pytest.mark.asyncio
+async def test_quotas_refuse_writes_and_throttle_rates(client, auth_headers):
+    resp = await client.put(
+        "/admin/quotas/test-workspace", json={"max_rows": 1}, headers=ADMIN
+    )
+    assert resp.status_code == 200 and resp.json()["quota"]["max_rows"] == 1
+
+    resp = await client.post(
+        "/v1/remember", json={"content": "user likes tea"}, headers=auth_headers
+    )
+    assert resp.status_code == 200  # the episode alone reaches the quota
+    resp = await client.post(
+        "/v1/remember", json={"content": "user likes coffee"}, headers=auth_headers
+    )
+    assert resp.status_code == 429
+    assert "max_rows" in resp.json()["detail"]
+
+    await client.put(
+        "/admin/quotas/test-workspace", json={"embeds_per_minute": 1}, headers=ADMIN
+    )
+    quotas = (await client.get("/admin/quotas", headers=ADMIN)).json()
+    assert quotas["quotas"][0]["quota"]["embeds_per_minute"] == 1
+    assert quotas["quotas"][0]["quota"]["max_rows"] is None
+    resp = await client.post(
+        "/v1/recall", json={"query": "what does the user drink?"}, headers=auth_headers
+    )
+    assert resp.status_code == 429
+    assert 1 <= int(resp.headers["Retry-After"]) <= 60
+
+    resp = await client.delete("/admin/quotas/test-workspace", headers=ADMIN)
+    assert resp.json()["deleted"] is True
+    resp = await client.post(
+        "/v1/recall", json={"query": "what does the user drink?"}, headers=auth_headers
+    )
+    assert resp.status_code == 200
+    usage_now = (await client.get("/admin/usage/test-workspace", headers=ADMIN)).json()
+    assert usage_now["activity"]["rejected"] == 2
+
+
+class _Quotas:
+    def __init__(self, **quota):
+        self.quota = WorkspaceQuota(**quota)
+
+    async def list_quotas(self):
+        return [WorkspaceQuotaInfo(workspace_id="ws", quota=self.quota, updated_at=0)]
+
+
+class _LLMExtractor:
+    calls = 0
+
+    async def extract(self, text, agent_id):
+        self.calls += 1
+        return []
+
+
+@pytest.mark.asyncio
+async def test_llm_extractions_over_quota_fall_back_to_regex(config):
+    meter = UsageMeter(config, _Quotas(llm_extractions_per_hour=1))
+    await meter.reload()
+    llm = _LLMExtractor()
+    extractor = meter.extractor(llm, "ws")
+    assert meter.extractor(None, "ws") is None
+
+    await extractor.extract("I prefer dark mode", "ns")
+    facts = await extractor.extract("I prefer dark mode", "ns")
+    assert llm.calls == 1 and facts  # the regex rules found a preference
+    activity = meter.activity("ws")
+    assert activity["llm_extractions"] == 1
+    assert activity["llm_extractions_throttled"] == 1
+    assert activity["windows"]["llm_extractions_per_hour"] == 1
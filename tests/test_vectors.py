@@ -0,0 +1,132 @@
+"""Tests for the memory-mapped NumPy vector backend."""
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from memory_server.router import build_app
+from memory_server.vectors.memmap import NumpyVectors
+
+
+@pytest_asyncio.fixture
+async def vectors(tmp_path):
+    v = NumpyVectors(str(tmp_path / "vec"), compact_min_dead=4)
+    await v.initialize()
+    yield v
+    await v.close()
+
+
+def _unit(i: int, dim: int = 8) -> list[float]:
+    return np.eye(dim)[i % dim].tolist()
+
+
+def _meta(ns: str, layer: str = "episodic") -> dict:
+    return {"layer": layer, "agent_id": ns, "importance": 0.5, "session_id": None}
+
+
+@pytest.mark.asyncio
+async def test_query_is_exact_and_filtered(vectors):
+    await vectors.upsert_many(
+        [(f"a{i}", _unit(i), _meta("ws_a")) for i in range(6)]
+        + [("b0", _unit(0), _meta("ws_b")), ("f0", _unit(0), _meta("ws_a", "semantic"))]
+    )
+
+    hits = await vectors.query(_unit(2), 2, {"layer": "episodic"})
+    assert hits[0]["id"] == "a2"
+    assert hits[0]["score"] == pytest.approx(1.0)
+    assert hits[1]["score"] == pytest.approx(0.5)  # orthogonal
+
+    scoped = await vectors.query(
+        _unit(0), 10, {"$and": [{"layer": "episodic"}, {"agent_id": "ws_a"}]}
+    )
+    assert scoped[0]["id"] == "a0"
+    assert {h["id"] for h in scoped} == {f"a{i}" for i in range(6)}
+    assert await vectors.count() == 8
+
+
+@pytest.mark.asyncio
+async def test_deletes_compact_and_survive_reopen(tmp_path, vectors):
+    await vectors.upsert_many([(f"a{i}", _unit(i), _meta("ws_a")) for i in range(8)])
+    # Overwrite one, delete five: dead slots now outnumber live ones
+    await vectors.upsert("a7", _unit(1), _meta("ws_a"))
+    assert await vectors.delete_many([f"a{i}" for i in range(5)]) == 5
+
+    files = list((tmp_path / "vec").glob("*.vec"))
+    assert len(files) == 1 and files[0].name.endswith("-1.vec")
+    assert files[0].stat().st_size == 3 * 8 * 4
+
+    await vectors.close()
+    reopened = NumpyVectors(str(tmp_path / "vec"))
+    await reopened.initialize()
+    try:
+        hits = await reopened.query(_unit(1), 1, {"agent_id": "ws_a"})
+        assert hits[0]["id"] == "a7"
+        emb = await reopened.get_embeddings(["a5", "a0"])
+        assert list(emb) == ["a5"]
+        assert emb["a5"] == pytest.approx(_unit(5))
+    finally:
+        await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_old_file_until_commit(tmp_path, vectors, monkeypatch):
+    await vectors.upsert_many([(f"a{i}", _unit(i), _meta("ws_a")) for i in range(8)])
+    (old,) = (tmp_path / "vec").glob("*.vec")
+    compact = vectors._maybe_compact
+
+    def compact_then_fail(seg):
+        obsolete = compact(seg)
+        assert old in obsolete and old.exists()
+        raise RuntimeError("crash before commit")
+
+    monkeypatch.setattr(vectors, "_maybe_compact", compact_then_fail)
+    with pytest.raises(RuntimeError):
+        await vectors.delete_many([f"a{i}" for i in range(6)])
+
+    # Rolled back: the committed index still points at a file that exists
+    assert old.exists()
+    hits = await vectors.query(_unit(3), 1, {"agent_id": "ws_a"})
+    assert hits[0]["id"] == "a3"
+
+    monkeypatch.setattr(vectors, "_maybe_compact", compact)
+    assert await vectors.delete_many([f"a{i}" for i in range(6)]) == 6
+    assert [f.name for f in (tmp_path / "vec").glob("*.vec")] == [
+        old.name.replace("-0.vec", "-1.vec")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_server_runs_on_numpy_vectors(config, tmp_path):
+    config.vectors_url = f"numpy://{tmp_path / 'numpy_vectors'}"
+    app = build_app(config)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            resp = await client.post(
+                "/admin/keys",
+                json={"workspace_id": "np", "label": "t", "env": "test"},
+                headers={"Authorization": f"Bearer {config.admin_api_key}"},
+            )
+            headers = {"Authorization": f"Bearer {resp.json()['key']}"}
+            await client.post(
+                "/v1/remember",
+                json={"content": "The user prefers green tea", "agent_id": "a1"},
+                headers=headers,
+            )
+            resp = await client.post(
+                "/v1/recall",
+                json={
+                    "query": "The user prefers green tea",
+                    "agent_id": "a1",
+                    "layers": ["episodic"],
+                },
+                headers=headers,
+            )
+            assert resp.status_code == 200
+            top = resp.json()["results"][0]
+            assert top["content"] == "The user prefers green tea"
+            assert top["similarity"] == pytest.approx(1.0)
+        indexes = app.state.shards._open["default"].vectors
+        assert isinstance(indexes.backend(config.embed_model), NumpyVectors)
@@ -0,0 +1,175 @@
+"""Tests for the in-process working-memory buffer."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from plyra_memory.schema import WorkingEntry
+
+from memory_server.working import BufferedWorkingLayer, WorkingSetCache
+
+
+class _Store:
+    def __init__(self, entries=()):
+        self.rows = {e.id: e for e in entries}
+        self.reads = 0
+
+    async def get_working_entries(self, session_id):
+        self.reads += 1
+        rows = [e for e in self.rows.values() if e.session_id == session_id]
+        return sorted(rows, key=lambda e: e.created_at)
+
+    async def save_working_entry(self, entry):
+        await asyncio.sleep(0)
+        self.rows[entry.id] = entry
+        return entry
+
+    async def delete_working_entry_by_id(self, entry_id):
+        self.rows.pop(entry_id, None)
+
+    async def delete_working_entries(self, session_id):
+        stale = [i for i, e in self.rows.items() if e.session_id == session_id]
+        for i in stale:
+            del self.rows[i]
+        return len(stale)
+
+
+_T0 = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def _entry(n, importance=0.5, session="s"):
+    return WorkingEntry(
+        session_id=session,
+        agent_id="ws_w:a_1",
+        content=f"note number {n}",
+        importance=importance,
+        created_at=_T0 + timedelta(seconds=n),
+    )
+
+
+def _layer(cache, store, max_entries=50):
+    memory = SimpleNamespace(
+        _store=store,
+        _config=SimpleNamespace(working_max_entries=max_entries),
+        _agent_id="ws_w:a_1",
+        _bg_tasks=set(),
+    )
+    return BufferedWorkingLayer(cache, memory), memory._bg_tasks
+
+
+@pytest.mark.asyncio
+async def test_miss_loads_from_store_then_serves_from_memory():
+    store = _Store([_entry(1), _entry(2)])
+    layer, _ = _layer(WorkingSetCache(), store)
+
+    first = await layer.get("s")
+    second = await layer.get("s")
+    assert [e.content for e in second.entries] == ["note number 1", "note number 2"]
+    assert first.total_tokens == second.total_tokens == 2 * int(3 * 1.3)
+    assert store.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_add_evicts_least_important_and_writes_through():
+    store = _Store()
+    cache = WorkingSetCache()
+    layer, bg = _layer(cache, store, max_entries=3)
+    for n, importance in enumerate([0.9, 0.2, 0.7, 0.2, 0.8]):
+        await layer.add(_entry(n, importance))
+
+    state = await layer.get("s")
+    # the two 0.2 entries went, oldest first
+    assert [e.importance for e in state.entries] == [0.9, 0.7, 0.8]
+    assert state.total_tokens == 3 * int(3 * 1.3)
+
+    await asyncio.gather(*bg)
+    assert sorted(e.importance for e in store.rows.values()) == [0.7, 0.8, 0.9]
+    assert cache.stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_bound_and_invalidate():
+    store = _Store([_entry(1, session="a"), _entry(2, session="b")])
+    cache = WorkingSetCache(max_sessions=1)
+    layer, _ = _layer(cache, store)
+    await layer.get("a")
+    await layer.get("b")  # pushes "a" out
+    assert cache.stats["sessions"] == 1
+    await layer.get("a")
+    assert store.reads == 3
+
+    assert cache.invalidate("ws_w") == 1
+    assert cache.invalidate("ws_w") == 0
+    await layer.get("a")
+    assert store.reads == 4
+
+
+@pytest.mark.asyncio
+async def test_reload_waits_for_a_dropped_buffers_writes():
+    store = _Store()
+    cache = WorkingSetCache()
+    layer, bg = _layer(cache, store)
+    gate = asyncio.Event()
+    save = store.save_working_entry
+
+    async def slow_save(entry):
+        await gate.wait()
+        return await save(entry)
+
+    store.save_working_entry = slow_save
+    await layer.add(_entry(1))
+    assert cache.invalidate("ws_w") == 1  # its write is still queued
+
+    reload = asyncio.create_task(layer.get("s"))
+    await asyncio.sleep(0.05)
+    assert not reload.done()
+    gate.set()
+    assert [e.content for e in (await reload).entries] == ["note number 1"]
+    await asyncio.gather(*bg)
+
+
+@pytest.mark.asyncio
+async def test_failed_write_through_drops_the_session():
+    store = _Store([_entry(1)])
+    cache = WorkingSetCache()
+    layer, bg = _layer(cache, store)
+
+    async def broken_save(entry):
+        raise RuntimeError("disk full")
+
+    store.save_working_entry = broken_save
+    await layer.add(_entry(2))
+    await asyncio.gather(*bg, return_exceptions=True)
+    assert cache.stats["sessions"] == 0
+
+    state = await layer.get("s")
+    assert [e.content for e in state.entries] == ["note number 1"]
+    assert store.reads == 2
+
+
+@pytest.mark.asyncio
+async def test_remembered_entries_are_recalled_from_the_buffer(
+    client, auth_headers, app
+):
+    await client.post(
+        "/v1/remember",
+        json={"content": "user prefers dark roast coffee", "agent_id": "barista"},
+        headers=auth_headers,
+    )
+    resp = await client.post(
+        "/v1/recall",
+        json={
+            "query": "dark roast coffee",
+            "agent_id": "barista",
+            "layers": ["working"],
+        },
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    contents = [r["content"] for r in resp.json()["results"]]
+    assert "user prefers dark roast coffee" in contents
+
+    stats = (await client.get("/health")).json()["working_buffer"]
+    assert stats["sessions"] == 1
+    assert stats["hits"] >= 1